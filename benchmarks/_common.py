@@ -0,0 +1,176 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+import numpy as np
+
+# Make the application modules importable when running a benchmark directly
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+# Word list of the synthetic transcripts
+LOREM_WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+    "et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi aliquip "
+    "ex ea commodo consequat duis aute irure in reprehenderit voluptate velit esse cillum fugiat nulla "
+    "pariatur excepteur sint occaecat cupidatat non proident sunt culpa qui officia deserunt mollit anim "
+    "id est laborum"
+).split()
+
+def measure(func: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, float]]:
+    """
+    Runs a callable and measures wall time and CPU time.
+    
+    CPU time includes child processes (e.g. ffmpeg) that finished during the call.
+    
+    Args:
+        func (Callable): Function to benchmark
+        *args: Positional arguments for the function
+        **kwargs: Keyword arguments for the function
+        
+    Returns:
+        Tuple[Any, Dict[str, float]]: Function result and timing statistics
+    """
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    
+    result = func(*args, **kwargs)
+    
+    wall = time.perf_counter() - wall_before
+    cpu_self = time.process_time() - cpu_before
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_children = (
+        (children_after.ru_utime - children_before.ru_utime)
+        + (children_after.ru_stime - children_before.ru_stime)
+    )
+    
+    return result, {
+        "wall_s": wall,
+        "cpu_s": cpu_self + cpu_children,
+        "cpu_self_s": cpu_self,
+        "cpu_children_s": cpu_children,
+    }
+
+def make_test_video(output_path: str, duration: float, size: str = "1280x720", fps: int = 30) -> str:
+    """
+    Generates a synthetic H.264 test video with a sine tone audio track.
+    
+    Args:
+        output_path (str): Path where the video will be saved
+        duration (float): Duration in seconds
+        size (str): Frame size as WIDTHxHEIGHT
+        fps (int): Frame rate
+        
+    Returns:
+        str: Path to the generated video
+    """
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        'ffmpeg',
+        '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate={fps}:duration={duration}',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+        '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac',
+        '-y', output_path
+    ]
+    subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return output_path
+
+def make_test_audio(output_path: str, duration: float, sample_rate: int = 24000) -> str:
+    """
+    Generates a synthetic mono 16-bit WAV file.
+    
+    Args:
+        output_path (str): Path where the audio will be saved
+        duration (float): Duration in seconds
+        sample_rate (int): Sample rate in Hz
+        
+    Returns:
+        str: Path to the generated audio
+    """
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        'ffmpeg',
+        '-f', 'lavfi', '-i', f'sine=frequency=220:sample_rate={sample_rate}:duration={duration}',
+        '-c:a', 'pcm_s16le', '-ac', '1',
+        '-y', output_path
+    ]
+    subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return output_path
+
+def make_speech_audio(output_path: str, duration: float, sample_rate: int = 24000, seed: int = 0) -> str:
+    """
+    Generates a deterministic speech-like mono 16-bit WAV file.
+    
+    Voiced bursts of 0.5-4 s (a gliding tone with harmonics, amplitude-modulated
+    at a syllable rate, plus some noise) alternate with quiet pauses of 0.2-1.2 s.
+    The file is written block by block, so long fixtures don't need much memory.
+    
+    Args:
+        output_path (str): Path where the audio will be saved
+        duration (float): Duration in seconds
+        sample_rate (int): Sample rate in Hz
+        seed (int): Seed of the burst lengths, pitches and noise
+    
+    Returns:
+        str: Path to the generated audio
+    """
+    from modules.wav_writer import WavWriter
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    total_frames = int(duration * sample_rate)
+    with WavWriter(output_path, sample_rate) as writer:
+        while writer.num_frames < total_frames:
+            length = min(int(rng.uniform(0.5, 4.0) * sample_rate), total_frames - writer.num_frames)
+            t = np.arange(length) / sample_rate
+            pitch = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(0.2, 1.0) * t))
+            phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+            voice = np.sin(phase) + 0.5 * np.sin(2 * phase) + 0.25 * np.sin(3 * phase)
+            envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(3, 6) * t)
+            burst = 0.2 * voice * envelope + 0.02 * rng.standard_normal(length)
+            writer.write(burst.astype(np.float32))
+            
+            pause = min(int(rng.uniform(0.2, 1.2) * sample_rate), total_frames - writer.num_frames)
+            writer.write((0.002 * rng.standard_normal(pause)).astype(np.float32))
+    return output_path
+
+def make_transcript(num_words: int, seed: int = 0) -> str:
+    """
+    Generates a deterministic lorem-style transcript.
+    
+    Sentences of 4-24 words end in ".", "?" or "!", with a comma every few words.
+    
+    Args:
+        num_words (int): Number of words
+        seed (int): Seed of the word choice and sentence lengths
+    
+    Returns:
+        str: The transcript
+    """
+    rng = np.random.default_rng(seed)
+    words = rng.choice(LOREM_WORDS, size=num_words)
+    sentences = []
+    position = 0
+    while position < num_words:
+        length = int(rng.integers(4, 25))
+        sentence = list(words[position:position + length])
+        for i in range(2, len(sentence) - 1, 7):
+            sentence[i] += ","
+        sentences.append(" ".join(sentence).capitalize() + str(rng.choice([".", ".", ".", "?", "!"])))
+        position += length
+    return " ".join(sentences)
+
+def print_result(name: str, stats: Dict[str, float]):
+    """Print timing statistics for one benchmark case."""
+    print(
+        f"{name:<24} wall {stats['wall_s']:8.2f}s   "
+        f"cpu {stats['cpu_s']:8.2f}s   "
+        f"(self {stats['cpu_self_s']:.2f}s, children {stats['cpu_children_s']:.2f}s)"
+    )
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the local Whisper ASR backend for different worker counts.
+
+Reports wall time, real-time factor and real-time factor per core, to help
+choose between local and AssemblyAI transcription per job.
+
+Usage:
+    python benchmarks/bench_asr.py --audio talk.wav --workers 1 2 4
+"""
+import argparse
+import tempfile
+from pathlib import Path
+import numpy as np
+from _common import measure, print_result
+from modules.asr_backends import FasterWhisperBackend
+from modules.wav_writer import WavWriter
+
+def make_speech_like_audio(output_path: str, duration: float, sample_rate: int = 16000) -> str:
+    """Write a 16 kHz WAV of modulated tone bursts separated by pauses."""
+    rng = np.random.default_rng(0)
+    with WavWriter(output_path, sample_rate) as writer:
+        written = 0.0
+        while written < duration:
+            burst = rng.uniform(1.0, 6.0)
+            t = np.arange(int(burst * sample_rate)) / sample_rate
+            tone = 0.3 * np.sin(2 * np.pi * rng.uniform(120, 250) * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+            pause = rng.normal(0, 0.002, int(rng.uniform(0.3, 1.0) * sample_rate))
+            writer.write((np.concatenate([tone, pause]) * 32767).astype(np.int16))
+            written += burst + len(pause) / sample_rate
+    return output_path
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--audio", help="Audio file to transcribe (default: synthetic speech-like fixture)")
+    parser.add_argument("--duration", type=float, default=300.0, help="Duration of the synthetic fixture")
+    parser.add_argument("--language", default="en", help="Language code of the audio")
+    parser.add_argument("--model", default="small", help="faster-whisper model size")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2], help="Worker counts to compare")
+    parser.add_argument("--threads", type=int, default=2, help="Threads per worker")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = args.audio
+        if not audio_path:
+            print(f"Generating {args.duration:.0f}s fixture...")
+            audio_path = make_speech_like_audio(str(Path(tmp) / "speech.wav"), args.duration)
+        
+        # Transcribed first by each pool, so model loading isn't measured
+        warmup_path = make_speech_like_audio(str(Path(tmp) / "warmup.wav"), 20.0)
+        
+        print()
+        for num_workers in args.workers:
+            backend = FasterWhisperBackend(args.model, num_workers=num_workers, threads_per_worker=args.threads)
+            try:
+                backend.transcribe(warmup_path, args.language)
+                _, stats = measure(backend.transcribe, audio_path, args.language)
+            finally:
+                backend.close()
+            print_result(f"{num_workers} x {args.threads} threads", stats)
+            print(f"{'':<24} RTF {backend.last_stats['rtf']:.3f}   "
+                  f"per core {backend.last_stats['rtf_per_core']:.3f}")
+
+if __name__ == "__main__":
+    main()
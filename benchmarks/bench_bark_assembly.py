@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark Bark chunk assembly: pydub concatenation versus the incremental WAV writer.
+
+The model itself is not run; chunks are synthetic float32 arrays shaped like
+Bark output (24 kHz, a few seconds each).
+
+Usage:
+    python benchmarks/bench_bark_assembly.py --chunks 300
+"""
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+import numpy as np
+from _common import measure
+from modules.wav_writer import WavWriter
+
+SAMPLE_RATE = 24000
+
+def synthetic_chunks(count: int, seconds: float):
+    """Yield deterministic float32 chunks resembling generated speech."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    for i in range(count):
+        tone = 0.3 * np.sin(2 * np.pi * (120 + i % 50) * t)
+        yield (tone + 0.05 * rng.standard_normal(len(t))).astype(np.float32)
+
+def assemble_pydub(chunks, output_path: str, temp_dir: str):
+    """The previous assembly: write each chunk to a WAV, re-read it with pydub and concatenate."""
+    from pydub import AudioSegment
+    from scipy.io import wavfile
+    
+    combined_audio = AudioSegment.empty()
+    for i, audio_array in enumerate(chunks, 1):
+        chunk_path = str(Path(temp_dir) / f"chunk_{i}.wav")
+        wavfile.write(chunk_path, SAMPLE_RATE, (audio_array * 32767).astype(np.int16))
+        combined_audio += AudioSegment.from_wav(chunk_path)
+        Path(chunk_path).unlink()
+    combined_audio.export(output_path, format="wav")
+
+def assemble_writer(chunks, output_path: str):
+    """The current assembly: stream chunks into an incremental WAV writer."""
+    with WavWriter(output_path, SAMPLE_RATE) as writer:
+        for audio_array in chunks:
+            writer.write(audio_array)
+
+def run(name: str, func, *args):
+    """Run one assembly strategy and print time and peak traced memory."""
+    tracemalloc.start()
+    _, stats = measure(func, *args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<12} wall {stats['wall_s']:8.2f}s   cpu {stats['cpu_s']:8.2f}s   "
+          f"peak memory {peak / 1024 ** 2:8.1f} MB")
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=300, help="Number of chunks")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Seconds of audio per chunk")
+    args = parser.parse_args()
+    
+    print(f"Assembling {args.chunks} chunks of {args.seconds:.1f}s "
+          f"({args.chunks * args.seconds / 60:.1f} minutes of audio)")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        run("writer", assemble_writer, synthetic_chunks(args.chunks, args.seconds), str(Path(tmp) / "writer.wav"))
+        try:
+            run("pydub", assemble_pydub, synthetic_chunks(args.chunks, args.seconds), str(Path(tmp) / "pydub.wav"), tmp)
+        except ImportError as e:
+            print(f"pydub      skipped ({str(e)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark Bark generation in worker processes against per-chunk generation.
+
+The reference is the production per-chunk path: Bark's own generate_audio,
+seeded per chunk, run in this process with the workers' torch thread count.
+Both runs use the same seed, and the script reports how many semantic, coarse
+and fine tokens differ between them (there should be none) besides the
+throughput. Requires the Bark models.
+
+Usage:
+    python benchmarks/bench_bark_batch.py --chunks 16 --batch-size 8
+"""
+import argparse
+import numpy as np
+from _common import measure, print_result
+from modules.bark_batch import BarkProcessPool, choose_batch_size, generate_chunk_seeded
+
+SENTENCES = [
+    "Willkommen zurück auf unserem Kanal.",
+    "Heute schauen wir uns ein spannendes Thema an.",
+    "Bevor wir anfangen, vergesst nicht zu abonnieren.",
+    "Das war es auch schon für heute, bis zum nächsten Mal.",
+]
+TOKEN_KINDS = ("semantic_prompt", "coarse_prompt", "fine_prompt")
+
+def count_mismatches(reference: np.ndarray, tokens: np.ndarray) -> int:
+    """Count differing tokens, counting every token as different if the shapes differ."""
+    if reference.shape != tokens.shape:
+        return max(reference.size, tokens.size)
+    return int(np.count_nonzero(reference != tokens))
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=16, help="Number of chunks")
+    parser.add_argument("--batch-size", type=int, default=None, help="Worker processes (default: chosen from RAM)")
+    parser.add_argument("--threads-per-worker", type=int, default=2, help="Torch threads per worker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--speaker", default="v2/de_speaker_6")
+    args = parser.parse_args()
+    
+    import torch
+    from bark import preload_models
+    torch.set_num_threads(args.threads_per_worker)
+    preload_models()
+    
+    texts = [SENTENCES[i % len(SENTENCES)] for i in range(args.chunks)]
+    batch_size = choose_batch_size(args.batch_size)
+    indices = list(range(args.chunks))
+    
+    reference, single_stats = measure(
+        lambda: [generate_chunk_seeded(text, args.speaker, args.seed, i) for i, text in enumerate(texts)]
+    )
+    with BarkProcessPool(batch_size, args.threads_per_worker) as pool:
+        # Keep the model load out of the measurement
+        list(pool.imap(texts[:batch_size], args.speaker, args.seed, indices[:batch_size]))
+        batched, batch_stats = measure(lambda: list(pool.imap(texts, args.speaker, args.seed, indices)))
+    
+    print()
+    print_result("per-chunk", single_stats)
+    print_result(f"{batch_size} workers", batch_stats)
+    for name, stats in [("per-chunk", single_stats), ("workers", batch_stats)]:
+        print(f"{name:<12} {args.chunks / stats['wall_s'] * 60:8.1f} chunks/minute")
+    
+    print()
+    mismatched_chunks = 0
+    for i, ((reference_tokens, reference_audio), (audio, tokens)) in enumerate(zip(reference, batched)):
+        mismatches = {kind: count_mismatches(reference_tokens[kind], tokens[kind]) for kind in TOKEN_KINDS}
+        identical_audio = reference_audio.shape == audio.shape and np.array_equal(reference_audio, audio)
+        if any(mismatches.values()) or not identical_audio:
+            mismatched_chunks += 1
+            print(f"Chunk {i}: " + ", ".join(f"{kind.split('_')[0]} {count} tokens differ"
+                                            for kind, count in mismatches.items())
+                  + ("" if identical_audio else ", audio differs"))
+    print(f"{args.chunks - mismatched_chunks}/{args.chunks} chunks identical to per-chunk generation")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the parallel keyframe-segmented video encoder against a single-stream encode.
+
+Both retime a synthetic lavfi test video with the same encode profile. The
+single-stream case is one ffmpeg process using all cores, like the previous
+re-encode paths; the parallel case splits the work over several encoder
+processes. Run it on the machine size you deploy to (e.g. 16-32 cores).
+
+Usage:
+    python benchmarks/bench_parallel_encode.py --duration 300 --size 1920x1080 --workers 4 8 16
+"""
+import argparse
+import importlib.util
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from _common import measure, make_test_video, print_result
+from modules.media_info import probe_media
+from modules.parallel_encoder import encode_retimed, get_profile
+
+def encode_single_stream(video_path: str, output_path: str, time_scale: float, profile_name: str) -> str:
+    """Retime and encode the video stream in one ffmpeg process."""
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin',
+        '-i', video_path,
+        '-vf', f"setpts=PTS*{time_scale:.8f}",
+        *get_profile(profile_name).args(),
+        '-an',
+        '-y', output_path
+    ]
+    subprocess.run(cmd, check=True)
+    return output_path
+
+def encode_moviepy(video_path: str, output_path: str, time_scale: float, profile_name: str) -> str:
+    """Retime and encode the video stream with moviepy's frame pipe (the old adjust_video_speed)."""
+    from moviepy.editor import VideoFileClip
+    video = VideoFileClip(video_path)
+    adjusted = video.speedx(factor=1 / time_scale)
+    adjusted.write_videofile(output_path, codec='libx264', audio=False, preset=get_profile(profile_name).preset,
+                             fps=video.fps, logger=None)
+    video.close()
+    adjusted.close()
+    return output_path
+
+def main():
+    """Main function."""
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=120.0, help="Fixture duration in seconds")
+    parser.add_argument("--size", default="1920x1080", help="Fixture frame size")
+    parser.add_argument("--scale", type=float, default=1.15, help="Retime factor applied to the duration")
+    parser.add_argument("--profile", default="balanced", help="Encode profile (fast, balanced, quality)")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({max(1, cpu_count // 4), max(1, cpu_count // 2), cpu_count}),
+                        help="Encoder process counts to compare")
+    parser.add_argument("--moviepy", action="store_true", help="Also measure the moviepy frame-pipe encode")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Generating {args.duration:.0f}s {args.size} fixture...")
+        # libx264's default GOP: a keyframe at least every 250 frames
+        video_path = make_test_video(str(Path(tmp) / "video.mp4"), args.duration, size=args.size)
+        print(f"{cpu_count} CPUs, profile {args.profile}, retime x{args.scale}\n")
+        
+        _, single_stats = measure(encode_single_stream, video_path, str(Path(tmp) / "single.mp4"),
+                                  args.scale, args.profile)
+        print_result("single stream", single_stats)
+        
+        if args.moviepy:
+            if importlib.util.find_spec("moviepy") is None:
+                print("moviepy isn't installed, skipping the frame-pipe encode")
+            else:
+                _, moviepy_stats = measure(encode_moviepy, video_path, str(Path(tmp) / "moviepy.mp4"),
+                                           args.scale, args.profile)
+                print_result("moviepy", moviepy_stats)
+                print(f"{'':<24} {moviepy_stats['wall_s'] / single_stats['wall_s']:.2f}x single-stream wall")
+        
+        for workers in args.workers:
+            output_path = str(Path(tmp) / f"parallel{workers}.mp4")
+            _, stats = measure(encode_retimed, video_path, output_path, args.scale, args.profile, workers)
+            print_result(f"parallel, {workers} workers", stats)
+            print(f"{'':<24} {single_stats['wall_s'] / stats['wall_s']:.2f}x speedup, "
+                  f"output {probe_media(output_path).duration:.2f}s "
+                  f"(expected {args.duration * args.scale:.2f}s)")
+
+if __name__ == "__main__":
+    main()
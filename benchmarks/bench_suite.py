@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+
+"""
+Time and memory-profile the pipeline stages at several input sizes.
+
+Fixtures are synthetic and deterministic: lavfi test videos, speech-like tone
+and noise audio, and lorem-style transcripts. They are generated once into the
+fixture directory and reused by later runs. Translation and speech synthesis
+run on the offline stubs in stub_backends, so no network or model is needed.
+Each case runs in a fresh process, so its peak RSS is measured on its own. The
+results are written as JSON; compare two runs with compare_results.py.
+
+Usage:
+    python benchmarks/bench_suite.py --sizes small medium --repeat 3 --output before.json
+    python benchmarks/bench_suite.py --stages adjust_audio_speed sync_retime --sizes large
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+import numpy as np
+from _common import SRC_DIR, measure, make_speech_audio, make_test_video, make_transcript
+from stub_backends import StubTranslationBackend, StubTTS
+from modules.audio_extractor import extract_audio
+from modules.dubbing_timeline import DubSegment, render_timeline
+from modules.media_speed_adjuster import MediaSpeedAdjuster
+from modules.synchronizer import Synchronizer
+from modules.translation_executor import ConcurrentTranslator
+from modules.translator import chunk_text, split_sentences, translate_segments
+from modules.tts_generator import TTSGenerator
+
+SIZE_NAMES = ("small", "medium", "large")
+SPEECH_SAMPLE_RATE = 24000
+# Pace of the synthetic utterances, about that of conversational English
+WORDS_PER_SECOND = 2.5
+DEFAULT_FIXTURES_DIR = Path(tempfile.gettempdir()) / "ytgermanizer-bench-fixtures"
+
+@dataclass
+class Case:
+    """A benchmarked stage: its input sizes, fixture setup and measured call."""
+    stage: str
+    unit: str
+    sizes: Dict[str, float]
+    prepare: Callable[[float, Path, argparse.Namespace], Dict[str, Any]]
+    run: Callable[[Dict[str, Any], float], List[str]]  # returns output files to remove
+
+def _cached(path: Path, generate: Callable[[str], Any]) -> str:
+    """Generate a fixture unless it already exists; a partial file is never left behind."""
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"partial-{path.name}")
+        generate(str(partial))
+        partial.replace(path)
+    return str(path)
+
+def video_fixture(fixtures_dir: Path, seconds: float, size: str) -> str:
+    """Get a lavfi test video of the given length and frame size."""
+    return _cached(fixtures_dir / f"video_{seconds:g}s_{size}.mp4",
+                   lambda path: make_test_video(path, seconds, size=size, fps=25))
+
+def speech_fixture(fixtures_dir: Path, seconds: float) -> str:
+    """Get a speech-like WAV of the given length."""
+    return _cached(fixtures_dir / f"speech_{seconds:g}s_{SPEECH_SAMPLE_RATE}.wav",
+                   lambda path: make_speech_audio(path, seconds, SPEECH_SAMPLE_RATE))
+
+def transcript_fixture(fixtures_dir: Path, words: int) -> str:
+    """Get a lorem-style transcript of the given number of words."""
+    return _cached(fixtures_dir / f"transcript_{words}w.txt",
+                   lambda path: Path(path).write_text(make_transcript(words), encoding="utf-8"))
+
+def make_segments(transcript: str, seed: int = 0) -> List[DubSegment]:
+    """Lay the sentences of a transcript out as two speakers' utterances with pauses."""
+    rng = np.random.default_rng(seed)
+    segments = []
+    position = 0.0
+    for sentence in split_sentences(transcript):
+        position += rng.uniform(0.3, 1.2)
+        length = len(sentence.split()) / WORDS_PER_SECOND
+        segments.append(DubSegment(
+            start=int(position * 1000),
+            end=int((position + length) * 1000),
+            speaker=str(rng.choice(["A", "B"])),
+            text=sentence,
+            translation=f"[de] {sentence}"
+        ))
+        position += length
+    return segments
+
+def prepare_transcript(size: float, fixtures_dir: Path, args) -> Dict[str, Any]:
+    """Fixtures of the text stages: a transcript of size words."""
+    return {"transcript": transcript_fixture(fixtures_dir, int(size))}
+
+def prepare_utterances(size: float, fixtures_dir: Path, args) -> Dict[str, Any]:
+    """Fixtures of the translation stage: a transcript of about size sentences."""
+    return {"transcript": transcript_fixture(fixtures_dir, int(size) * 14)}
+
+def prepare_timeline(size: float, fixtures_dir: Path, args) -> Dict[str, Any]:
+    """Fixtures of the dubbing stage: utterances covering size seconds."""
+    return {"transcript": transcript_fixture(fixtures_dir, int(size * WORDS_PER_SECOND))}
+
+def prepare_video(size: float, fixtures_dir: Path, args) -> Dict[str, Any]:
+    """Fixtures of the extraction stage: a video of size seconds."""
+    return {"video": video_fixture(fixtures_dir, size, args.video_size)}
+
+def prepare_speech(size: float, fixtures_dir: Path, args) -> Dict[str, Any]:
+    """Fixtures of the audio retime stage: speech of size seconds."""
+    return {"audio": speech_fixture(fixtures_dir, size)}
+
+def prepare_video_and_speech(size: float, fixtures_dir: Path, args, speech_ratio: float) -> Dict[str, Any]:
+    """Fixtures of the sync stages: a video of size seconds and speech speech_ratio times as long."""
+    return {
+        "video": video_fixture(fixtures_dir, size, args.video_size),
+        "audio": speech_fixture(fixtures_dir, round(size * speech_ratio, 3)),
+    }
+
+def run_extract_audio(inputs: Dict[str, Any], size: float) -> List[str]:
+    """Extract the audio (and its derivatives) of the video."""
+    extract_audio(inputs["video"], "audio.wav")
+    return []
+
+def run_chunk_text(inputs: Dict[str, Any], size: float) -> List[str]:
+    """Split the transcript into translation chunks."""
+    chunk_text(Path(inputs["transcript"]).read_text(encoding="utf-8"))
+    return []
+
+def run_split_text_into_chunks(inputs: Dict[str, Any], size: float) -> List[str]:
+    """Split the transcript into TTS chunks."""
+    # The text helpers don't use the model, so none is loaded
+    generator = TTSGenerator.__new__(TTSGenerator)
+    generator.split_text_into_chunks(Path(inputs["transcript"]).read_text(encoding="utf-8"))
+    return []
+
+def run_translate_segments(inputs: Dict[str, Any], size: float) -> List[str]:
+    """Translate the utterances with the stub backend."""
+    texts = split_sentences(Path(inputs["transcript"]).read_text(encoding="utf-8"))[:int(size)]
+    # Rate limits of the real service are left out, they would dominate the measurement
+    translator = ConcurrentTranslator(StubTranslationBackend(), requests_per_second=1000.0, burst=100)
+    translate_segments(texts, translator=translator)
+    return []
+
+def run_render_timeline(inputs: Dict[str, Any], size: float) -> List[str]:
+    """Synthesize the utterances with the stub TTS and place them on the timeline."""
+    segments = make_segments(Path(inputs["transcript"]).read_text(encoding="utf-8"))
+    render_timeline(segments, StubTTS(), "speech.wav", size)
+    return []
+
+def run_adjust_audio_speed(inputs: Dict[str, Any], size: float) -> List[str]:
+    """Time-stretch the speech to 1/1.15 of its length, preserving pitch."""
+    return [MediaSpeedAdjuster().adjust_audio_speed(inputs["audio"], size / 1.15)]
+
+def run_harmonize_durations(inputs: Dict[str, Any], size: float) -> List[str]:
+    """Retime video and speech to meet halfway."""
+    return list(MediaSpeedAdjuster().harmonize_durations(inputs["video"], inputs["audio"]))
+
+def run_sync(inputs: Dict[str, Any], size: float) -> List[str]:
+    """Synchronize the speech with the video, the sync mode follows from the durations."""
+    Synchronizer().sync_audio_with_video(inputs["video"], inputs["audio"], output_path="synchronized.mp4")
+    return []
+
+CASES = [
+    Case("extract_audio", "s", {"small": 30, "medium": 300, "large": 1800}, prepare_video, run_extract_audio),
+    Case("chunk_text", "words", {"small": 10_000, "medium": 100_000, "large": 1_000_000},
+         prepare_transcript, run_chunk_text),
+    Case("split_text_into_chunks", "words", {"small": 10_000, "medium": 100_000, "large": 1_000_000},
+         prepare_transcript, run_split_text_into_chunks),
+    Case("translate_segments", "utterances", {"small": 100, "medium": 1000, "large": 10_000},
+         prepare_utterances, run_translate_segments),
+    Case("render_timeline", "s", {"small": 60, "medium": 600, "large": 3600}, prepare_timeline, run_render_timeline),
+    Case("adjust_audio_speed", "s", {"small": 60, "medium": 600, "large": 3600},
+         prepare_speech, run_adjust_audio_speed),
+    Case("harmonize_durations", "s", {"small": 30, "medium": 120, "large": 600},
+         lambda size, fixtures_dir, args: prepare_video_and_speech(size, fixtures_dir, args, 1.1),
+         run_harmonize_durations),
+    # Speech as long as the video: the stream copy mux
+    Case("sync_copy", "s", {"small": 30, "medium": 300, "large": 1800},
+         lambda size, fixtures_dir, args: prepare_video_and_speech(size, fixtures_dir, args, 1.0), run_sync),
+    # Speech 10% longer: the video is retimed and re-encoded
+    Case("sync_retime", "s", {"small": 30, "medium": 120, "large": 600},
+         lambda size, fixtures_dir, args: prepare_video_and_speech(size, fixtures_dir, args, 1.1), run_sync),
+]
+CASES_BY_STAGE = {case.stage: case for case in CASES}
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process in MB."""
+    # VmHWM starts over at exec, ru_maxrss keeps the parent's RSS at the fork
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_child(stage: str, size_name: str, args) -> Dict[str, float]:
+    """Run one case once in this process and return its measurements."""
+    case = CASES_BY_STAGE[stage]
+    size = case.sizes[size_name]
+    inputs = case.prepare(size, Path(args.fixtures_dir), args)
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # Outputs of the stage (and FileManager's downloads directory) go to the work directory
+        os.chdir(workdir)
+        try:
+            rss_before = peak_rss_mb()
+            outputs, stats = measure(case.run, inputs, size)
+            stats["peak_rss_mb"] = peak_rss_mb()
+            stats["rss_growth_mb"] = stats["peak_rss_mb"] - rss_before
+            # Largest child process (ffmpeg); may include the RSS it inherited at the fork
+            stats["children_peak_rss_mb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+            for path in outputs:
+                Path(path).unlink(missing_ok=True)
+        finally:
+            os.chdir(cwd)
+    return stats
+
+def run_case(case: Case, size_name: str, args) -> Dict[str, Any]:
+    """Run a case args.repeat times in fresh processes and summarize the runs."""
+    runs = []
+    for _ in range(args.repeat):
+        with tempfile.NamedTemporaryFile(suffix=".json") as result_file:
+            cmd = [
+                sys.executable, __file__, "--child", case.stage, size_name, result_file.name,
+                "--fixtures-dir", str(args.fixtures_dir), "--video-size", args.video_size
+            ]
+            process = subprocess.run(cmd, stdout=None if args.verbose else subprocess.DEVNULL,
+                                     stderr=None if args.verbose else subprocess.PIPE)
+            if process.returncode != 0:
+                error = process.stderr.decode(errors="replace")[-1000:] if process.stderr else ""
+                raise RuntimeError(f"{case.stage} ({size_name}) failed: {error}")
+            runs.append(json.loads(Path(result_file.name).read_text(encoding="utf-8")))
+    
+    size = case.sizes[size_name]
+    wall = statistics.median(run["wall_s"] for run in runs)
+    return {
+        "stage": case.stage,
+        "size": size_name,
+        "input": size,
+        "unit": case.unit,
+        "repeat": len(runs),
+        "wall_s": wall,
+        "wall_s_min": min(run["wall_s"] for run in runs),
+        "cpu_s": statistics.median(run["cpu_s"] for run in runs),
+        "throughput": size / wall if wall else None,
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "rss_growth_mb": max(run["rss_growth_mb"] for run in runs),
+        "children_peak_rss_mb": max(run["children_peak_rss_mb"] for run in runs),
+        "runs": runs,
+    }
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and revision the results were measured on."""
+    def first_line(cmd: List[str]) -> str:
+        try:
+            output = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    cwd=str(SRC_DIR)).stdout.decode(errors="replace")
+            return output.splitlines()[0] if output else ""
+        except OSError:
+            return ""
+    
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": first_line(["git", "rev-parse", "HEAD"]),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": first_line(["ffmpeg", "-version"]),
+    }
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--stages", nargs="+", choices=list(CASES_BY_STAGE), default=list(CASES_BY_STAGE),
+                        help="Stages to benchmark (default: all)")
+    parser.add_argument("--sizes", nargs="+", choices=SIZE_NAMES, default=["small", "medium"],
+                        help="Input sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, the median time is reported")
+    parser.add_argument("--output", default="bench_results.json", help="Path of the JSON results")
+    parser.add_argument("--fixtures-dir", default=str(DEFAULT_FIXTURES_DIR), help="Where fixtures are cached")
+    parser.add_argument("--video-size", default="640x360", help="Frame size of the video fixtures")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of the stages")
+    parser.add_argument("--child", nargs=3, metavar=("STAGE", "SIZE", "RESULT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        stage, size_name, result_path = args.child
+        stats = run_child(stage, size_name, args)
+        Path(result_path).write_text(json.dumps(stats), encoding="utf-8")
+        return
+    
+    cases = [CASES_BY_STAGE[stage] for stage in args.stages]
+    print(f"Preparing fixtures in {args.fixtures_dir}...")
+    for case in cases:
+        for size_name in args.sizes:
+            case.prepare(case.sizes[size_name], Path(args.fixtures_dir), args)
+    
+    results = []
+    for case in cases:
+        for size_name in args.sizes:
+            result = run_case(case, size_name, args)
+            results.append(result)
+            print(f"{case.stage:<24} {size_name:<7} {result['input']:>9,.0f} {case.unit:<11}"
+                  f"wall {result['wall_s']:8.2f}s   cpu {result['cpu_s']:8.2f}s   "
+                  f"peak RSS {result['peak_rss_mb']:7.0f} MB (+{result['rss_growth_mb']:.0f} MB)   "
+                  f"children {result['children_peak_rss_mb']:6.0f} MB")
+    
+    report = {"environment": environment(), "results": results}
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
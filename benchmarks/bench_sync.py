@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the Synchronizer mux paths: stream copy versus full re-encode.
+
+The re-encode is measured for both the single-pass ffmpeg filtergraph engine
+and the legacy moviepy engine.
+
+Usage:
+    python benchmarks/bench_sync.py --duration 120
+"""
+import argparse
+import tempfile
+from pathlib import Path
+from _common import measure, make_test_video, make_test_audio, print_result
+from modules.synchronizer import Synchronizer
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=60.0, help="Fixture duration in seconds")
+    parser.add_argument("--size", default="1920x1080", help="Fixture frame size")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Generating {args.duration:.0f}s {args.size} fixture...")
+        video_path = make_test_video(str(Path(tmp) / "video.mp4"), args.duration, size=args.size)
+        audio_path = make_test_audio(str(Path(tmp) / "tts.wav"), args.duration)
+        
+        synchronizer = Synchronizer()
+        
+        _, copy_stats = measure(
+            synchronizer.sync_audio_with_video, video_path, audio_path, mux_mode="copy"
+        )
+        _, single_pass_stats = measure(
+            synchronizer.sync_audio_with_video, video_path, audio_path,
+            mux_mode="reencode", reencode_engine="ffmpeg"
+        )
+        _, moviepy_stats = measure(
+            synchronizer.sync_audio_with_video, video_path, audio_path,
+            mux_mode="reencode", reencode_engine="moviepy"
+        )
+        
+        print()
+        print_result("stream copy", copy_stats)
+        print_result("re-encode (ffmpeg)", single_pass_stats)
+        print_result("re-encode (moviepy)", moviepy_stats)
+        for name, stats in [("ffmpeg", single_pass_stats), ("moviepy", moviepy_stats)]:
+            print(f"Stream copy vs {name}: {stats['wall_s'] / copy_stats['wall_s']:.1f}x wall, "
+                  f"{stats['cpu_s'] / max(copy_stats['cpu_s'], 1e-9):.1f}x cpu")
+
+if __name__ == "__main__":
+    main()
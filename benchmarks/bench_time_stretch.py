@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the NumPy WSOLA time-stretch engine against ffmpeg's atempo filter.
+
+Both stretch the same 16-bit WAV file to file. Throughput is reported as input
+samples per CPU second, i.e. samples/sec/core (both run single-threaded).
+
+Usage:
+    python benchmarks/bench_time_stretch.py --duration 600 --tempo 0.8 1.25 1.6
+"""
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+from _common import measure, print_result
+from bench_asr import make_speech_like_audio
+from modules.ffmpeg_runner import atempo_chain
+from modules.media_info import probe_media
+from modules.time_stretch import time_stretch_wav
+
+def ffmpeg_atempo(input_path: str, output_path: str, tempo: float) -> str:
+    """Stretch a WAV file with ffmpeg's atempo filter on one thread."""
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin',
+        '-threads', '1', '-filter_threads', '1',
+        '-i', input_path,
+        '-af', atempo_chain(tempo),
+        '-c:a', 'pcm_s16le',
+        '-y', output_path
+    ]
+    subprocess.run(cmd, check=True)
+    return output_path
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--audio", help="16-bit WAV file to stretch (default: synthetic speech-like fixture)")
+    parser.add_argument("--duration", type=float, default=300.0, help="Duration of the synthetic fixture")
+    parser.add_argument("--sample-rate", type=int, default=44100, help="Sample rate of the synthetic fixture")
+    parser.add_argument("--tempo", type=float, nargs="+", default=[0.8, 1.25], help="Tempo factors to compare")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = args.audio
+        if not audio_path:
+            print(f"Generating {args.duration:.0f}s fixture...")
+            audio_path = make_speech_like_audio(str(Path(tmp) / "speech.wav"), args.duration, args.sample_rate)
+        info = probe_media(audio_path)
+        num_samples = info.duration * info.sample_rate * info.channels
+        
+        print()
+        for tempo in args.tempo:
+            results = {}
+            for name, stretch in [("wsola", time_stretch_wav), ("atempo", ffmpeg_atempo)]:
+                output_path = str(Path(tmp) / f"{name}_{tempo}.wav")
+                _, stats = measure(stretch, audio_path, output_path, tempo)
+                results[name] = num_samples / max(stats["cpu_s"], 1e-9)
+                print_result(f"{name} x{tempo}", stats)
+                print(f"{'':<24} {results[name] / 1e6:.2f}M samples/sec/core, "
+                      f"output {probe_media(output_path).duration:.2f}s "
+                      f"(expected {info.duration / tempo:.2f}s)")
+            print(f"WSOLA vs atempo at x{tempo}: {results['wsola'] / results['atempo']:.2f}x throughput per core")
+            print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the peak memory of assembling long dubbed tracks.
+
+Speech-like clips are mixed at their start times into a track of the given
+length, once with the memory-mapped TimelineBuffer and once into a full-length
+in-memory array written at the end (as the previous whole-track assembly did).
+Each case runs in a fresh process, so its peak RSS is measured on its own.
+
+Usage:
+    python benchmarks/bench_timeline_memory.py --durations 600 3600 10800
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from _common import SRC_DIR
+from modules.timeline_buffer import TimelineBuffer
+from modules.wav_writer import WavWriter
+
+SAMPLE_RATE = 22050
+
+def make_clips(duration: float, seed: int = 0):
+    """Yield (start frame, int16 clip) pairs of modulated tone bursts separated by pauses."""
+    rng = np.random.default_rng(seed)
+    position = 0.0
+    while True:
+        length = rng.uniform(1.0, 6.0)
+        position += rng.uniform(0.3, 1.5)
+        if position + length > duration:
+            return
+        t = np.arange(int(length * SAMPLE_RATE)) / SAMPLE_RATE
+        tone = 0.3 * np.sin(2 * np.pi * rng.uniform(120, 250) * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+        yield int(position * SAMPLE_RATE), (tone * 32767).astype(np.int16)
+        position += length
+
+def assemble(mode: str, duration: float, output_path: str):
+    """Assemble a track of duration seconds at output_path ("none" measures the interpreter alone)."""
+    num_frames = int(duration * SAMPLE_RATE)
+    if mode == "mmap":
+        with TimelineBuffer(output_path, SAMPLE_RATE, num_frames=num_frames) as timeline:
+            for start, clip in make_clips(duration):
+                timeline.mix(clip, start)
+    elif mode == "in-memory":
+        track = np.zeros(num_frames, dtype=np.float32)
+        for start, clip in make_clips(duration):
+            track[start:start + len(clip)] += clip.astype(np.float32) / 32768.0
+        with WavWriter(output_path, SAMPLE_RATE) as writer:
+            writer.write(track)
+
+def run_child(mode: str, duration: float) -> dict:
+    """Run one case in a fresh interpreter and return its measurements."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cmd = [sys.executable, __file__, "--child", mode, str(duration), str(Path(tmp) / "track.wav")]
+        process = subprocess.run(cmd, stdout=subprocess.PIPE, check=True, cwd=str(SRC_DIR))
+    return json.loads(process.stdout)
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[600, 3600, 10800],
+                        help="Track durations in seconds")
+    parser.add_argument("--modes", nargs="+", default=["mmap", "in-memory"], help="Assembly modes to compare")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "DURATION", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        mode, duration, output_path = args.child
+        start = time.perf_counter()
+        assemble(mode, float(duration), output_path)
+        # ru_maxrss is in kilobytes on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(json.dumps({"peak_rss_mb": peak_rss, "wall_s": time.perf_counter() - start}))
+        return
+    
+    baseline = run_child("none", 0)["peak_rss_mb"]
+    print(f"Interpreter baseline: {baseline:.0f} MB peak RSS\n")
+    for duration in args.durations:
+        for mode in args.modes:
+            result = run_child(mode, duration)
+            print(f"{mode:<10} {duration / 60:6.0f} min   peak RSS {result['peak_rss_mb']:8.0f} MB "
+                  f"(+{result['peak_rss_mb'] - baseline:.0f} MB)   wall {result['wall_s']:6.1f}s")
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the transcription upload: temp-file MP3 versus streamed speech encoding.
+
+Both paths upload to a local stand-in for the AssemblyAI API, so the numbers
+show encode time and upload size rather than real network throughput.
+
+Usage:
+    python benchmarks/bench_transcribe_upload.py --duration 600
+"""
+import argparse
+import os
+import tempfile
+from pathlib import Path
+from _common import measure, make_test_video, print_result
+from fake_assemblyai import FakeAssemblyAIServer
+from modules import transcriber
+from modules.file_manager import FileManager
+
+def legacy_upload(audio_path: str, api_key: str) -> str:
+    """Convert to a 44.1 kHz MP3 temp file and upload it."""
+    mp3_path = transcriber.convert_audio_to_mp3(audio_path, FileManager())
+    try:
+        return transcriber.upload_audio(mp3_path, api_key)
+    finally:
+        Path(mp3_path).unlink(missing_ok=True)
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=float, default=300.0, help="Fixture duration in seconds")
+    args = parser.parse_args()
+    
+    server = FakeAssemblyAIServer().start_background()
+    os.environ["ASSEMBLYAI_BASE_URL"] = server.base_url
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"Generating {args.duration:.0f}s fixture...")
+            video_path = make_test_video(str(Path(tmp) / "video.mp4"), args.duration, size="320x240", fps=10)
+            
+            cases = [("temp file mp3", lambda: legacy_upload(video_path, "bench"))]
+            for codec in ("opus", "mp3"):
+                if codec == "opus" and not transcriber.has_encoder("libopus"):
+                    continue
+                cases.append((f"streamed {codec}", lambda codec=codec: transcriber.upload_audio_stream(
+                    video_path, "bench", codec)))
+            
+            print()
+            for name, upload in cases:
+                upload_url, stats = measure(upload)
+                upload_bytes = server.uploads[upload_url.rsplit("/", 1)[-1]]["bytes"]
+                print_result(name, stats)
+                print(f"{'':<24} {upload_bytes / 1024:8.0f} KB uploaded")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark many concurrent transcripts through one TranscriptionClient.
+
+Transcripts are submitted to a local stand-in for AssemblyAI and completed
+either by polling alone or by webhook callbacks. Reports the time until all
+are done, how many status requests were made and how many threads the client used.
+
+Usage:
+    python benchmarks/bench_transcription_client.py --jobs 50 --processing-seconds 5
+"""
+import argparse
+import threading
+from concurrent.futures import wait
+from _common import measure
+from fake_assemblyai import FakeAssemblyAIServer
+from modules.transcription_client import TranscriptionClient
+
+def run_case(server: FakeAssemblyAIServer, jobs: int, audio_seconds: float, webhook: bool):
+    """Submit the transcripts, wait for all of them and print the statistics."""
+    server.poll_count = 0
+    client = TranscriptionClient(
+        "bench",
+        base_url=server.base_url,
+        webhook_port=0 if webhook else None
+    )
+    
+    def submit_and_wait():
+        futures = [
+            client.submit_url(f"{server.base_url}/uploads/{i}", duration=audio_seconds, timeout=120)
+            for i in range(jobs)
+        ]
+        # Threads of the client itself, regardless of the number of transcripts
+        client_threads = sum(1 for thread in threading.enumerate() if thread.name.startswith("transcript-"))
+        done, _ = wait(futures)
+        return sum(1 for future in done if future.exception() is not None), client_threads
+    
+    try:
+        (failed, client_threads), stats = measure(submit_and_wait)
+    finally:
+        client.close()
+    
+    name = "webhook" if webhook else "polling"
+    print(f"{name:<24} wall {stats['wall_s']:8.2f}s   status requests {server.poll_count:5d}   "
+          f"client threads {client_threads}   failed {failed}")
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=50, help="Number of concurrent transcripts")
+    parser.add_argument("--processing-seconds", type=float, default=5.0,
+                        help="Time the stand-in takes per transcript")
+    parser.add_argument("--audio-seconds", type=float, default=20.0,
+                        help="Audio duration the polling backoff is tuned to")
+    args = parser.parse_args()
+    
+    server = FakeAssemblyAIServer(processing_seconds=args.processing_seconds).start_background()
+    try:
+        print(f"{args.jobs} transcripts, {args.processing_seconds:.0f}s processing each\n")
+        run_case(server, args.jobs, args.audio_seconds, webhook=False)
+        run_case(server, args.jobs, args.audio_seconds, webhook=True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
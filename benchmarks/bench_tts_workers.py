@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark Tacotron2 synthesis throughput for different worker counts.
+
+Synthesizes the same sentences with TacotronProcessPool at each worker count
+and reports sentences per second, the speedup over the first count and the
+scaling efficiency (speedup divided by the worker ratio), to check how close
+the pool gets to linear scaling. Requires the Coqui TTS model.
+
+Usage:
+    python benchmarks/bench_tts_workers.py --sentences 128 --workers 1 2 4 8 16 32 --threads 1
+"""
+import argparse
+import os
+from typing import List
+from _common import measure, print_result
+from modules.tts_generator import TACOTRON2_MODEL_NAME
+from modules.tts_worker_pool import TacotronProcessPool
+
+SENTENCES = [
+    "Willkommen zurück auf unserem Kanal.",
+    "Heute schauen wir uns ein spannendes Thema an.",
+    "Bevor wir anfangen, vergesst nicht zu abonnieren.",
+    "Im ersten Teil geht es um die Grundlagen.",
+    "Danach zeige ich euch ein paar praktische Beispiele.",
+    "Das war es auch schon für heute, bis zum nächsten Mal.",
+]
+
+def default_worker_counts(threads: int) -> List[int]:
+    """Powers of two up to the number of available CPUs divided by the threads per worker."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    counts = [1]
+    while counts[-1] * 2 * threads <= cpus:
+        counts.append(counts[-1] * 2)
+    return counts
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sentences", type=int, default=64, help="Number of sentences per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Worker counts to compare (default: powers of two up to the CPU count)")
+    parser.add_argument("--threads", type=int, default=1, help="Torch threads per worker")
+    args = parser.parse_args()
+    
+    texts = [SENTENCES[i % len(SENTENCES)] for i in range(args.sentences)]
+    worker_counts = args.workers or default_worker_counts(args.threads)
+    
+    print()
+    baseline = None
+    for num_workers in worker_counts:
+        with TacotronProcessPool(TACOTRON2_MODEL_NAME, num_workers=num_workers,
+                                 threads_per_worker=args.threads) as pool:
+            # One sentence per worker first, so model loading isn't measured
+            pool.synthesize(SENTENCES[:1] * num_workers)
+            _, stats = measure(pool.synthesize, texts)
+        
+        throughput = args.sentences / stats["wall_s"]
+        if baseline is None:
+            baseline = (num_workers, throughput)
+        speedup = throughput / baseline[1]
+        print_result(f"{num_workers} x {args.threads} threads", stats)
+        print(f"{'':<24} {throughput:8.2f} sentences/s   speedup {speedup:5.2f}x   "
+              f"efficiency {speedup / (num_workers / baseline[0]):5.1%}")
+
+if __name__ == "__main__":
+    main()
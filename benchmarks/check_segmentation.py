@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+"""
+Check the silence-based splitting and the merging of segmented transcripts.
+
+Builds synthetic transcripts and tone-burst audio and checks that
+merge_segments offsets utterance and word times and keeps them in order,
+that reconcile_speakers maps labels consistently when segments have
+different speaker counts, and that speech_regions, plan_chunks and
+split_points find the pauses without exceeding max_chunk_seconds. Exits with
+status 1 if a check fails.
+
+Usage:
+    python benchmarks/check_segmentation.py
+"""
+import argparse
+import sys
+from typing import List, Tuple
+import numpy as np
+import _common  # noqa: F401 (makes the application modules importable)
+from modules.audio_analysis import plan_chunks, speech_regions, split_points
+from modules.segmented_transcriber import merge_segments, reconcile_speakers
+from modules.transcriber import Utterance
+
+SAMPLE_RATE = 8000
+
+def make_utterance(speaker: str, start: int, end: int, text: str = "hallo welt") -> Utterance:
+    """Utterance with one word per half of its time span."""
+    middle = (start + end) // 2
+    words = [
+        {"text": word, "start": word_start, "end": word_end, "confidence": 0.9, "speaker": speaker}
+        for word, (word_start, word_end) in zip(text.split(), [(start, middle), (middle, end)])
+    ]
+    return Utterance(speaker=speaker, text=text, start=start, end=end, confidence=0.9, words=words)
+
+def make_bursts(bursts: List[Tuple[float, float]], duration: float, seed: int = 0) -> np.ndarray:
+    """int16 audio with a 220 Hz tone in each (start, end) span in seconds and faint noise elsewhere."""
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(0, 30, int(duration * SAMPLE_RATE))
+    t = np.arange(len(samples)) / SAMPLE_RATE
+    for start, end in bursts:
+        span = slice(int(start * SAMPLE_RATE), int(end * SAMPLE_RATE))
+        samples[span] += 8000 * np.sin(2 * np.pi * 220 * t[span])
+    return samples.astype(np.int16)
+
+def check_offsets() -> List[str]:
+    """Segment offsets are added to utterance and word times."""
+    segment_utterances = [
+        [make_utterance("A", 0, 1000), make_utterance("B", 1500, 2500)],
+        [make_utterance("A", 200, 900)],
+    ]
+    merged = merge_segments(segment_utterances, [(0.0, 3.0), (3.0, 6.0)])
+    failures = []
+    last = merged[-1]
+    if (last.start, last.end) != (3200, 3900):
+        failures.append(f"second segment utterance at {last.start}-{last.end} ms, expected 3200-3900")
+    if [(word["start"], word["end"]) for word in last.words] != [(3200, 3550), (3550, 3900)]:
+        failures.append(f"word times {[(word['start'], word['end']) for word in last.words]} not offset")
+    if segment_utterances[1][0].words[0]["start"] != 200:
+        failures.append("the input words were modified")
+    return failures
+
+def check_order() -> List[str]:
+    """Merged utterances are ordered by start time across segment boundaries."""
+    # Utterances are out of order within a segment and the segments overlap slightly
+    segment_utterances = [
+        [make_utterance("A", 4000, 4900), make_utterance("A", 0, 1000), make_utterance("B", 1200, 3000)],
+        [make_utterance("B", 0, 800), make_utterance("A", 900, 2000)],
+    ]
+    merged = merge_segments(segment_utterances, [(0.0, 4.95), (4.5, 8.0)])
+    starts = [utterance.start for utterance in merged]
+    failures = []
+    if starts != sorted(starts):
+        failures.append(f"start times {starts} are not in order")
+    if len(merged) != 5:
+        failures.append(f"{len(merged)} utterances after merging, expected 5")
+    return failures
+
+def check_speaker_mapping() -> List[str]:
+    """Labels follow speaking time across segments with two, three and one speakers."""
+    segment_utterances = [
+        # A talks most, then B
+        [make_utterance("A", 0, 5000), make_utterance("B", 5000, 7000)],
+        # Labelled in order of appearance: the main speaker is B here, and C is new
+        [make_utterance("A", 0, 1000), make_utterance("B", 1000, 8000), make_utterance("C", 8000, 8500)],
+        # A single speaker
+        [make_utterance("A", 0, 3000)],
+    ]
+    mappings = reconcile_speakers(segment_utterances)
+    expected = [{"A": "A", "B": "B"}, {"B": "A", "A": "B", "C": "C"}, {"A": "A"}]
+    failures = []
+    if mappings != expected:
+        failures.append(f"mappings {mappings}, expected {expected}")
+    for mapping in mappings:
+        if len(set(mapping.values())) != len(mapping):
+            failures.append(f"two speakers of a segment share a label in {mapping}")
+    
+    merged = merge_segments(segment_utterances, [(0.0, 10.0), (10.0, 20.0), (20.0, 30.0)])
+    for utterance in merged:
+        if any(word["speaker"] != utterance.speaker for word in utterance.words):
+            failures.append(f"word speakers differ from the utterance speaker {utterance.speaker}")
+            break
+    return failures
+
+def check_regions() -> List[str]:
+    """Speech regions cover the bursts, pauses split them and short pauses don't."""
+    bursts = [(1.0, 3.0), (3.1, 4.0), (6.0, 8.0)]
+    samples = make_bursts(bursts, 10.0)
+    regions = [(start / SAMPLE_RATE, end / SAMPLE_RATE) for start, end in speech_regions(samples, SAMPLE_RATE)]
+    failures = []
+    # The 0.1 s pause is shorter than min_silence_ms, so the first two bursts form one region
+    if len(regions) != 2:
+        return [f"{len(regions)} regions {regions}, expected 2"]
+    for (start, end), (burst_start, burst_end) in zip(regions, [(1.0, 4.0), (6.0, 8.0)]):
+        if not (start <= burst_start and end >= burst_end - 0.03 and end - start <= burst_end - burst_start + 0.4):
+            failures.append(f"region {start:.2f}-{end:.2f}s doesn't match the burst {burst_start}-{burst_end}s")
+    if speech_regions(np.zeros(SAMPLE_RATE // 100, dtype=np.int16), SAMPLE_RATE) != []:
+        failures.append("regions found in audio shorter than a frame")
+    return failures
+
+def check_chunk_bounds() -> List[str]:
+    """Chunks never exceed max_chunk_seconds, are ordered and cover every region."""
+    rng = np.random.default_rng(1)
+    failures = []
+    for max_chunk_seconds in (1.0, 2.5, 7.0):
+        max_length = int(max_chunk_seconds * SAMPLE_RATE)
+        # Regions from a few frames up to several times the limit, separated by pauses
+        regions, position = [], 0
+        for _ in range(200):
+            position += int(rng.integers(1, 3 * SAMPLE_RATE))
+            length = int(rng.integers(1, 4 * max_length))
+            regions.append((position, position + length))
+            position += length
+        chunks = plan_chunks(regions, SAMPLE_RATE, max_chunk_seconds)
+        longest = max(end - start for start, end in chunks)
+        if longest > max_length:
+            failures.append(f"{max_chunk_seconds}s limit: a chunk is {longest / SAMPLE_RATE:.3f}s long")
+        if any(start >= end for start, end in chunks) or \
+                any(chunks[i][1] > chunks[i + 1][0] for i in range(len(chunks) - 1)):
+            failures.append(f"{max_chunk_seconds}s limit: chunks are empty, overlap or are out of order")
+        for start, end in regions:
+            covered = sum(max(0, min(end, chunk_end) - max(start, chunk_start)) for chunk_start, chunk_end in chunks)
+            if covered != end - start:
+                failures.append(f"{max_chunk_seconds}s limit: region {start}-{end} is not fully covered")
+                break
+    return failures
+
+def check_split_points() -> List[str]:
+    """Cuts are increasing, land in the pauses and stay within search_seconds of the even split."""
+    # Speech with a 1 s pause near every 10 s mark
+    bursts = [(start + 0.5, start + 9.3) for start in range(0, 60, 10)]
+    samples = make_bursts(bursts, 60.0)
+    points = split_points(samples, SAMPLE_RATE, 6, search_seconds=3.0)
+    failures = []
+    if len(points) != 5 or points != sorted(set(points)):
+        return [f"cuts {points} are not 5 increasing sample indices"]
+    for k, point in enumerate(points, start=1):
+        seconds = point / SAMPLE_RATE
+        if not any(end <= seconds <= next_start for (_, end), (next_start, _) in zip(bursts, bursts[1:])):
+            failures.append(f"cut {k} at {seconds:.2f}s is not in a pause")
+        if abs(seconds - 10 * k) > 3.0 + 0.03:
+            failures.append(f"cut {k} at {seconds:.2f}s is more than search_seconds from {10 * k}s")
+    if split_points(samples, SAMPLE_RATE, 1) != []:
+        failures.append("cuts returned for a single segment")
+    return failures
+
+CHECKS = [check_offsets, check_order, check_speaker_mapping, check_regions, check_chunk_bounds, check_split_points]
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+    
+    failed = False
+    for check in CHECKS:
+        failures = check()
+        print(f"{'FAIL' if failures else 'ok  '} {check.__name__}: {check.__doc__}")
+        for failure in failures:
+            print(f"       {failure}")
+        failed = failed or bool(failures)
+    
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
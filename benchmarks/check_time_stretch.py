@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+"""
+Check the WSOLA time-stretcher.
+
+Stretches synthetic tones and checks that the pitch is kept, that the output
+has exactly round(input_length / tempo) samples, and that feeding the input
+block by block (and through time_stretch_wav) gives the same samples as
+stretching the whole array at once, with the shape of the input. Exits with
+status 1 if a check fails.
+
+Usage:
+    python benchmarks/check_time_stretch.py
+"""
+import argparse
+import sys
+import tempfile
+import wave
+from pathlib import Path
+from typing import List
+import numpy as np
+import _common  # noqa: F401 (makes the application modules importable)
+from modules.time_stretch import TimeStretcher, stretch_array, time_stretch_wav
+
+SAMPLE_RATE = 16000
+TEMPOS = [0.5, 0.8, 1.0, 1.25, 1.6, 2.0]
+
+def make_tone(frequency: float, duration: float, channels: int = 1) -> np.ndarray:
+    """Sine tone with a little noise, shape (n,) for one channel, else (n, channels)."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    tone = 0.5 * np.sin(2 * np.pi * frequency * t) + rng.normal(0, 0.01, len(t))
+    if channels == 1:
+        return tone.astype(np.float32)
+    scales = [0.5 + 0.5 * channel / channels for channel in range(channels)]
+    return np.stack([tone * scale for scale in scales], axis=1).astype(np.float32)
+
+def dominant_frequency(samples: np.ndarray) -> float:
+    """Frequency of the strongest spectral peak of the middle of the signal, interpolated between bins."""
+    middle = samples[len(samples) // 4:3 * len(samples) // 4]
+    spectrum = np.abs(np.fft.rfft(middle * np.hanning(len(middle))))
+    peak = int(np.argmax(spectrum[1:-1])) + 1
+    # Parabolic interpolation on the log magnitudes around the peak
+    left, center, right = np.log(spectrum[peak - 1:peak + 2] + 1e-12)
+    shift = 0.5 * (left - right) / (left - 2 * center + right)
+    return (peak + shift) * SAMPLE_RATE / len(middle)
+
+def check_pitch() -> List[str]:
+    """The dominant frequency of a tone stays within 1% at every tempo."""
+    failures = []
+    for frequency in (150.0, 440.0, 1000.0):
+        samples = make_tone(frequency, 3.0)
+        for tempo in TEMPOS:
+            measured = dominant_frequency(stretch_array(samples, SAMPLE_RATE, tempo))
+            if abs(measured / frequency - 1) > 0.01:
+                failures.append(f"{frequency:.0f} Hz at tempo {tempo}: {measured:.1f} Hz")
+    return failures
+
+def check_length() -> List[str]:
+    """The output has exactly round(input_length / tempo) samples, also for very short inputs."""
+    failures = []
+    for channels in (1, 2):
+        for length in (0, 1, 100, 641, 16000, 47999):
+            samples = make_tone(440.0, length / SAMPLE_RATE, channels)
+            for tempo in TEMPOS + [1.37, 0.73]:
+                output = stretch_array(samples, SAMPLE_RATE, tempo)
+                expected = int(round(length / tempo))
+                if len(output) != expected or output.shape[1:] != samples.shape[1:]:
+                    failures.append(f"{channels} channel(s), {length} samples at tempo {tempo}: "
+                                    f"shape {output.shape}, expected ({expected}, ...)")
+    return failures
+
+def check_blocks() -> List[str]:
+    """Stretching block by block gives the same samples as stretching the whole array."""
+    rng = np.random.default_rng(2)
+    failures = []
+    for channels in (1, 2):
+        samples = make_tone(220.0, 2.0, channels)
+        for tempo in TEMPOS:
+            whole = stretch_array(samples, SAMPLE_RATE, tempo)
+            stretcher = TimeStretcher(tempo, SAMPLE_RATE, channels)
+            parts, position = [], 0
+            while position < len(samples):
+                size = int(rng.integers(1, 5000))
+                parts.append(stretcher.process(samples[position:position + size]))
+                position += size
+            parts.append(stretcher.flush())
+            if any(part.ndim != samples.ndim for part in parts):
+                failures.append(f"{channels} channel(s), tempo {tempo}: output blocks don't keep the input's shape")
+                continue
+            blockwise = np.concatenate(parts)
+            if blockwise.shape != whole.shape or not np.array_equal(blockwise, whole):
+                failures.append(f"{channels} channel(s), tempo {tempo}: block-wise output differs")
+    return failures
+
+def check_wav() -> List[str]:
+    """time_stretch_wav matches stretch_array on the same 16-bit samples."""
+    failures = []
+    samples = np.round(make_tone(330.0, 2.0, 2) * 32767).astype(np.int16)
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = str(Path(directory) / "input.wav")
+        output_path = str(Path(directory) / "output.wav")
+        with wave.open(input_path, 'wb') as writer:
+            writer.setnchannels(2)
+            writer.setsampwidth(2)
+            writer.setframerate(SAMPLE_RATE)
+            writer.writeframes(samples.tobytes())
+        for tempo in (0.8, 1.6):
+            time_stretch_wav(input_path, output_path, tempo, block_frames=3001)
+            with wave.open(output_path, 'rb') as reader:
+                written = np.frombuffer(reader.readframes(reader.getnframes()), dtype='<i2').reshape(-1, 2)
+            expected = stretch_array(samples.astype(np.float32) / 32768.0, SAMPLE_RATE, tempo)
+            if len(written) != len(expected):
+                failures.append(f"tempo {tempo}: {len(written)} frames written, expected {len(expected)}")
+            elif np.max(np.abs(written / 32768.0 - expected)) > 1.5 / 32768:
+                failures.append(f"tempo {tempo}: written samples differ from stretch_array by more than rounding")
+    return failures
+
+CHECKS = [check_pitch, check_length, check_blocks, check_wav]
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+    
+    failed = False
+    for check in CHECKS:
+        failures = check()
+        print(f"{'FAIL' if failures else 'ok  '} {check.__name__}: {check.__doc__}")
+        for failure in failures:
+            print(f"       {failure}")
+        failed = failed or bool(failures)
+    
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+"""
+Check the concurrent translation executor against the local fake endpoint.
+
+Runs HTTPTranslationBackend through ConcurrentTranslator against
+fake_translate.py and checks output order, retries with backoff on 429 and 5xx,
+giving up after max_retries, the token bucket rate limit, the concurrency limit
+and latency_stats. Exits with status 1 if a check fails.
+
+Usage:
+    python benchmarks/check_translation_executor.py
+"""
+import argparse
+import sys
+from typing import List
+from _common import LOREM_WORDS
+from fake_translate import FakeTranslateServer
+from modules.translation_executor import (
+    ConcurrentTranslator, HTTPTranslationBackend, TransientTranslationError, backoff_delay
+)
+
+def make_chunks(count: int) -> List[str]:
+    """Distinct chunk texts."""
+    return [f"{i} {' '.join(LOREM_WORDS[i % len(LOREM_WORDS):][:5])}" for i in range(count)]
+
+def check_order() -> List[str]:
+    """Results come back in input order although responses arrive out of order."""
+    server = FakeTranslateServer(latency=0.05).start_background()
+    try:
+        chunks = make_chunks(24)
+        translator = ConcurrentTranslator(HTTPTranslationBackend(server.url), max_workers=6,
+                                          requests_per_second=1000.0, burst=100)
+        result = translator.translate_chunks(chunks)
+    finally:
+        server.shutdown()
+        server.server_close()
+    failures = []
+    if result != [f"[de] {chunk}" for chunk in chunks]:
+        failures.append("translations are not in input order")
+    if not 2 <= server.max_concurrent <= 6:
+        failures.append(f"{server.max_concurrent} concurrent requests with max_workers=6")
+    return failures
+
+def check_retries() -> List[str]:
+    """Transient failures (429, 503) are retried, and every chunk is still translated."""
+    failures = []
+    for status in (429, 503):
+        server = FakeTranslateServer(latency=0.0, fail_first=5, fail_status=status).start_background()
+        try:
+            chunks = make_chunks(4)
+            translator = ConcurrentTranslator(HTTPTranslationBackend(server.url), max_workers=2,
+                                              requests_per_second=1000.0, burst=100,
+                                              max_retries=5, base_delay=0.01, max_delay=0.05)
+            result = translator.translate_chunks(chunks)
+        finally:
+            server.shutdown()
+            server.server_close()
+        if result != [f"[de] {chunk}" for chunk in chunks]:
+            failures.append(f"HTTP {status}: wrong translations after retries")
+        if translator.retries != 5 or len(server.requests) != 9:
+            failures.append(f"HTTP {status}: {translator.retries} retries and {len(server.requests)} "
+                            f"requests, expected 5 and 9")
+    return failures
+
+def check_give_up() -> List[str]:
+    """A chunk that keeps failing raises after max_retries retries."""
+    server = FakeTranslateServer(latency=0.0, fail_first=100, fail_status=502).start_background()
+    try:
+        translator = ConcurrentTranslator(HTTPTranslationBackend(server.url), max_workers=1,
+                                          requests_per_second=1000.0, burst=100,
+                                          max_retries=3, base_delay=0.01, max_delay=0.02)
+        translator.translate_chunks(make_chunks(1))
+        failures = ["no error after the retries were used up"]
+    except TransientTranslationError:
+        failures = []
+    finally:
+        server.shutdown()
+        server.server_close()
+    if len(server.requests) != 4:
+        failures.append(f"{len(server.requests)} requests with max_retries=3, expected 4")
+    return failures
+
+def check_backoff() -> List[str]:
+    """Backoff delays grow exponentially up to the cap, with full jitter."""
+    failures = []
+    for attempt in range(8):
+        bound = min(1.0, 0.1 * 2 ** attempt)
+        delays = [backoff_delay(attempt, 0.1, 1.0) for _ in range(200)]
+        if min(delays) < 0 or max(delays) > bound:
+            failures.append(f"attempt {attempt}: delays outside [0, {bound}]")
+        if max(delays) < bound / 2:
+            failures.append(f"attempt {attempt}: no jitter across the range")
+    return failures
+
+def check_rate_limit() -> List[str]:
+    """Requests beyond the burst are spaced by the configured rate."""
+    rate, burst = 20.0, 3
+    server = FakeTranslateServer(latency=0.0).start_background()
+    try:
+        translator = ConcurrentTranslator(HTTPTranslationBackend(server.url), max_workers=4,
+                                          requests_per_second=rate, burst=burst)
+        translator.translate_chunks(make_chunks(15))
+    finally:
+        server.shutdown()
+        server.server_close()
+    times = sorted(request["time"] for request in server.requests)
+    failures = []
+    for k, arrival in enumerate(times):
+        # The bucket starts full, so request k has to wait for k + 1 - burst tokens
+        earliest = (k + 1 - burst) / rate
+        if arrival - times[0] < earliest - 0.01:
+            failures.append(f"request {k} after {arrival - times[0]:.3f}s, expected at least {earliest:.3f}s")
+            break
+    return failures
+
+def check_latency_stats() -> List[str]:
+    """latency_stats counts the chunks and retries of a run and starts over after reset_stats."""
+    server = FakeTranslateServer(latency=0.02, fail_first=2).start_background()
+    try:
+        translator = ConcurrentTranslator(HTTPTranslationBackend(server.url), max_workers=3,
+                                          requests_per_second=1000.0, burst=100, base_delay=0.01)
+        translator.translate_chunks(make_chunks(10))
+        first = translator.latency_stats()
+        translator.reset_stats()
+        translator.translate_chunks(make_chunks(4))
+        second = translator.latency_stats()
+    finally:
+        server.shutdown()
+        server.server_close()
+    failures = []
+    if first["chunks"] != 10 or first["retries"] != 2:
+        failures.append(f"first run: {first['chunks']} chunks and {first['retries']} retries, expected 10 and 2")
+    if not 0 < first["p50_s"] <= first["p95_s"] <= first["max_s"] or first["mean_s"] > first["max_s"]:
+        failures.append(f"inconsistent latencies {first}")
+    if second["chunks"] != 4 or second["retries"] != 0:
+        failures.append(f"after reset: {second['chunks']} chunks and {second['retries']} retries, expected 4 and 0")
+    return failures
+
+CHECKS = [check_order, check_retries, check_give_up, check_backoff, check_rate_limit, check_latency_stats]
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+    
+    failed = False
+    for check in CHECKS:
+        failures = check()
+        print(f"{'FAIL' if failures else 'ok  '} {check.__name__}: {check.__doc__}")
+        for failure in failures:
+            print(f"       {failure}")
+        failed = failed or bool(failures)
+    
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
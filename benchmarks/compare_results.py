@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+"""
+Compare two benchmark suite results and flag regressions.
+
+Cases are matched by stage and size. A case regresses when its median wall time
+or its peak RSS growth is worse than the baseline by more than the threshold;
+differences below the noise floors are ignored. Exits with status 1 if any case
+regressed.
+
+Usage:
+    python benchmarks/compare_results.py before.json after.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+def load_results(path: str) -> Tuple[Dict[str, Any], Dict[Tuple[str, str], Dict[str, Any]]]:
+    """Load a results file as its environment and the results keyed by (stage, size)."""
+    report = json.loads(Path(path).read_text(encoding="utf-8"))
+    return report["environment"], {(result["stage"], result["size"]): result for result in report["results"]}
+
+def relative_change(baseline: float, current: float, floor: float) -> float:
+    """Relative change from baseline to current, 0 when both are below the noise floor."""
+    if max(baseline, current) < floor:
+        return 0.0
+    return (current - baseline) / max(baseline, floor)
+
+def compare(baseline: Dict[Tuple[str, str], Dict[str, Any]],
+            current: Dict[Tuple[str, str], Dict[str, Any]],
+            threshold: float,
+            memory_threshold: float,
+            min_wall: float,
+            min_memory: float) -> List[Dict[str, Any]]:
+    """
+    Compares the cases measured in both runs.
+    
+    Args:
+        baseline (Dict): Baseline results keyed by (stage, size)
+        current (Dict): Current results keyed by (stage, size)
+        threshold (float): Relative wall time increase counted as a regression
+        memory_threshold (float): Relative RSS growth increase counted as a regression
+        min_wall (float): Wall times below this many seconds are noise
+        min_memory (float): RSS growth below this many MB is noise
+    
+    Returns:
+        List[Dict[str, Any]]: Per case: stage, size, wall and memory changes and the verdict
+    """
+    rows = []
+    for key in [key for key in baseline if key in current]:
+        before, after = baseline[key], current[key]
+        wall_change = relative_change(before["wall_s"], after["wall_s"], min_wall)
+        memory_change = relative_change(before["rss_growth_mb"], after["rss_growth_mb"], min_memory)
+        if wall_change > threshold or memory_change > memory_threshold:
+            verdict = "REGRESSION"
+        elif wall_change < -threshold or memory_change < -memory_threshold:
+            verdict = "improved"
+        else:
+            verdict = ""
+        rows.append({
+            "stage": key[0],
+            "size": key[1],
+            "wall_before": before["wall_s"],
+            "wall_after": after["wall_s"],
+            "wall_change": wall_change,
+            "memory_before": before["rss_growth_mb"],
+            "memory_after": after["rss_growth_mb"],
+            "memory_change": memory_change,
+            "verdict": verdict,
+        })
+    return rows
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline", help="Results of the reference run")
+    parser.add_argument("current", help="Results of the run to check")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Tolerated relative wall time increase")
+    parser.add_argument("--memory-threshold", type=float, default=0.20,
+                        help="Tolerated relative peak RSS growth increase")
+    parser.add_argument("--min-wall", type=float, default=0.05, help="Noise floor of wall times in seconds")
+    parser.add_argument("--min-memory", type=float, default=5.0, help="Noise floor of RSS growth in MB")
+    args = parser.parse_args()
+    
+    baseline_env, baseline = load_results(args.baseline)
+    current_env, current = load_results(args.current)
+    print(f"Baseline: {baseline_env.get('commit', '')[:12]} {baseline_env.get('timestamp', '')}")
+    print(f"Current:  {current_env.get('commit', '')[:12]} {current_env.get('timestamp', '')}")
+    for field in ("platform", "cpu_count", "ffmpeg"):
+        if baseline_env.get(field) != current_env.get(field):
+            print(f"Warning: {field} differs ({baseline_env.get(field)} vs {current_env.get(field)})")
+    print()
+    
+    rows = compare(baseline, current, args.threshold, args.memory_threshold, args.min_wall, args.min_memory)
+    print(f"{'stage':<24} {'size':<7} {'wall before':>11} {'after':>9} {'change':>8}   "
+          f"{'RSS+ before':>11} {'after':>9} {'change':>8}")
+    for row in rows:
+        print(f"{row['stage']:<24} {row['size']:<7} {row['wall_before']:10.2f}s {row['wall_after']:8.2f}s "
+              f"{row['wall_change']:+8.1%}   {row['memory_before']:8.0f} MB {row['memory_after']:6.0f} MB "
+              f"{row['memory_change']:+8.1%}   {row['verdict']}")
+    
+    only_baseline = sorted(set(baseline) - set(current))
+    only_current = sorted(set(current) - set(baseline))
+    if only_baseline:
+        print(f"\nOnly in the baseline: {', '.join(f'{stage} ({size})' for stage, size in only_baseline)}")
+    if only_current:
+        print(f"\nOnly in the current run: {', '.join(f'{stage} ({size})' for stage, size in only_current)}")
+    
+    regressions = [row for row in rows if row["verdict"] == "REGRESSION"]
+    print(f"\n{len(regressions)} of {len(rows)} cases regressed")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
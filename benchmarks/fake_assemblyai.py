@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+"""
+Local stand-in for the AssemblyAI upload and transcript endpoints.
+
+Accepts uploads (chunked or with Content-Length), creates transcripts that
+complete after a fixed processing time and returns a canned utterance. When a
+transcript is created with a webhook_url, the callback is posted on completion.
+Point the transcriber at it with ASSEMBLYAI_BASE_URL.
+
+Usage:
+    python benchmarks/fake_assemblyai.py --port 8765
+    ASSEMBLYAI_BASE_URL=http://127.0.0.1:8765 python src/main.py ...
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+class FakeAssemblyAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        """Silence the per-request log."""
+        pass
+    
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        """Send a JSON response."""
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _read_body(self) -> bytes:
+        """Read the request body, decoding chunked transfer encoding."""
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            parts = []
+            while True:
+                size_line = self.rfile.readline().strip()
+                size = int(size_line.split(b";")[0], 16)
+                if size == 0:
+                    # Skip trailers up to the terminating blank line
+                    while self.rfile.readline().strip():
+                        pass
+                    break
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(parts)
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+    
+    def do_POST(self):
+        """Handle uploads and transcript creation."""
+        server: FakeAssemblyAIServer = self.server
+        body = self._read_body()
+        
+        if self.path == "/v2/upload":
+            upload_id = uuid.uuid4().hex
+            server.record_upload(upload_id, body, chunked="chunked" in self.headers.get("Transfer-Encoding", ""))
+            self._send_json(200, {"upload_url": f"http://{self.headers.get('Host')}/uploads/{upload_id}"})
+        elif self.path == "/v2/transcript":
+            request = json.loads(body or b"{}")
+            if "audio_url" not in request:
+                self._send_json(400, {"error": "audio_url is required"})
+                return
+            transcript = server.create_transcript(request)
+            self._send_json(200, {"id": transcript["id"], "status": "queued"})
+        else:
+            self._send_json(404, {"error": "not found"})
+    
+    def do_GET(self):
+        """Handle transcript polling."""
+        server: FakeAssemblyAIServer = self.server
+        with server._lock:
+            server.poll_count += 1
+        match = re.fullmatch(r"/v2/transcript/([0-9a-f]+)", self.path)
+        status = server.transcript_status(match.group(1)) if match else None
+        if status is None:
+            self._send_json(404, {"error": "transcript not found"})
+            return
+        self._send_json(200, status)
+
+class FakeAssemblyAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 processing_seconds: float = 1.0,
+                 fail_first: int = 0):
+        """
+        Initialize the server.
+        
+        Args:
+            host (str): Address to listen on
+            port (int): Port to listen on (0 for a free port)
+            processing_seconds (float): Time until a created transcript is completed
+            fail_first (int): Number of transcripts that end with status "error" (to exercise retries)
+        """
+        super().__init__((host, port), FakeAssemblyAIHandler)
+        self.processing_seconds = processing_seconds
+        self.fail_first = fail_first
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        self.transcripts: Dict[str, Dict[str, Any]] = {}
+        self.poll_count = 0
+        self.webhook_count = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def base_url(self) -> str:
+        """Base URL to use as ASSEMBLYAI_BASE_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def record_upload(self, upload_id: str, body: bytes, chunked: bool):
+        """Store the size and transfer mode of an upload."""
+        with self._lock:
+            self.uploads[upload_id] = {"bytes": len(body), "chunked": chunked, "header": body[:4]}
+    
+    def create_transcript(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a transcript that completes after the processing time."""
+        transcript = {
+            "id": uuid.uuid4().hex,
+            "request": request,
+            "created": time.monotonic(),
+        }
+        with self._lock:
+            transcript["fail"] = len(self.transcripts) < self.fail_first
+            self.transcripts[transcript["id"]] = transcript
+        if request.get("webhook_url"):
+            timer = threading.Timer(self.processing_seconds, self._send_webhook, args=(transcript,))
+            timer.name = "fake-webhook"
+            timer.daemon = True
+            timer.start()
+        return transcript
+    
+    def _send_webhook(self, transcript: Dict[str, Any]):
+        """Post the completion callback of a transcript."""
+        request = transcript["request"]
+        headers = {"Content-Type": "application/json"}
+        if request.get("webhook_auth_header_name"):
+            headers[request["webhook_auth_header_name"]] = request.get("webhook_auth_header_value", "")
+        body = json.dumps({"transcript_id": transcript["id"], "status": "completed"}).encode("utf-8")
+        try:
+            urllib.request.urlopen(urllib.request.Request(request["webhook_url"], data=body, headers=headers),
+                                   timeout=10)
+            with self._lock:
+                self.webhook_count += 1
+        except OSError:
+            pass
+    
+    def transcript_status(self, transcript_id: str) -> Optional[Dict[str, Any]]:
+        """Get the API response for a transcript, None if it does not exist."""
+        with self._lock:
+            transcript = self.transcripts.get(transcript_id)
+        if transcript is None:
+            return None
+        
+        if time.monotonic() - transcript["created"] < self.processing_seconds:
+            return {"id": transcript_id, "status": "processing"}
+        if transcript["fail"]:
+            return {"id": transcript_id, "status": "error", "error": "Simulated failure"}
+        return {
+            "id": transcript_id,
+            "status": "completed",
+            "text": "Hello world.",
+            "utterances": [{
+                "speaker": "A",
+                "text": "Hello world.",
+                "start": 0,
+                "end": 1000,
+                "confidence": 0.99,
+                "words": [
+                    {"text": "Hello", "start": 0, "end": 400, "confidence": 0.99, "speaker": "A"},
+                    {"text": "world.", "start": 500, "end": 1000, "confidence": 0.99, "speaker": "A"},
+                ],
+            }],
+        }
+    
+    def start_background(self) -> "FakeAssemblyAIServer":
+        """Serve in a daemon thread and return the server."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--processing-seconds", type=float, default=1.0,
+                        help="Time until a created transcript is completed")
+    parser.add_argument("--fail-first", type=int, default=0,
+                        help="Number of transcripts that end with an error")
+    args = parser.parse_args()
+    
+    server = FakeAssemblyAIServer(args.host, args.port, args.processing_seconds, args.fail_first)
+    print(f"Fake AssemblyAI listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+"""
+Local stand-in for a LibreTranslate-compatible translation endpoint.
+
+Answers POST /translate with the text prefixed by "[<target>] " after a random
+latency. The first requests can be failed with a configurable status (429 or
+5xx) to exercise retries. Every request is logged with its arrival time, so the
+request rate and concurrency a client produced can be checked afterwards. Point
+HTTPTranslationBackend at it.
+
+Usage:
+    python benchmarks/fake_translate.py --port 8766 --fail-first 3 --fail-status 429
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+class FakeTranslateHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        """Silence the per-request log."""
+        pass
+    
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        """Send a JSON response."""
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def do_POST(self):
+        """Handle translation requests."""
+        server: FakeTranslateServer = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path != "/translate":
+            self._send_json(404, {"error": "not found"})
+            return
+        if "q" not in request or "target" not in request:
+            self._send_json(400, {"error": "q and target are required"})
+            return
+        
+        status, latency = server.begin_request(request["q"])
+        try:
+            time.sleep(latency)
+        finally:
+            server.end_request()
+        if status != 200:
+            self._send_json(status, {"error": f"Simulated HTTP {status}"})
+            return
+        self._send_json(200, {"translatedText": f"[{request['target']}] {request['q']}"})
+
+class FakeTranslateServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 latency: float = 0.02,
+                 fail_first: int = 0,
+                 fail_status: int = 429,
+                 seed: Optional[int] = 0):
+        """
+        Initialize the server.
+        
+        Args:
+            host (str): Address to listen on
+            port (int): Port to listen on (0 for a free port)
+            latency (float): Maximum response latency in seconds, each request takes a random share
+            fail_first (int): Number of requests answered with fail_status (to exercise retries)
+            fail_status (int): HTTP status of the failed requests, e.g. 429 or 503
+            seed (Optional[int]): Seed of the latencies, None for a random one
+        """
+        super().__init__((host, port), FakeTranslateHandler)
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests: List[Dict[str, Any]] = []
+        self.max_concurrent = 0
+        self._active = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    @property
+    def url(self) -> str:
+        """Translation endpoint to pass to HTTPTranslationBackend."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/translate"
+    
+    def begin_request(self, text: str) -> Tuple[int, float]:
+        """Log a request and decide its status and latency."""
+        with self._lock:
+            status = self.fail_status if len(self.requests) < self.fail_first else 200
+            self.requests.append({"text": text, "time": time.monotonic(), "status": status})
+            self._active += 1
+            self.max_concurrent = max(self.max_concurrent, self._active)
+            return status, self._random.uniform(0, self.latency)
+    
+    def end_request(self):
+        """Mark a request as answered."""
+        with self._lock:
+            self._active -= 1
+    
+    def start_background(self) -> "FakeTranslateServer":
+        """Serve in a daemon thread and return the server."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8766, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.02, help="Maximum response latency in seconds")
+    parser.add_argument("--fail-first", type=int, default=0, help="Number of requests that fail")
+    parser.add_argument("--fail-status", type=int, default=429, help="HTTP status of the failed requests")
+    args = parser.parse_args()
+    
+    server = FakeTranslateServer(args.host, args.port, args.latency, args.fail_first, args.fail_status)
+    print(f"Fake translation endpoint listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
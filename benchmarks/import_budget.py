@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""
+Check the cold-start import cost of the CLI against a time budget.
+
+Imports the entry module in fresh interpreters with `python -X importtime`,
+reports the slowest imports and exits with status 1 if the import time is over
+budget or a heavy backend (torch, TTS, bark, moviepy, ...) is imported at startup.
+
+Usage:
+    python benchmarks/import_budget.py --budget-ms 500
+"""
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional, Set, Tuple
+from _common import SRC_DIR
+
+# Backends that must only be imported by the stage that uses them
+HEAVY_MODULES = [
+    "torch", "TTS", "bark", "transformers", "encodec", "moviepy", "cv2",
+    "pydub", "scipy", "yt_dlp", "deep_translator", "ffmpeg"
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure_imports(module: Optional[str], exclude: Optional[Set[str]] = None) -> Tuple[float, Dict[str, float]]:
+    """
+    Imports a module in a fresh interpreter and parses the -X importtime report.
+    
+    Args:
+        module (Optional[str]): Module to import, relative to the src directory. If None,
+            only the interpreter startup imports are measured
+        exclude (Optional[Set[str]]): Modules left out of the report (e.g. interpreter startup imports)
+    
+    Returns:
+        Tuple[float, Dict[str, float]]: Total import time in ms and cumulative ms per imported module
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}" if module else "pass"],
+        cwd=str(SRC_DIR),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    if process.returncode != 0:
+        error = process.stderr.strip().splitlines()[-1]
+        raise RuntimeError(f"Importing {module} failed: {error}")
+    
+    total_ms = 0.0
+    cumulative: Dict[str, float] = {}
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        ms = int(match.group(2)) / 1000.0
+        name = match.group(4)
+        if exclude and name in exclude:
+            continue
+        cumulative[name] = ms
+        # Only top-level entries, nested ones are included in their parent's cumulative time
+        if len(match.group(3)) == 1:
+            total_ms += ms
+    return total_ms, cumulative
+
+def heavy_imports(modules: List[str]) -> List[str]:
+    """Get the imported modules that belong to a heavy backend."""
+    return sorted(name for name in modules if name.split(".")[0] in HEAVY_MODULES)
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="main", help="Entry module to import")
+    parser.add_argument("--budget-ms", type=float, default=500.0, help="Maximum import time in milliseconds")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs, the fastest one counts")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    args = parser.parse_args()
+    
+    # Imports done by interpreter startup (site, .pth hooks) are not the CLI's cost
+    _, startup = measure_imports(None)
+    runs = [measure_imports(args.module, exclude=set(startup)) for _ in range(args.repeat)]
+    total_ms, cumulative = min(runs, key=lambda run: run[0])
+    
+    print(f"Import time of {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.repeat})")
+    print("Slowest imports (cumulative):")
+    for name, ms in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+    
+    failed = False
+    heavy = heavy_imports(list(cumulative))
+    if heavy:
+        print(f"FAIL: heavy backends imported at startup: {', '.join(heavy)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time over budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+    
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
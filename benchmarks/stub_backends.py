@@ -0,0 +1,69 @@
+"""
+Offline stand-ins for the network and model backends, used by the benchmark suite.
+
+They implement the interfaces the stages call (TranslationBackend,
+TTSGenerator.synthesize_segments) with deterministic output and a configurable
+latency, so a benchmark measures the pipeline around the backend rather than the
+backend itself.
+"""
+import time
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+# Speaking rate of the stub voice, about that of German Tacotron2 output
+STUB_CHARS_PER_SECOND = 14.0
+
+class StubTranslationBackend:
+    def __init__(self, latency: float = 0.05, prefix: str = "[de] "):
+        """
+        Initialize a translation backend that marks each line instead of translating it.
+        
+        Args:
+            latency (float): Seconds slept per request, standing in for the network round trip
+            prefix (str): Prefix added to every line of the text
+        """
+        self.latency = latency
+        self.prefix = prefix
+    
+    def translate(self, text: str) -> str:
+        """Translate a single chunk of text, keeping its line structure."""
+        time.sleep(self.latency)
+        return "\n".join(self.prefix + line for line in text.split("\n"))
+
+class StubTTS:
+    def __init__(self, sample_rate: int = 22050, realtime_factor: float = 0.0):
+        """
+        Initialize a speech generator that renders tones of speech-like length.
+        
+        Args:
+            sample_rate (int): Sample rate of the clips in Hz
+            realtime_factor (float): Seconds slept per second of generated audio, standing
+                in for model inference (0 measures the pipeline alone)
+        """
+        self.sample_rate = sample_rate
+        self.realtime_factor = realtime_factor
+    
+    def synthesize_clip(self, text: str, index: int = 0) -> np.ndarray:
+        """Render one clip whose length follows the text length."""
+        num_frames = max(1, int(len(text) / STUB_CHARS_PER_SECOND * self.sample_rate))
+        t = np.arange(num_frames) / self.sample_rate
+        tone = 0.3 * np.sin(2 * np.pi * (120 + 10 * (index % 8)) * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+        if self.realtime_factor:
+            time.sleep(num_frames / self.sample_rate * self.realtime_factor)
+        return (tone * 32767).astype(np.int16)
+    
+    def synthesize_segments(self,
+                            texts: List[str],
+                            speaker: Optional[str] = None) -> Iterator[Tuple[np.ndarray, int]]:
+        """
+        Synthesizes each text on its own, like TTSGenerator.synthesize_segments.
+        
+        Args:
+            texts (List[str]): Texts to synthesize, e.g. one translated utterance each
+            speaker (Optional[str]): Ignored, accepted for interface compatibility
+        
+        Returns:
+            Iterator[Tuple[np.ndarray, int]]: int16 samples and sample rate per text
+        """
+        for index, text in enumerate(texts):
+            yield self.synthesize_clip(text, index), self.sample_rate
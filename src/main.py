@@ -3,15 +3,17 @@
 """
 Main script for video translation and synchronization.
 """
+import argparse
+import concurrent.futures
 import os
+import sys
+from dataclasses import asdict
 from pathlib import Path
-from modules.video_downloader import download_video
-from modules.audio_extractor import extract_audio
-from modules.transcriber import transcribe_audio
-from modules.translator import translate_text
-from modules.tts_generator import TTSGenerator
-from modules.synchronizer import Synchronizer
 from modules.cleanup import TempCleanup
+from modules.artifact_cache import ArtifactCache
+
+# Stage modules (and the ML/media backends they pull in) are imported when
+# their stage runs, so startup and early errors stay fast
 
 def ensure_downloads_dir():
     """Ensure downloads directory exists."""
@@ -69,13 +71,121 @@ def get_language_choice() -> str:
         else:
             print("Invalid choice. Please enter a number between 1 and 4.")
 
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Translate and dub YouTube videos to German.")
+    parser.add_argument("--manifest", help="Run the jobs of a JSONL or YAML manifest without prompts")
+    parser.add_argument("--jobs-dir", help="Directory for job journals and outputs (default: downloads/jobs)")
+    parser.add_argument("--results", help="JSONL file that receives one result per job "
+                                          "(default: results.jsonl in the jobs directory)")
+    parser.add_argument("--fail-fast", action="store_true", help="Stop after the first failed job")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Overlap the stages of several jobs (network, ffmpeg, TTS run concurrently)")
+    parser.add_argument("--limit", action="append", default=[], metavar="CLASS=N",
+                        help="Concurrent stages of a resource class with --parallel "
+                             "(network, ffmpeg, tts, bark, asr), may be repeated")
+    parser.add_argument("--memory-ceiling", metavar="SIZE",
+                        help="Don't start stages that would push memory use past SIZE, e.g. 24G "
+                             "(default: 90%% of RAM)")
+    parser.add_argument("--webhook-port", type=int, metavar="PORT",
+                        help="Listen on PORT for transcript completion webhooks instead of only polling")
+    parser.add_argument("--webhook-url", metavar="URL",
+                        help="Public base URL of the webhook listener, e.g. a tunnel to --webhook-port")
+    parser.add_argument("--transcribe-timeout", type=float, metavar="SECONDS",
+                        help="Fail a job whose transcript takes longer than SECONDS")
+    parser.add_argument("--asr", choices=["assemblyai", "whisper"], default="assemblyai",
+                        help="Speech recognition backend: AssemblyAI or local faster-whisper on the CPU "
+                             "(default for manifest jobs without asr_backend)")
+    parser.add_argument("--whisper-model", default="small",
+                        help="faster-whisper model size for --asr whisper (default: small)")
+    parser.add_argument("--segment-minutes", type=float, metavar="MINUTES",
+                        help="Split long audio at silences into segments of about MINUTES and "
+                             "transcribe them concurrently with AssemblyAI")
+    parser.add_argument("--download-mode", choices=["audio_first", "muxed"], default="audio_first",
+                        help="audio_first fetches the audio stream first and transcribes it while the "
+                             "video stream downloads; muxed downloads one combined file first "
+                             "(default for manifest jobs without download_mode)")
+    parser.add_argument("--max-height", type=int, metavar="LINES",
+                        help="Download at most this video resolution, e.g. 720 "
+                             "(default for manifest jobs without max_height)")
+    parser.add_argument("--dub-mode", choices=["segments", "full"], default="segments",
+                        help="segments translates and synthesizes each utterance and places it at its "
+                             "original time, so the video is stream-copied; full dubs the whole transcript "
+                             "as one track and retimes the video to it "
+                             "(default for manifest jobs without dub_mode)")
+    parser.add_argument("--fragments", type=int, metavar="N",
+                        help="Fragments of segmented streams downloaded at the same time (default: 4)")
+    return parser.parse_args()
+
+def run_batch(args: argparse.Namespace) -> int:
+    """
+    Runs the jobs of a manifest headlessly.
+    
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+    
+    Returns:
+        int: Exit code (0 all jobs succeeded, 1 a job failed, 2 invalid usage)
+    """
+    from modules.job_runner import JobRunner, ManifestError, load_manifest, EXIT_USAGE
+    
+    try:
+        jobs = load_manifest(args.manifest, defaults={
+            "asr_backend": args.asr,
+            "download_mode": args.download_mode,
+            "max_height": args.max_height,
+            "dub_mode": args.dub_mode
+        })
+    except ManifestError as e:
+        print(f"Error: {str(e)}")
+        return EXIT_USAGE
+    
+    # The key is only needed when a job transcribes with AssemblyAI
+    api_key = os.getenv("ASSEMBLYAI_API_KEY")
+    if not api_key and any(job.asr_backend == "assemblyai" for job in jobs):
+        print("Error: AssemblyAI API key not found! Please set the ASSEMBLYAI_API_KEY environment variable.")
+        return EXIT_USAGE
+    
+    runner = JobRunner(
+        api_key,
+        jobs_dir=args.jobs_dir,
+        cache=ArtifactCache(),
+        webhook_port=args.webhook_port,
+        webhook_url=args.webhook_url,
+        transcribe_timeout=args.transcribe_timeout,
+        whisper_model=args.whisper_model,
+        segment_minutes=args.segment_minutes,
+        concurrent_fragments=args.fragments
+    )
+    if not args.parallel:
+        return runner.run_manifest(jobs, results_path=args.results, fail_fast=args.fail_fast)
+    
+    from modules.scheduler import StageScheduler
+    from modules.artifact_cache import parse_size
+    try:
+        limits = {}
+        for limit in args.limit:
+            resource_class, _, value = limit.partition("=")
+            limits[resource_class.strip()] = int(value)
+        memory_ceiling = parse_size(args.memory_ceiling) if args.memory_ceiling else None
+        scheduler = StageScheduler(runner, limits=limits, memory_ceiling=memory_ceiling)
+    except ValueError as e:
+        print(f"Error: Invalid --limit or --memory-ceiling: {str(e)}")
+        return EXIT_USAGE
+    return scheduler.run_manifest(jobs, results_path=args.results, fail_fast=args.fail_fast)
+
 def main():
     """Main function."""
+    args = parse_args()
+    if args.manifest:
+        sys.exit(run_batch(args))
+    
     temp_cleanup = TempCleanup()
+    cache = ArtifactCache()
     try:
         # Check for AssemblyAI API key
         api_key = os.getenv("ASSEMBLYAI_API_KEY")
-        if not api_key:
+        if not api_key and args.asr == "assemblyai":
             raise ValueError(
                 "AssemblyAI API key not found! Please set the ASSEMBLYAI_API_KEY environment variable."
             )
@@ -98,24 +208,44 @@ def main():
         
         print("\nStarting video translation process...\n")
         
-        with temp_cleanup:  # Use context manager for automatic cleanup
+        with temp_cleanup, concurrent.futures.ThreadPoolExecutor(max_workers=1) as background:
             # 1. Download video
-            print("1. Downloading video...")
-            video_path = download_video(video_url)
-            print(f"Video downloaded to: {video_path}\n")
+            from modules.video_downloader import download_audio, download_video
+            download_options = {"concurrent_fragments": args.fragments} if args.fragments else {}
+            if args.download_mode == "audio_first":
+                # The video stream keeps downloading while the audio is transcribed
+                print("1. Downloading audio (video continues in the background)...")
+                video_download = background.submit(download_video, video_url, cache=cache,
+                                                   max_height=args.max_height, video_only=True,
+                                                   **download_options)
+                source_path = download_audio(video_url, cache=cache, **download_options)
+                print(f"Audio downloaded to: {source_path}\n")
+            else:
+                print("1. Downloading video...")
+                source_path = download_video(video_url, cache=cache, max_height=args.max_height,
+                                             **download_options)
+                video_download = background.submit(lambda: source_path)
+                print(f"Video downloaded to: {source_path}\n")
             
             # 2. Extract audio
             print("2. Extracting audio...")
-            audio_path = extract_audio(video_path)
+            from modules.audio_extractor import extract_audio_derivatives
+            extracted = extract_audio_derivatives(source_path, cache=cache)
+            audio_path = extracted.audio_path
             print(f"Audio extracted to: {audio_path}\n")
             
             # 3. Transcribe audio
             print("\n3. Transcribing audio...")
-            utterances = transcribe_audio(
-                audio_path=audio_path,
-                api_key=api_key,
-                language_code=source_language
-            )
+            from modules.asr_backends import get_asr_backend
+            if args.asr == "whisper":
+                asr_backend = get_asr_backend("whisper", model_size=args.whisper_model)
+            else:
+                segment_seconds = args.segment_minutes * 60 if args.segment_minutes else None
+                asr_backend = get_asr_backend("assemblyai", api_key, segment_seconds=segment_seconds)
+            try:
+                utterances = asr_backend.transcribe(audio_path, language_code=source_language, cache=cache)
+            finally:
+                asr_backend.close()
             
             # Combine all utterances into a single text
             transcribed_text = " ".join(utterance.text for utterance in utterances)
@@ -123,7 +253,25 @@ def main():
             
             # 4. Translate text
             print("4. Translating text to German...")
-            translated_text = translate_text(transcribed_text)
+            from modules.translator import translate_text, translate_segments
+            from modules.translation_memory import TranslationMemory
+            if args.dub_mode == "segments":
+                # One translation per utterance, each is placed at the utterance's time
+                from modules.dubbing_timeline import build_segments
+                translations = translate_segments(
+                    [utterance.text for utterance in utterances],
+                    cache=cache,
+                    source_lang=source_language,
+                    memory=TranslationMemory()
+                )
+                segments = build_segments([asdict(utterance) for utterance in utterances], translations)
+            else:
+                translated_text = translate_text(
+                    transcribed_text,
+                    cache=cache,
+                    source_lang=source_language,
+                    memory=TranslationMemory()
+                )
             print("Translation completed\n")
             
             # 5. Get TTS model choice
@@ -131,18 +279,44 @@ def main():
             
             # 6. Generate speech
             print("\n5. Generating German speech...")
-            tts = TTSGenerator(model_type=tts_model, use_gpu=use_gpu)
-            tts_audio_path = tts.generate_speech(translated_text)
+            from modules.tts_generator import TTSGenerator
+            from modules.tts_cache import SynthesisCache
+            tts = TTSGenerator(
+                model_type=tts_model,
+                use_gpu=use_gpu,
+                cache=cache,
+                synthesis_cache=SynthesisCache(),
+                # On CPU, spread Tacotron2 sentences over worker processes
+                num_workers=1 if use_gpu else None
+            )
+            try:
+                if args.dub_mode == "segments":
+                    from modules.dubbing_timeline import render_timeline
+                    tts_audio_path = str(Path(audio_path).with_name("speech.wav"))
+                    # The extracted audio is as long as the video
+                    render_timeline(segments, tts, tts_audio_path, extracted.duration)
+                else:
+                    tts_audio_path = tts.generate_speech(translated_text)
+            finally:
+                tts.close()
             
             print("\n6. Synchronizing audio with video...")
+            if not video_download.done():
+                print("Waiting for the video download to finish...")
+            video_path = video_download.result()
+            from modules.synchronizer import Synchronizer
             synchronizer = Synchronizer()
             final_video_path = synchronizer.sync_audio_with_video(
                 video_path=video_path,
-                audio_path=tts_audio_path
+                audio_path=tts_audio_path,
+                # Probed from the video when the audio was downloaded on its own
+                video_duration=extracted.source["duration"] if extracted.source["video"] else None,
+                # Speech placed on the original timeline never needs the video retimed
+                mux_mode="copy" if args.dub_mode == "segments" else "auto"
             )
             
             print(f"\nDone! Final video saved to: {final_video_path}")
-            
+    
     except Exception as e:
         print(f"\nError: {str(e)}")
         # Ensure cleanup happens even if there's an error
@@ -0,0 +1,381 @@
+"""
+Module for caching pipeline artifacts on disk, keyed by content hash and stage parameters.
+
+Run `python -m modules.artifact_cache --help` from the src directory to inspect or prune the cache.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3  # 20 GB
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """
+    Computes the SHA-256 hash of a file's content.
+    
+    Args:
+        file_path (str): Path to the file
+        block_size (int): Number of bytes read per iteration
+    
+    Returns:
+        str: Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            data = f.read(block_size)
+            if not data:
+                break
+            digest.update(data)
+    return digest.hexdigest()
+
+def hash_text(text: str) -> str:
+    """Compute the SHA-256 hex digest of a text string."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def parse_size(value: str) -> int:
+    """
+    Parses a human-readable size such as "500M" or "20G" into bytes.
+    
+    Args:
+        value (str): Size with optional K, M, G or T suffix
+    
+    Returns:
+        int: Size in bytes
+    """
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    value = value.strip().upper().rstrip('B')
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+def format_size(num_bytes: int) -> str:
+    """Format a byte count for display."""
+    size = float(num_bytes)
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+class ArtifactCache:
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the artifact cache.
+        
+        Args:
+            cache_dir (Optional[str]): Cache directory. If None, uses downloads/cache in the project root
+            max_bytes (int): Maximum total size of cached artifacts before LRU eviction
+        """
+        if cache_dir:
+            self.cache_dir = Path(cache_dir).absolute()
+        else:
+            # Get the project root directory (src's parent)
+            project_root = Path(__file__).parent.parent.parent
+            self.cache_dir = project_root / "downloads" / "cache"
+        self.objects_dir = self.cache_dir / "objects"
+        self.index_path = self.cache_dir / "index.sqlite"
+        self.max_bytes = max_bytes
+        
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, stage TEXT NOT NULL, filename TEXT NOT NULL,"
+                " size INTEGER NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                " stage TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0,"
+                " misses INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the cache index (one per call, so the cache is thread-safe)."""
+        return sqlite3.connect(str(self.index_path), timeout=30)
+    
+    @staticmethod
+    def make_key(stage: str, params: Dict[str, Any]) -> str:
+        """
+        Builds the cache key for a stage and its parameters.
+        
+        Args:
+            stage (str): Pipeline stage name
+            params (Dict[str, Any]): JSON-serializable parameters, including content hashes of the inputs
+        
+        Returns:
+            str: Hex digest identifying the artifact
+        """
+        payload = json.dumps({"stage": stage, "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _object_path(self, key: str, filename: str) -> Path:
+        """Get the storage path of a cached object."""
+        return self.objects_dir / key[:2] / filename
+    
+    def _count(self, conn: sqlite3.Connection, stage: str, hit: bool):
+        """Increment the hit or miss counter of a stage."""
+        column = "hits" if hit else "misses"
+        conn.execute("INSERT OR IGNORE INTO counters (stage) VALUES (?)", (stage,))
+        conn.execute(f"UPDATE counters SET {column} = {column} + 1 WHERE stage = ?", (stage,))
+    
+    def _lookup(self, stage: str, params: Dict[str, Any]) -> Optional[Path]:
+        """
+        Looks up an artifact and records the hit or miss.
+        
+        Args:
+            stage (str): Pipeline stage name
+            params (Dict[str, Any]): Stage parameters
+        
+        Returns:
+            Optional[Path]: Path to the cached object, or None on a miss
+        """
+        key = self.make_key(stage, params)
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT filename FROM entries WHERE key = ?", (key,)).fetchone()
+            object_path = self._object_path(key, row[0]) if row else None
+            
+            if object_path is not None and not object_path.exists():
+                # Index entry without data (e.g. deleted by hand), treat as a miss
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                object_path = None
+            
+            if object_path is not None:
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._count(conn, stage, hit=object_path is not None)
+        
+        return object_path
+    
+    def get_file(self, stage: str, params: Dict[str, Any], destination: str) -> Optional[str]:
+        """
+        Copies a cached file artifact to the destination path.
+        
+        Args:
+            stage (str): Pipeline stage name
+            params (Dict[str, Any]): Stage parameters
+            destination (str): Path where the artifact should be placed
+        
+        Returns:
+            Optional[str]: The destination path on a hit, None on a miss
+        """
+        object_path = self._lookup(stage, params)
+        if object_path is None:
+            return None
+        
+        Path(destination).parent.mkdir(parents=True, exist_ok=True)
+        # Copy rather than hard-link, later stages may overwrite their outputs in place
+        shutil.copyfile(object_path, destination)
+        return destination
+    
+    def put_file(self, stage: str, params: Dict[str, Any], source_path: str) -> str:
+        """
+        Stores a file artifact in the cache.
+        
+        Args:
+            stage (str): Pipeline stage name
+            params (Dict[str, Any]): Stage parameters
+            source_path (str): Path of the file to store
+        
+        Returns:
+            str: Path of the cached copy
+        """
+        key = self.make_key(stage, params)
+        object_path = self._object_path(key, key + Path(source_path).suffix)
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Write under a temporary name first so readers never see a partial file
+        partial_path = object_path.with_name(object_path.name + f".{os.getpid()}.partial")
+        shutil.copyfile(source_path, partial_path)
+        os.replace(partial_path, object_path)
+        
+        self._register(key, stage, object_path)
+        return str(object_path)
+    
+    def get_json(self, stage: str, params: Dict[str, Any]) -> Optional[Any]:
+        """
+        Loads a cached JSON artifact.
+        
+        Args:
+            stage (str): Pipeline stage name
+            params (Dict[str, Any]): Stage parameters
+        
+        Returns:
+            Optional[Any]: The cached value, or None on a miss
+        """
+        object_path = self._lookup(stage, params)
+        if object_path is None:
+            return None
+        with open(object_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def put_json(self, stage: str, params: Dict[str, Any], value: Any):
+        """
+        Stores a JSON-serializable artifact in the cache.
+        
+        Args:
+            stage (str): Pipeline stage name
+            params (Dict[str, Any]): Stage parameters
+            value (Any): Value to store
+        """
+        key = self.make_key(stage, params)
+        object_path = self._object_path(key, key + ".json")
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        partial_path = object_path.with_name(object_path.name + f".{os.getpid()}.partial")
+        with open(partial_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(partial_path, object_path)
+        
+        self._register(key, stage, object_path)
+    
+    def _register(self, key: str, stage: str, object_path: Path):
+        """Add an object to the index and evict old entries if the cache is over its size limit."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, stage, filename, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, stage, object_path.name, object_path.stat().st_size, now, now)
+            )
+        self.prune()
+    
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Evicts least recently used entries until the cache fits within the size limit.
+        
+        Args:
+            max_bytes (Optional[int]): Size limit in bytes. If None, uses the configured limit
+        
+        Returns:
+            int: Number of bytes freed
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        freed = 0
+        
+        with closing(self._connect()) as conn, conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= limit:
+                return 0
+            
+            rows = conn.execute(
+                "SELECT key, filename, size FROM entries ORDER BY last_access ASC"
+            ).fetchall()
+            for key, filename, size in rows:
+                if total <= limit:
+                    break
+                try:
+                    self._object_path(key, filename).unlink()
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.error(f"Error while evicting cache entry {key}: {str(e)}")
+                    continue
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                freed += size
+        
+        if freed:
+            logger.info(f"Evicted {format_size(freed)} from artifact cache")
+        return freed
+    
+    def clear(self) -> int:
+        """
+        Removes all cached artifacts and resets the counters.
+        
+        Returns:
+            int: Number of bytes freed
+        """
+        freed = self.prune(max_bytes=0)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM counters")
+        return freed
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Collects per-stage statistics.
+        
+        Returns:
+            Dict[str, Dict[str, int]]: Entries, bytes, hits and misses per stage
+        """
+        stats = {}
+        with closing(self._connect()) as conn:
+            for stage, entries, size in conn.execute(
+                "SELECT stage, COUNT(*), COALESCE(SUM(size), 0) FROM entries GROUP BY stage"
+            ):
+                stats[stage] = {"entries": entries, "bytes": size, "hits": 0, "misses": 0}
+            for stage, hits, misses in conn.execute("SELECT stage, hits, misses FROM counters"):
+                stats.setdefault(stage, {"entries": 0, "bytes": 0})
+                stats[stage].update({"hits": hits, "misses": misses})
+        return stats
+    
+    def list_entries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Lists the most recently used entries.
+        
+        Args:
+            limit (int): Maximum number of entries to return
+        
+        Returns:
+            List[Dict[str, Any]]: Entry metadata, most recently used first
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT key, stage, filename, size, created_at, last_access FROM entries"
+                " ORDER BY last_access DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            dict(zip(["key", "stage", "filename", "size", "created_at", "last_access"], row))
+            for row in rows
+        ]
+
+def main():
+    """Command line interface for inspecting and pruning the artifact cache."""
+    parser = argparse.ArgumentParser(description="Inspect and prune the pipeline artifact cache.")
+    parser.add_argument("--cache-dir", help="Cache directory (default: downloads/cache)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    subparsers.add_parser("stats", help="Show size and hit/miss counters per stage")
+    list_parser = subparsers.add_parser("list", help="List most recently used entries")
+    list_parser.add_argument("--limit", type=int, default=50)
+    prune_parser = subparsers.add_parser("prune", help="Evict least recently used entries")
+    prune_parser.add_argument("--max-size", required=True, help="Size limit, e.g. 5G or 500M")
+    subparsers.add_parser("clear", help="Remove all entries")
+    
+    args = parser.parse_args()
+    cache = ArtifactCache(args.cache_dir)
+    
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"{'stage':<12} {'entries':>8} {'size':>12} {'hits':>8} {'misses':>8} {'hit rate':>9}")
+        for stage, s in sorted(stats.items()):
+            lookups = s["hits"] + s["misses"]
+            hit_rate = f"{s['hits'] / lookups * 100:.1f}%" if lookups else "-"
+            print(f"{stage:<12} {s['entries']:>8} {format_size(s['bytes']):>12} "
+                  f"{s['hits']:>8} {s['misses']:>8} {hit_rate:>9}")
+        total = sum(s["bytes"] for s in stats.values())
+        print(f"Total: {format_size(total)} in {cache.cache_dir}")
+    elif args.command == "list":
+        for entry in cache.list_entries(args.limit):
+            last_access = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["last_access"]))
+            print(f"{entry['key'][:16]}  {entry['stage']:<12} {format_size(entry['size']):>12}  {last_access}")
+    elif args.command == "prune":
+        freed = cache.prune(parse_size(args.max_size))
+        print(f"Freed {format_size(freed)}")
+    elif args.command == "clear":
+        freed = cache.clear()
+        print(f"Freed {format_size(freed)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Module for speech recognition backends that return transcriber.Utterance lists.
+
+Besides AssemblyAI, a local CPU backend runs faster-whisper (CTranslate2,
+int8 weights): the audio is cut at pauses and the chunks are decoded in a
+pool of worker processes.
+"""
+import concurrent.futures
+import importlib.util
+import math
+import multiprocessing as mp
+import os
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+import numpy as np
+from .artifact_cache import ArtifactCache, hash_file
+from .audio_analysis import decode_audio, speech_regions, plan_chunks
+from .audio_extractor import ANALYSIS_SAMPLE_RATE, load_derivatives
+from .transcriber import Utterance, transcribe_audio
+
+ASR_BACKENDS = ("assemblyai", "whisper")
+WHISPER_SAMPLE_RATE = 16000
+
+class ASRBackend(Protocol):
+    """Interface of a speech recognition backend."""
+    
+    def transcribe(self,
+                   audio_path: str,
+                   language_code: str = "en",
+                   speakers_expected: Optional[int] = None,
+                   cache: Optional[ArtifactCache] = None) -> List[Utterance]:
+        """Transcribe an audio file into utterances with millisecond timestamps."""
+        ...
+    
+    def close(self):
+        """Release workers and connections."""
+        ...
+
+class AssemblyAIBackend:
+    def __init__(self,
+                 api_key: str,
+                 client=None,
+                 timeout: Optional[float] = None,
+                 segment_seconds: Optional[float] = None):
+        """
+        Initialize the AssemblyAI backend.
+        
+        Args:
+            api_key (str): AssemblyAI API key
+            client (Optional[TranscriptionClient]): Client to transcribe with. If None, the shared client
+            timeout (Optional[float]): Seconds to wait for a transcript
+            segment_seconds (Optional[float]): If set, transcribe long audio as concurrent segments of
+                about this length
+        """
+        self.api_key = api_key
+        self.client = client
+        self.timeout = timeout
+        self.segment_seconds = segment_seconds
+        self.last_stats: Dict[str, float] = {}
+    
+    def transcribe(self,
+                   audio_path: str,
+                   language_code: str = "en",
+                   speakers_expected: Optional[int] = None,
+                   cache: Optional[ArtifactCache] = None) -> List[Utterance]:
+        """Transcribe an audio file with speaker diarization."""
+        start = time.perf_counter()
+        utterances = transcribe_audio(
+            audio_path=audio_path,
+            api_key=self.api_key,
+            language_code=language_code,
+            speakers_expected=speakers_expected,
+            cache=cache,
+            client=self.client,
+            timeout=self.timeout,
+            segment_seconds=self.segment_seconds
+        )
+        self.last_stats = {"wall_s": time.perf_counter() - start}
+        return utterances
+    
+    def close(self):
+        """Nothing to release, the transcription client is owned by the caller."""
+        pass
+
+_worker_model = None
+
+def _init_whisper_worker(model_size: str, compute_type: str, threads: int):
+    """Load the Whisper model once per worker process."""
+    global _worker_model
+    # Set before CTranslate2 is imported so OpenMP picks it up
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    from faster_whisper import WhisperModel
+    _worker_model = WhisperModel(model_size, device="cpu", compute_type=compute_type,
+                                 cpu_threads=threads, num_workers=1)
+
+def _decode_chunk(samples: np.ndarray, language_code: str, beam_size: int) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    Decodes one chunk in a worker process.
+    
+    Args:
+        samples (np.ndarray): int16 samples at 16 kHz
+        language_code (str): Language code of the audio
+        beam_size (int): Beam size of the decoder
+    
+    Returns:
+        Tuple[List[Dict[str, Any]], float]: Segments with chunk-relative times in seconds, and
+            the CPU seconds the worker spent
+    """
+    cpu_before = time.process_time()
+    audio = samples.astype(np.float32) / 32768.0
+    segments, _ = _worker_model.transcribe(
+        audio,
+        language=language_code,
+        beam_size=beam_size,
+        word_timestamps=True,
+        vad_filter=False,
+        condition_on_previous_text=False
+    )
+    result = [
+        {
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text.strip(),
+            "avg_logprob": segment.avg_logprob,
+            "words": [
+                {"text": word.word.strip(), "start": word.start, "end": word.end,
+                 "confidence": word.probability}
+                for word in (segment.words or [])
+            ],
+        }
+        for segment in segments
+    ]
+    return result, time.process_time() - cpu_before
+
+def stitch_segments(chunk_segments: List[List[Dict[str, Any]]],
+                    chunk_offsets: List[float],
+                    speaker: str = "A") -> List[Utterance]:
+    """
+    Converts chunk-relative segments into utterances on the global timeline.
+    
+    Args:
+        chunk_segments (List[List[Dict[str, Any]]]): Segments of each chunk, times in seconds
+        chunk_offsets (List[float]): Start of each chunk in the audio in seconds
+        speaker (str): Speaker label given to all utterances
+    
+    Returns:
+        List[Utterance]: Utterances with start/end and word times in milliseconds, in order
+    """
+    utterances = []
+    for segments, offset in zip(chunk_segments, chunk_offsets):
+        for segment in segments:
+            if not segment["text"]:
+                continue
+            words = [
+                {
+                    "text": word["text"],
+                    "start": int(round((offset + word["start"]) * 1000)),
+                    "end": int(round((offset + word["end"]) * 1000)),
+                    "confidence": word["confidence"],
+                    "speaker": speaker,
+                }
+                for word in segment["words"]
+            ]
+            utterances.append(Utterance(
+                speaker=speaker,
+                text=segment["text"],
+                start=int(round((offset + segment["start"]) * 1000)),
+                end=int(round((offset + segment["end"]) * 1000)),
+                confidence=math.exp(segment["avg_logprob"]),
+                words=words
+            ))
+    return utterances
+
+class FasterWhisperBackend:
+    def __init__(self,
+                 model_size: str = "small",
+                 num_workers: Optional[int] = None,
+                 threads_per_worker: int = 2,
+                 compute_type: str = "int8",
+                 beam_size: int = 1,
+                 max_chunk_seconds: float = 30.0):
+        """
+        Initialize the local Whisper backend. Workers are started on first use.
+        
+        There is no diarization: all utterances get speaker "A".
+        
+        Args:
+            model_size (str): Whisper model size or path of a CTranslate2 model
+            num_workers (Optional[int]): Number of worker processes. If None, one per
+                threads_per_worker available CPUs
+            threads_per_worker (int): CTranslate2 threads per worker
+            compute_type (str): CTranslate2 weight type (int8 for CPU)
+            beam_size (int): Beam size of the decoder (1 is greedy)
+            max_chunk_seconds (float): Maximum length of a decoded chunk (Whisper's window is 30s)
+        """
+        cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+        self.model_size = model_size
+        self.num_workers = num_workers or max(1, cpu_count // threads_per_worker)
+        self.threads_per_worker = threads_per_worker
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+        self.max_chunk_seconds = max_chunk_seconds
+        self.last_stats: Dict[str, float] = {}
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        """Start the worker processes (each loads the model once)."""
+        with self._lock:
+            if self._executor is not None:
+                return self._executor
+            if importlib.util.find_spec("faster_whisper") is None:
+                raise RuntimeError("The whisper backend requires faster-whisper (pip install faster-whisper)")
+            print(f"Starting {self.num_workers} Whisper ({self.model_size}, {self.compute_type}) workers "
+                  f"with {self.threads_per_worker} threads each")
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_whisper_worker,
+                initargs=(self.model_size, self.compute_type, self.threads_per_worker)
+            )
+            return self._executor
+    
+    def transcribe(self,
+                   audio_path: str,
+                   language_code: str = "en",
+                   speakers_expected: Optional[int] = None,
+                   cache: Optional[ArtifactCache] = None) -> List[Utterance]:
+        """
+        Transcribes an audio file locally.
+        
+        Args:
+            audio_path (str): Path to the audio file
+            language_code (str): Language code of the audio
+            speakers_expected (Optional[int]): Ignored, there is no diarization
+            cache (Optional[ArtifactCache]): Artifact cache to reuse transcripts of the same audio
+        
+        Returns:
+            List[Utterance]: Transcribed utterances
+        """
+        if cache:
+            cache_params = {
+                "audio": hash_file(audio_path),
+                "language": language_code,
+                "backend": "whisper",
+                "model": self.model_size,
+                "compute_type": self.compute_type,
+                "beam_size": self.beam_size
+            }
+            cached = cache.get_json("transcribe", cache_params)
+            if cached is not None:
+                print("Using cached transcription")
+                return [Utterance(**utterance) for utterance in cached]
+        
+        start = time.perf_counter()
+        # The analysis PCM of an extracted WAV is already what Whisper takes
+        derivatives = load_derivatives(audio_path)
+        if derivatives and ANALYSIS_SAMPLE_RATE == WHISPER_SAMPLE_RATE:
+            audio_path = derivatives.analysis_path
+        pcm = decode_audio(audio_path, WHISPER_SAMPLE_RATE, dtype="int16")
+        audio_seconds = len(pcm) / WHISPER_SAMPLE_RATE
+        chunks = plan_chunks(speech_regions(pcm, WHISPER_SAMPLE_RATE), WHISPER_SAMPLE_RATE,
+                             self.max_chunk_seconds)
+        print(f"Decoding {len(chunks)} speech chunks of {audio_seconds:.0f}s audio")
+        
+        executor = self._get_executor()
+        # Longest chunks first so the pool isn't left waiting on one straggler
+        order = sorted(range(len(chunks)), key=lambda i: chunks[i][0] - chunks[i][1])
+        futures = {
+            i: executor.submit(_decode_chunk, pcm[chunks[i][0]:chunks[i][1]], language_code, self.beam_size)
+            for i in order
+        }
+        results = [futures[i].result() for i in range(len(chunks))]
+        
+        utterances = stitch_segments(
+            [segments for segments, _ in results],
+            [chunk_start / WHISPER_SAMPLE_RATE for chunk_start, _ in chunks]
+        )
+        
+        wall = time.perf_counter() - start
+        cpu = sum(cpu_seconds for _, cpu_seconds in results)
+        cores = self.num_workers * self.threads_per_worker
+        self.last_stats = {
+            "audio_s": audio_seconds,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "rtf": wall / max(audio_seconds, 1e-9),
+            "rtf_per_core": wall * cores / max(audio_seconds, 1e-9),
+            "cores": cores,
+        }
+        print(f"Whisper: {audio_seconds:.0f}s audio in {wall:.1f}s, RTF {self.last_stats['rtf']:.3f} "
+              f"({self.last_stats['rtf_per_core']:.3f} per core on {cores} cores, "
+              f"{cpu / max(audio_seconds, 1e-9):.3f} CPU-s per audio-s)")
+        
+        if cache:
+            cache.put_json("transcribe", cache_params, [asdict(u) for u in utterances])
+        return utterances
+    
+    def close(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+def get_asr_backend(name: str, api_key: Optional[str] = None, **options) -> ASRBackend:
+    """
+    Creates a speech recognition backend by name.
+    
+    Args:
+        name (str): "assemblyai" or "whisper"
+        api_key (Optional[str]): AssemblyAI API key (required for "assemblyai")
+        **options: Keyword arguments for the backend class
+    
+    Returns:
+        ASRBackend: The backend
+    """
+    if name == "assemblyai":
+        if not api_key:
+            raise ValueError("The assemblyai backend requires an AssemblyAI API key")
+        return AssemblyAIBackend(api_key, **options)
+    if name == "whisper":
+        return FasterWhisperBackend(**options)
+    raise ValueError(f"Unknown ASR backend: {name} (choose from {', '.join(ASR_BACKENDS)})")
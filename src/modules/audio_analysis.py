@@ -0,0 +1,249 @@
+"""
+Module for decoding audio to PCM and finding speech and silence with a vectorized energy detector.
+"""
+import subprocess
+import wave
+from typing import List, Optional, Tuple
+import numpy as np
+
+def read_pcm_wav(audio_path: str, sample_rate: int) -> Optional[np.ndarray]:
+    """
+    Maps the samples of a mono 16-bit WAV file at sample_rate without decoding.
+    
+    Args:
+        audio_path (str): Path to the WAV file
+        sample_rate (int): Required sample rate in Hz
+    
+    Returns:
+        Optional[np.ndarray]: Read-only int16 samples backed by the file, or None if the
+            file has another format
+    """
+    try:
+        with open(audio_path, 'rb') as file:
+            wav = wave.open(file)
+            if (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) != (1, 2, sample_rate):
+                return None
+            num_frames = wav.getnframes()
+            # The wave reader stops at the start of the data chunk
+            offset = file.tell()
+    except (wave.Error, EOFError, OSError):
+        return None
+    if num_frames == 0:
+        return np.zeros(0, dtype=np.int16)
+    return np.memmap(audio_path, dtype='<i2', mode='r', offset=offset, shape=(num_frames,))
+
+def decode_audio(audio_path: str, sample_rate: int = 16000, dtype: str = "float32") -> np.ndarray:
+    """
+    Decodes an audio (or video) file to mono samples with ffmpeg.
+    
+    A mono 16-bit WAV at sample_rate (such as the analysis PCM written by
+    audio_extractor) is mapped from disk instead when int16 samples are requested.
+    
+    Args:
+        audio_path (str): Path to the input file
+        sample_rate (int): Output sample rate in Hz
+        dtype (str): "float32" (samples in [-1, 1]) or "int16" (half the memory)
+    
+    Returns:
+        np.ndarray: Samples
+    """
+    sample_format = {"float32": "f32le", "int16": "s16le"}[dtype]
+    if dtype == "int16":
+        samples = read_pcm_wav(audio_path, sample_rate)
+        if samples is not None:
+            return samples
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error',
+        '-i', audio_path,
+        '-vn',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-f', sample_format,
+        'pipe:1'
+    ]
+    process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to decode {audio_path}: {process.stderr.decode(errors='replace')[-1000:]}")
+    return np.frombuffer(process.stdout, dtype=np.dtype(dtype))
+
+def frame_energy_db(samples: np.ndarray, sample_rate: int, frame_ms: int = 30) -> np.ndarray:
+    """
+    Computes the RMS level of consecutive frames in dBFS.
+    
+    Args:
+        samples (np.ndarray): Mono float samples in [-1, 1] or int16 samples
+        sample_rate (int): Sample rate in Hz
+        frame_ms (int): Frame length in milliseconds
+    
+    Returns:
+        np.ndarray: Level per frame (the last partial frame is dropped)
+    """
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    num_frames = len(samples) // frame_length
+    frames = samples[:num_frames * frame_length].reshape(num_frames, frame_length)
+    scale = 1.0 / 32768.0 if samples.dtype == np.int16 else 1.0
+    
+    # Blocks of frames keep the float copy small for hours-long audio
+    energy_db = np.empty(num_frames, dtype=np.float32)
+    block = 65536
+    for first in range(0, num_frames, block):
+        values = frames[first:first + block].astype(np.float32) * scale
+        rms = np.sqrt(np.mean(values * values, axis=1))
+        energy_db[first:first + block] = 20.0 * np.log10(np.maximum(rms, 1e-10))
+    return energy_db
+
+def speech_threshold(energy_db: np.ndarray, margin_db: float = 12.0) -> float:
+    """
+    Estimates the level separating speech from background.
+    
+    The threshold sits margin_db above the noise floor (10th percentile), but
+    no higher than halfway to the loud level (95th percentile), so recordings
+    with little silence still pass.
+    
+    Args:
+        energy_db (np.ndarray): Frame levels in dBFS
+        margin_db (float): Distance of the threshold above the noise floor
+    
+    Returns:
+        float: Threshold in dBFS
+    """
+    if len(energy_db) == 0:
+        return 0.0
+    floor = float(np.percentile(energy_db, 10))
+    loud = float(np.percentile(energy_db, 95))
+    return floor + max(3.0, min(margin_db, (loud - floor) / 2))
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Get start and end (exclusive) indices of the runs of True in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def speech_regions(samples: np.ndarray,
+                   sample_rate: int,
+                   frame_ms: int = 30,
+                   threshold_db: Optional[float] = None,
+                   min_silence_ms: int = 300,
+                   min_speech_ms: int = 200,
+                   pad_ms: int = 150) -> List[Tuple[int, int]]:
+    """
+    Finds the regions containing speech.
+    
+    Args:
+        samples (np.ndarray): Mono float samples in [-1, 1] or int16 samples
+        sample_rate (int): Sample rate in Hz
+        frame_ms (int): Analysis frame length in milliseconds
+        threshold_db (Optional[float]): Speech level threshold in dBFS. If None, estimated from the audio
+        min_silence_ms (int): Shorter pauses don't split a region
+        min_speech_ms (int): Shorter bursts are dropped as noise
+        pad_ms (int): Padding added around each region
+    
+    Returns:
+        List[Tuple[int, int]]: (start, end) sample indices of the regions, in order
+    """
+    energy_db = frame_energy_db(samples, sample_rate, frame_ms)
+    if len(energy_db) == 0:
+        return []
+    if threshold_db is None:
+        threshold_db = speech_threshold(energy_db)
+    
+    starts, ends = _runs(energy_db > threshold_db)
+    if len(starts) == 0:
+        return []
+    
+    # Merge regions separated by short pauses
+    min_gap = max(1, min_silence_ms // frame_ms)
+    keep = np.concatenate(([True], starts[1:] - ends[:-1] >= min_gap))
+    starts = starts[keep]
+    ends = ends[np.concatenate((keep[1:], [True]))]
+    
+    # Drop short bursts
+    long_enough = ends - starts >= max(1, min_speech_ms // frame_ms)
+    starts, ends = starts[long_enough], ends[long_enough]
+    
+    frame_length = sample_rate * frame_ms // 1000
+    pad = sample_rate * pad_ms // 1000
+    start_samples = np.maximum(starts * frame_length - pad, 0)
+    end_samples = np.minimum(ends * frame_length + pad, len(samples))
+    
+    regions: List[Tuple[int, int]] = []
+    for start, end in zip(start_samples.tolist(), end_samples.tolist()):
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+def plan_chunks(regions: List[Tuple[int, int]],
+                sample_rate: int,
+                max_chunk_seconds: float = 30.0) -> List[Tuple[int, int]]:
+    """
+    Groups speech regions into chunks of at most max_chunk_seconds.
+    
+    Neighbouring regions are merged while they fit, so chunks start and end
+    at pauses. A region longer than the limit is cut into equal parts.
+    
+    Args:
+        regions (List[Tuple[int, int]]): (start, end) sample indices of speech regions
+        sample_rate (int): Sample rate in Hz
+        max_chunk_seconds (float): Maximum chunk duration in seconds
+    
+    Returns:
+        List[Tuple[int, int]]: (start, end) sample indices of the chunks, in order
+    """
+    max_length = int(max_chunk_seconds * sample_rate)
+    chunks: List[Tuple[int, int]] = []
+    for start, end in regions:
+        if chunks and end - chunks[-1][0] <= max_length:
+            chunks[-1] = (chunks[-1][0], end)
+            continue
+        parts = -(-(end - start) // max_length)
+        bounds = np.linspace(start, end, parts + 1).astype(np.int64).tolist()
+        chunks.extend(zip(bounds[:-1], bounds[1:]))
+    return chunks
+
+def split_points(samples: np.ndarray,
+                 sample_rate: int,
+                 num_segments: int,
+                 search_seconds: float = 30.0,
+                 frame_ms: int = 30,
+                 window_ms: int = 600) -> List[int]:
+    """
+    Chooses where to cut audio into about equally long segments, preferring silence.
+    
+    Each cut is placed at the quietest stretch of window_ms within search_seconds
+    of its even-split position.
+    
+    Args:
+        samples (np.ndarray): Mono float samples in [-1, 1] or int16 samples
+        sample_rate (int): Sample rate in Hz
+        num_segments (int): Number of segments
+        search_seconds (float): How far a cut may move from its even-split position
+        frame_ms (int): Analysis frame length in milliseconds
+        window_ms (int): Length of the quiet stretch a cut is centered in
+    
+    Returns:
+        List[int]: num_segments - 1 increasing sample indices to cut at
+    """
+    energy_db = frame_energy_db(samples, sample_rate, frame_ms)
+    num_frames = len(energy_db)
+    if num_segments <= 1 or num_frames < num_segments:
+        return []
+    
+    # Moving average, so a cut lands in a pause rather than a single quiet frame
+    width = max(1, window_ms // frame_ms)
+    smoothed = np.convolve(energy_db, np.ones(width, dtype=np.float32) / width, mode="same")
+    
+    frame_length = sample_rate * frame_ms // 1000
+    search = max(1, int(search_seconds * 1000) // frame_ms)
+    points: List[int] = []
+    previous = 0
+    for k in range(1, num_segments):
+        target = k * num_frames // num_segments
+        low = max(previous + 1, target - search)
+        high = min(num_frames, target + search + 1)
+        if low >= high:
+            continue
+        frame = low + int(np.argmin(smoothed[low:high]))
+        points.append(frame * frame_length + frame_length // 2)
+        previous = frame
+    return points
@@ -1,53 +1,155 @@
 """
 Module for extracting audio from video files using ffmpeg.
+
+The audio stream is demuxed and decoded once; a single ffmpeg run fans it out
+into every derivative later stages need: the full-rate WAV, 16 kHz analysis
+PCM, the encoded ASR upload and a JSON record of the source streams.
 """
+import json
+from dataclasses import dataclass, asdict
 from pathlib import Path
-import ffmpeg
+from typing import Any, Dict, Optional
 import subprocess
+from .artifact_cache import ArtifactCache, hash_file
+from .ffmpeg_runner import has_encoder
+from .media_info import media_duration, parse_stream_info
+from .transcriber import UPLOAD_ENCODINGS
+
+# Rate of the analysis PCM (speech detection, silence splitting, local ASR)
+ANALYSIS_SAMPLE_RATE = 16000
+
+@dataclass
+class ExtractedAudio:
+    """Paths of the derivatives of one extraction and the probed source streams."""
+    audio_path: str      # 44.1 kHz mono pcm_s16le
+    analysis_path: str   # ANALYSIS_SAMPLE_RATE mono pcm_s16le
+    upload_path: str     # 16 kHz mono, encoded with upload_codec
+    upload_codec: str
+    metadata_path: str
+    duration: float      # seconds of extracted audio
+    source: Dict[str, Any]
+
+def derivative_paths(audio_output: str, upload_codec: str) -> Dict[str, str]:
+    """Get the paths of the derivatives written next to audio_output."""
+    base = Path(audio_output)
+    return {
+        "audio_path": str(base),
+        "analysis_path": str(base.with_suffix(f".{ANALYSIS_SAMPLE_RATE // 1000}k.wav")),
+        "upload_path": str(base.with_suffix(".upload." + UPLOAD_ENCODINGS[upload_codec][1])),
+        "metadata_path": str(base.with_suffix(".json")),
+    }
 
-def extract_audio(video_path: str, audio_output: str = "downloads/audio.wav") -> str:
+def extract_audio_derivatives(video_path: str,
+                              audio_output: str = "downloads/audio.wav",
+                              cache: Optional[ArtifactCache] = None,
+                              upload_codec: Optional[str] = None) -> ExtractedAudio:
+    """
+    Extracts the audio of a video and all its derivatives in one ffmpeg run.
+    
+    Args:
+        video_path (str): Path to the input video file
+        audio_output (str): Path of the full-rate WAV; the derivatives are written next to it
+        cache (Optional[ArtifactCache]): Artifact cache to reuse extractions of the same source
+        upload_codec (Optional[str]): "opus" or "mp3". If None, Opus when ffmpeg has libopus
+    
+    Returns:
+        ExtractedAudio: Paths of the derivatives and the source stream details
+    """
+    Path(audio_output).parent.mkdir(parents=True, exist_ok=True)
+    if upload_codec is None:
+        upload_codec = "opus" if has_encoder("libopus") else "mp3"
+    paths = derivative_paths(audio_output, upload_codec)
+    
+    if cache:
+        cache_params = {
+            "source": hash_file(video_path),
+            "codec": "pcm_s16le",
+            "rate": 44100,
+            "channels": 1,
+            "analysis_rate": ANALYSIS_SAMPLE_RATE,
+            "upload_codec": upload_codec
+        }
+        # The metadata is stored last, a hit on it means all derivatives were stored
+        if all(cache.get_file("extract", dict(cache_params, output=name), paths[name])
+               for name in ("metadata_path", "audio_path", "analysis_path", "upload_path")):
+            print("Using cached audio extraction")
+            metadata = json.loads(Path(paths["metadata_path"]).read_text(encoding='utf-8'))
+            return ExtractedAudio(**dict(metadata, **paths))
+    
+    upload_args = UPLOAD_ENCODINGS[upload_codec][0]
+    # One input and three outputs mapping the same stream: ffmpeg decodes it once
+    # and resamples/encodes per output
+    cmd = [
+        'ffmpeg', '-hide_banner', '-nostdin', '-nostats',
+        '-i', video_path,
+        '-map', '0:a:0', '-ac', '1', '-ar', '44100', '-c:a', 'pcm_s16le', '-y', paths["audio_path"],
+        '-map', '0:a:0', '-ac', '1', '-ar', str(ANALYSIS_SAMPLE_RATE), '-c:a', 'pcm_s16le', '-y',
+        paths["analysis_path"],
+        '-map', '0:a:0', '-ac', '1', '-ar', '16000', *upload_args, '-y', paths["upload_path"],
+    ]
+    process = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    log = process.stderr.decode(errors='replace')
+    if process.returncode != 0:
+        raise Exception(f"Failed to extract audio: {log[-2000:]}")
+    for name in ("audio_path", "analysis_path", "upload_path"):
+        output_file = Path(paths[name])
+        if not output_file.exists() or output_file.stat().st_size == 0:
+            raise Exception(f"Audio extraction failed: {output_file} is empty or doesn't exist")
+    
+    extracted = ExtractedAudio(
+        upload_codec=upload_codec,
+        duration=media_duration(paths["audio_path"]),
+        source=parse_stream_info(log),
+        **paths
+    )
+    metadata = {key: value for key, value in asdict(extracted).items() if key not in paths}
+    Path(paths["metadata_path"]).write_text(json.dumps(metadata, indent=2), encoding='utf-8')
+    
+    if cache:
+        for name in ("audio_path", "analysis_path", "upload_path", "metadata_path"):
+            cache.put_file("extract", dict(cache_params, output=name), paths[name])
+    return extracted
+
+def load_derivatives(audio_path: str) -> Optional[ExtractedAudio]:
+    """
+    Finds the derivatives written by extract_audio_derivatives next to an extracted WAV.
+    
+    Args:
+        audio_path (str): Path of the full-rate WAV
+    
+    Returns:
+        Optional[ExtractedAudio]: The derivatives, or None if they are missing or older than the WAV
+    """
+    metadata_path = Path(audio_path).with_suffix(".json")
+    try:
+        metadata = json.loads(metadata_path.read_text(encoding='utf-8'))
+        paths = derivative_paths(audio_path, metadata["upload_codec"])
+        audio_mtime = Path(audio_path).stat().st_mtime
+        for name in ("analysis_path", "upload_path", "metadata_path"):
+            if Path(paths[name]).stat().st_mtime < audio_mtime - 1:
+                return None
+        return ExtractedAudio(**dict(metadata, **paths))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def extract_audio(video_path: str,
+                  audio_output: str = "downloads/audio.wav",
+                  cache: Optional[ArtifactCache] = None) -> str:
     """
     Extracts audio from a video file using ffmpeg.
     
+    The analysis PCM, ASR upload and metadata are written next to the WAV in the
+    same run (see extract_audio_derivatives) and picked up by later stages.
+    
     Args:
         video_path (str): Path to the input video file
         audio_output (str): Path where the audio will be saved
-        
+        cache (Optional[ArtifactCache]): Artifact cache to reuse audio extracted from the same source
+    
     Returns:
         str: Path to the extracted audio file
     """
-    # Ensure the output directory exists
-    Path(audio_output).parent.mkdir(parents=True, exist_ok=True)
-    
     try:
-        # Construct ffmpeg command
-        cmd = [
-            'ffmpeg',
-            '-i', video_path,
-            '-vn',  # No video
-            '-acodec', 'pcm_s16le',  # PCM 16-bit format
-            '-ar', '44100',  # 44.1kHz sampling rate
-            '-ac', '1',  # Mono audio
-            '-y',  # Overwrite output
-            audio_output
-        ]
-        
-        # Run ffmpeg command
-        process = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=True
-        )
-        
-        # Verify the output file exists and has size > 0
-        output_file = Path(audio_output)
-        if not output_file.exists() or output_file.stat().st_size == 0:
-            raise Exception("Audio extraction failed: Output file is empty or doesn't exist")
-            
-        return audio_output
-        
-    except subprocess.CalledProcessError as e:
-        raise Exception(f"Failed to extract audio: {e.stderr.decode()}")
+        return extract_audio_derivatives(video_path, audio_output, cache=cache).audio_path
     except Exception as e:
         raise Exception(f"An error occurred while extracting audio: {str(e)}")
@@ -0,0 +1,312 @@
+"""
+Module for generating Bark audio for several text chunks at once.
+
+Chunks are generated side by side in a pool of worker processes. Each worker
+loads the Bark models once and gets its own torch thread budget and CPU set.
+Every chunk runs through Bark's own generate_audio, seeded from the job seed and
+the chunk's position in the script, so its tokens and samples are bit for bit
+those of per-chunk generation with the same seed (generate_audio_seeded) and
+torch thread count, no matter how many workers there are or which one runs it.
+
+Chunks are not stacked into one padded forward pass: batched matrix products
+round differently than batch-1 ones, which now and then flips a sampled token,
+so that would break the match with per-chunk output.
+"""
+import os
+import queue
+import random
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from .tts_worker_pool import _split_cpus
+
+# Rough peak memory of one worker: the Bark models in float32 plus the sampling
+# state of one chunk
+BYTES_PER_WORKER = 6 * 1024 ** 3
+MAX_WORKERS = 16
+
+def available_memory() -> Optional[int]:
+    """Get the available system memory in bytes from /proc/meminfo, or None if unknown."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def choose_batch_size(requested: Optional[int] = None, memory_fraction: float = 0.5) -> int:
+    """
+    Chooses how many chunks to generate side by side, i.e. the number of workers.
+    
+    Args:
+        requested (Optional[int]): Explicit batch size. If None, derived from available RAM
+        memory_fraction (float): Share of the available memory the workers may use
+    
+    Returns:
+        int: Batch size of at least 1
+    """
+    if requested:
+        return max(1, requested)
+    
+    available = available_memory()
+    if available is None:
+        return 2
+    return int(min(MAX_WORKERS, max(1, available * memory_fraction // BYTES_PER_WORKER)))
+
+def _seed_everything(seed: int):
+    """Seed every random number generator Bark's sampling uses."""
+    import torch
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+    torch.manual_seed(seed)
+    if torch.cuda.is_available():
+        torch.cuda.manual_seed_all(seed)
+
+def chunk_seed(seed: int, index: int) -> int:
+    """Derive the seed of the chunk at a script position from the job seed."""
+    return seed + index * 1000003
+
+def generate_chunk_seeded(text: str,
+                          history_prompt: Optional[str],
+                          seed: int,
+                          index: int) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Generates one chunk with Bark's generate_audio, seeded from the job seed and its position.
+    
+    Args:
+        text (str): Chunk text
+        history_prompt (Optional[str]): Bark speaker preset
+        seed (int): Base seed of the job
+        index (int): Position of the chunk in the script
+    
+    Returns:
+        Tuple[Dict[str, np.ndarray], np.ndarray]: Semantic, coarse and fine tokens (keyed like
+            Bark's full generation) and float32 audio
+    """
+    from bark import generate_audio
+    _seed_everything(chunk_seed(seed, index))
+    tokens, audio = generate_audio(text, history_prompt=history_prompt, silent=True, output_full=True)
+    return tokens, audio
+
+def generate_audio_seeded(text: str, history_prompt: Optional[str], seed: int, index: int) -> np.ndarray:
+    """
+    Generates audio for one chunk with the same seeding as generate_audio_batch.
+    
+    Args:
+        text (str): Chunk text
+        history_prompt (Optional[str]): Bark speaker preset
+        seed (int): Base seed of the job
+        index (int): Position of the chunk in the script
+    
+    Returns:
+        np.ndarray: Float32 audio
+    """
+    return generate_chunk_seeded(text, history_prompt, seed, index)[1]
+
+def _worker_main(worker_id: int,
+                 cpus: List[int],
+                 threads: int,
+                 task_queue: mp.Queue,
+                 result_queue: mp.Queue):
+    """
+    Entry point of a Bark worker process.
+    
+    Args:
+        worker_id (int): Index of the worker
+        cpus (List[int]): CPUs the worker is pinned to (empty to leave affinity unchanged)
+        threads (int): Number of torch intra-op threads
+        task_queue (mp.Queue): Queue of (job_id, text, history_prompt, seed, index) tasks, None to stop
+        result_queue (mp.Queue): Queue for ready, result and error messages
+    """
+    try:
+        if cpus and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+        # Set before torch is imported so OpenMP/MKL pick them up
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(threads)
+        
+        import torch
+        from bark import preload_models
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+        preload_models()
+    except Exception as e:
+        result_queue.put(("error", None, f"Worker {worker_id} failed to start: {str(e)}"))
+        return
+    
+    result_queue.put(("ready", worker_id, None))
+    
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        job_id, text, history_prompt, seed, index = task
+        try:
+            tokens, audio = generate_chunk_seeded(text, history_prompt, seed, index)
+            audio = np.asarray(audio, dtype=np.float32)
+            
+            # Hand the samples over through shared memory, the parent unlinks the block
+            shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+            np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+            result_queue.put(("ok", job_id, (shm.name, len(audio), tokens)))
+            shm.close()
+        except Exception as e:
+            result_queue.put(("error", job_id, str(e)))
+
+class BarkProcessPool:
+    def __init__(self,
+                 num_workers: Optional[int] = None,
+                 threads_per_worker: int = 2,
+                 pin_cpus: bool = True):
+        """
+        Initialize the process pool. Workers are started on first use.
+        
+        Args:
+            num_workers (Optional[int]): Number of worker processes. If None, chosen from available RAM
+            threads_per_worker (int): Torch intra-op threads per worker
+            pin_cpus (bool): Whether to pin each worker to its own set of CPUs
+        """
+        self.num_workers = choose_batch_size(num_workers)
+        self.threads_per_worker = threads_per_worker
+        self.pin_cpus = pin_cpus
+        self.processes: List[mp.Process] = []
+        self._next_job_id = 0
+    
+    def start(self):
+        """Start the worker processes (each loads the models once)."""
+        if self.processes:
+            return
+        
+        context = mp.get_context("spawn")
+        self.task_queue = context.Queue()
+        self.result_queue = context.Queue()
+        
+        cpu_groups = _split_cpus(self.num_workers) if self.pin_cpus else [[] for _ in range(self.num_workers)]
+        print(f"Starting {self.num_workers} Bark workers with {self.threads_per_worker} threads each")
+        for worker_id, cpus in enumerate(cpu_groups):
+            process = context.Process(
+                target=_worker_main,
+                args=(worker_id, cpus, self.threads_per_worker, self.task_queue, self.result_queue),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+    
+    def _receive(self) -> Tuple[str, Optional[int], Any]:
+        """Wait for the next message from the workers, failing if they have all died."""
+        while True:
+            try:
+                return self.result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not any(process.is_alive() for process in self.processes):
+                    raise RuntimeError("All Bark workers exited unexpectedly")
+    
+    def imap(self,
+             texts: List[str],
+             history_prompt: Optional[str],
+             seed: int,
+             indices: List[int]) -> Iterator[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+        """
+        Generates chunks in parallel, yielding results in input order as they become available.
+        
+        Args:
+            texts (List[str]): Chunk texts
+            history_prompt (Optional[str]): Bark speaker preset
+            seed (int): Base seed of the job
+            indices (List[int]): Script positions of the chunks
+        
+        Yields:
+            Tuple[np.ndarray, Dict[str, np.ndarray]]: Float32 audio and tokens per chunk
+        """
+        self.start()
+        
+        first_job_id = self._next_job_id
+        self._next_job_id += len(texts)
+        for offset, (text, index) in enumerate(zip(texts, indices)):
+            self.task_queue.put((first_job_id + offset, text, history_prompt, seed, index))
+        
+        pending: Dict[int, Tuple[np.ndarray, Dict[str, np.ndarray]]] = {}
+        next_offset = 0
+        while next_offset < len(texts):
+            kind, job_id, payload = self._receive()
+            if kind == "ready":
+                continue
+            if kind == "error":
+                if job_id is not None and not 0 <= job_id - first_job_id < len(texts):
+                    continue
+                raise RuntimeError(f"Bark generation failed: {payload}")
+            
+            shm_name, num_samples, tokens = payload
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                audio = np.ndarray((num_samples,), dtype=np.float32, buffer=shm.buf).copy()
+            finally:
+                shm.close()
+                shm.unlink()
+            
+            # Results of an earlier call that was aborted by an error are dropped
+            if 0 <= job_id - first_job_id < len(texts):
+                pending[job_id - first_job_id] = (audio, tokens)
+            
+            while next_offset in pending:
+                yield pending.pop(next_offset)
+                next_offset += 1
+    
+    def close(self):
+        """Stop the worker processes."""
+        if not self.processes:
+            return
+        for _ in self.processes:
+            self.task_queue.put(None)
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+    
+    def __enter__(self):
+        """Context manager entry point."""
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit point - stops the workers."""
+        self.close()
+
+def generate_audio_batch(texts: List[str],
+                         history_prompt: Optional[str],
+                         seed: int = 0,
+                         batch_size: Optional[int] = None,
+                         indices: Optional[List[int]] = None,
+                         threads_per_worker: int = 2) -> List[np.ndarray]:
+    """
+    Generates Bark audio for several chunks in a temporary worker pool.
+    
+    Args:
+        texts (List[str]): Chunk texts
+        history_prompt (Optional[str]): Bark speaker preset
+        seed (int): Base seed of the job
+        batch_size (Optional[int]): Chunks generated side by side. If None, chosen from available RAM
+        indices (Optional[List[int]]): Script positions of the chunks (used for seeding),
+            defaults to 0..len(texts)-1
+        threads_per_worker (int): Torch intra-op threads per worker
+    
+    Returns:
+        List[np.ndarray]: Float32 audio per chunk, in input order
+    """
+    indices = indices if indices is not None else list(range(len(texts)))
+    
+    results = []
+    with BarkProcessPool(batch_size, threads_per_worker) as pool:
+        start = time.perf_counter()
+        for audio, _ in pool.imap(texts, history_prompt, seed, indices):
+            results.append(audio)
+            elapsed = time.perf_counter() - start
+            print(f"Generated {len(results)}/{len(texts)} chunks "
+                  f"({len(results) / elapsed * 60:.1f} chunks/minute)")
+    
+    return results
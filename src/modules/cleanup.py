@@ -34,6 +34,12 @@ class TempCleanup:
         """Clean up specific files in the downloads directory."""
         specific_files = [
             "audio.wav",
+            "audio.16k.wav",
+            "audio.upload.ogg",
+            "audio.upload.mp3",
+            "audio.json",
+            "source_audio.m4a",
+            "speech.wav",
             "video.mp4"
         ]
         
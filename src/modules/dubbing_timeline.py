@@ -0,0 +1,223 @@
+"""
+Module for building the dubbed speech track on the timeline of the original utterances.
+
+Each translated utterance is synthesized on its own and mixed into a
+memory-mapped track (see timeline_buffer) at the start time of the original.
+Only clips longer than their slot (the time until the next utterance starts)
+are time-stretched, so the video keeps its timing and is stream-copied instead
+of re-encoded.
+"""
+import collections
+import concurrent.futures
+import json
+import os
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from .time_stretch import stretch_array
+from .timeline_buffer import TimelineBuffer
+
+# Clips are sped up at most this much, longer ones delay the speaker's following clips
+DEFAULT_MAX_TEMPO = 1.5
+# Fade-out applied where a clip is cut at the end of the track, avoids a click
+TRIM_FADE_SECONDS = 0.02
+
+@dataclass
+class DubSegment:
+    """One utterance of the dubbing timeline."""
+    start: int  # milliseconds, as transcribed
+    end: int    # milliseconds
+    speaker: str
+    text: str
+    translation: str
+
+def build_segments(utterances: List[Dict[str, Any]], translations: List[str]) -> List[DubSegment]:
+    """
+    Pairs transcribed utterances with their translations, ordered by start time.
+    
+    Args:
+        utterances (List[Dict[str, Any]]): Utterances as dictionaries (see transcriber.Utterance)
+        translations (List[str]): Translation of each utterance
+    
+    Returns:
+        List[DubSegment]: Segments in timeline order
+    """
+    if len(utterances) != len(translations):
+        raise ValueError("Number of translations must match number of utterances")
+    segments = [
+        DubSegment(
+            start=int(utterance["start"]),
+            end=int(utterance["end"]),
+            speaker=utterance.get("speaker") or "",
+            text=utterance["text"],
+            translation=translation
+        )
+        for utterance, translation in zip(utterances, translations)
+    ]
+    return sorted(segments, key=lambda segment: segment.start)
+
+def save_segments(segments: List[DubSegment], path: str) -> str:
+    """Write segments to a JSON file and return its path."""
+    Path(path).write_text(json.dumps([asdict(segment) for segment in segments], ensure_ascii=False),
+                          encoding='utf-8')
+    return path
+
+def load_segments(path: str) -> List[DubSegment]:
+    """Read segments written by save_segments."""
+    return [DubSegment(**segment) for segment in json.loads(Path(path).read_text(encoding='utf-8'))]
+
+def segment_slots(segments: List[DubSegment], total_duration: float) -> List[int]:
+    """
+    Gets the time each segment's speech may take without delaying the next one.
+    
+    A slot runs from the segment's start to the next segment's start (or the end
+    of the track), but is never shorter than the original utterance.
+    
+    Args:
+        segments (List[DubSegment]): Segments in timeline order
+        total_duration (float): Duration of the track in seconds
+    
+    Returns:
+        List[int]: Slot length of each segment in milliseconds
+    """
+    next_starts = [segment.start for segment in segments[1:]] + [int(total_duration * 1000)]
+    return [
+        max(next_start - segment.start, segment.end - segment.start, 1)
+        for segment, next_start in zip(segments, next_starts)
+    ]
+
+def fit_clip(samples: np.ndarray, sample_rate: int, slot_frames: int, max_tempo: float) -> Tuple[np.ndarray, float]:
+    """
+    Speeds up a clip that is longer than its slot, keeping its pitch.
+    
+    Args:
+        samples (np.ndarray): int16 samples of the clip
+        sample_rate (int): Sample rate in Hz
+        slot_frames (int): Length of the slot in samples
+        max_tempo (float): Largest allowed speed-up
+    
+    Returns:
+        Tuple[np.ndarray, float]: Samples (int16 if unchanged, float32 if stretched) and the tempo applied
+    """
+    if len(samples) <= slot_frames:
+        return samples, 1.0
+    tempo = min(len(samples) / slot_frames, max_tempo)
+    return stretch_array(samples.astype(np.float32) / 32768.0, sample_rate, tempo), tempo
+
+def trim_clip(samples: np.ndarray, num_frames: int, fade_frames: int) -> np.ndarray:
+    """
+    Cuts a clip to num_frames samples with a linear fade-out before the cut.
+    
+    Args:
+        samples (np.ndarray): int16 or float32 samples of the clip
+        num_frames (int): Length to keep
+        fade_frames (int): Length of the fade-out in samples
+    
+    Returns:
+        np.ndarray: float32 samples in [-1, 1]
+    """
+    if samples.dtype == np.int16:
+        trimmed = samples[:num_frames].astype(np.float32) / 32768.0
+    else:
+        trimmed = samples[:num_frames].astype(np.float32)
+    fade_frames = min(fade_frames, len(trimmed))
+    if fade_frames:
+        trimmed[-fade_frames:] *= np.linspace(1.0, 0.0, fade_frames, dtype=np.float32)
+    return trimmed
+
+def render_timeline(segments: List[DubSegment],
+                    tts,
+                    output_path: str,
+                    total_duration: float,
+                    speaker: Optional[str] = None,
+                    max_tempo: float = DEFAULT_MAX_TEMPO,
+                    workers: Optional[int] = None) -> Dict[str, float]:
+    """
+    Synthesizes the translated segments and writes them at their original times.
+    
+    Clips are stretched in a thread pool while the next ones are synthesized, and
+    mixed into the track as they are ready, so only a few clips are held in memory.
+    A clip that still overflows its slot at max_tempo delays the same speaker's
+    following clips until a pause absorbs the delay; where different speakers
+    overlap, as in the original, their clips are mixed. The track never outlasts
+    the video: speech that would run past total_duration is cut with a short
+    fade-out and reported as trimmed_s.
+    
+    Args:
+        segments (List[DubSegment]): Segments in timeline order
+        tts (TTSGenerator): Generator to synthesize with
+        output_path (str): Path of the speech track (WAV)
+        total_duration (float): Duration of the video in seconds; the track is padded or cut to it
+        speaker (Optional[str]): Speaker preset (for Bark) or speaker ID (for Tacotron2)
+        max_tempo (float): Largest speed-up applied to a clip
+        workers (Optional[int]): Threads stretching clips. If None, one per CPU
+    
+    Returns:
+        Dict[str, float]: Statistics: segments, stretched, max_tempo, max_delay_s, trimmed, trimmed_s and duration_s
+    """
+    voiced = [segment for segment in segments if segment.translation.strip()]
+    if not voiced:
+        raise ValueError("Nothing to dub: no utterance has a translation")
+    slots = segment_slots(voiced, total_duration)
+    workers = workers or os.cpu_count() or 1
+    stats = {"segments": len(voiced), "stretched": 0, "max_tempo": 1.0, "max_delay_s": 0.0,
+             "trimmed": 0, "trimmed_s": 0.0}
+    
+    timeline = None
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            # End of each speaker's last clip in samples
+            cursors: Dict[str, int] = {}
+            pending = collections.deque()
+            clips = tts.synthesize_segments([segment.translation for segment in voiced], speaker)
+            for segment, slot, (samples, sample_rate) in zip(voiced, slots, clips):
+                if timeline is None:
+                    # Sized to the video up front, silence costs no memory
+                    timeline = TimelineBuffer(output_path, sample_rate,
+                                              num_frames=int(round(total_duration * sample_rate)))
+                elif sample_rate != timeline.sample_rate:
+                    raise ValueError(f"Sample rate mismatch: got {sample_rate}, writing {timeline.sample_rate}")
+                slot_frames = slot * sample_rate // 1000
+                pending.append((segment, executor.submit(fit_clip, samples, sample_rate, slot_frames, max_tempo)))
+                if len(pending) > 2 * workers:
+                    _place_clip(timeline, *pending.popleft(), cursors, stats)
+            while pending:
+                _place_clip(timeline, *pending.popleft(), cursors, stats)
+        stats["duration_s"] = timeline.duration
+    finally:
+        if timeline is not None:
+            timeline.close()
+    
+    print(f"Placed {stats['segments']} segments, {stats['stretched']} sped up "
+          f"(up to {stats['max_tempo']:.2f}x), largest delay {stats['max_delay_s']:.2f}s")
+    if stats["trimmed"]:
+        print(f"Warning: cut {stats['trimmed_s']:.2f}s of speech from {stats['trimmed']} segments "
+              f"that ran past the end of the video")
+    return stats
+
+def _place_clip(timeline: TimelineBuffer,
+                segment: DubSegment,
+                future: concurrent.futures.Future,
+                cursors: Dict[str, int],
+                stats: Dict[str, float]):
+    """Mix a segment's clip into the timeline at its start, or after the speaker's previous clip."""
+    clip, tempo = future.result()
+    sample_rate = timeline.sample_rate
+    start = segment.start * sample_rate // 1000
+    position = max(start, cursors.get(segment.speaker, 0))
+    overflow = position + len(clip) - timeline.num_frames
+    if overflow > 0:
+        # The track is as long as the video, speech past its end is cut
+        kept = max(0, len(clip) - overflow)
+        stats["trimmed"] += 1
+        stats["trimmed_s"] += (len(clip) - kept) / sample_rate
+        clip = trim_clip(clip, kept, int(TRIM_FADE_SECONDS * sample_rate))
+    if len(clip):
+        timeline.mix(clip, position)
+    cursors[segment.speaker] = position + len(clip)
+    
+    if tempo > 1.0:
+        stats["stretched"] += 1
+        stats["max_tempo"] = max(stats["max_tempo"], tempo)
+    stats["max_delay_s"] = max(stats["max_delay_s"], (position - start) / sample_rate)
@@ -0,0 +1,183 @@
+"""
+Module for running ffmpeg commands with progress reporting.
+"""
+import subprocess
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, IO, List, Optional
+
+class FFmpegError(RuntimeError):
+    """Raised when an ffmpeg process exits with a non-zero status."""
+    pass
+
+def iter_progress(stream: IO[str]) -> Iterator[Dict[str, str]]:
+    """
+    Parses ffmpeg `-progress` output into one dictionary per progress block.
+    
+    Args:
+        stream (IO[str]): Text stream with ffmpeg progress output
+    
+    Yields:
+        Dict[str, str]: Key/value pairs of a progress block, ending with the "progress" key
+    """
+    block = {}
+    for line in stream:
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            continue
+        block[key] = value
+        if key == 'progress':
+            yield block
+            block = {}
+
+def progress_seconds(block: Dict[str, str]) -> Optional[float]:
+    """
+    Extracts the output position in seconds from a progress block.
+    
+    Args:
+        block (Dict[str, str]): Progress block from iter_progress
+    
+    Returns:
+        Optional[float]: Output position in seconds, or None if not reported yet
+    """
+    # out_time_ms is reported in microseconds as well, kept for older ffmpeg builds
+    for key in ('out_time_us', 'out_time_ms'):
+        value = block.get(key)
+        if value and value != 'N/A':
+            try:
+                return max(int(value), 0) / 1_000_000
+            except ValueError:
+                continue
+    return None
+
+def print_progress(label: str) -> Callable[[float, Optional[float]], None]:
+    """Create a progress callback that prints a single updating status line."""
+    def callback(position: float, total: Optional[float]):
+        if total:
+            print(f"\r{label}: {min(position / total, 1.0) * 100:5.1f}%", end="", flush=True)
+        else:
+            print(f"\r{label}: {position:.1f}s", end="", flush=True)
+    return callback
+
+def run_ffmpeg(cmd: List[str],
+               total_duration: Optional[float] = None,
+               on_progress: Optional[Callable[[float, Optional[float]], None]] = None) -> float:
+    """
+    Runs an ffmpeg command and reports progress parsed from `-progress pipe:1`.
+    
+    Args:
+        cmd (List[str]): ffmpeg command, starting with the executable
+        total_duration (Optional[float]): Expected output duration in seconds, used for percentages
+        on_progress (Optional[Callable]): Called with (position seconds, total duration) per update
+    
+    Returns:
+        float: Last output position reported by ffmpeg in seconds
+    """
+    full_cmd = [cmd[0], '-hide_banner', '-nostats', '-progress', 'pipe:1'] + cmd[1:]
+    process = subprocess.Popen(
+        full_cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    
+    # Drain stderr in the background so a chatty ffmpeg can't block on a full pipe
+    stderr_lines = []
+    stderr_thread = threading.Thread(
+        target=lambda: stderr_lines.extend(process.stderr),
+        daemon=True
+    )
+    stderr_thread.start()
+    
+    position = 0.0
+    for block in iter_progress(process.stdout):
+        seconds = progress_seconds(block)
+        if seconds is not None:
+            position = seconds
+            if on_progress:
+                on_progress(position, total_duration)
+    
+    process.wait()
+    stderr_thread.join()
+    
+    if process.returncode != 0:
+        raise FFmpegError(f"FFmpeg failed: {''.join(stderr_lines[-20:])}")
+    
+    return position
+
+@lru_cache(maxsize=None)
+def has_filter(name: str) -> bool:
+    """
+    Checks whether the installed ffmpeg provides a filter.
+    
+    Args:
+        name (str): Filter name, e.g. "rubberband"
+    
+    Returns:
+        bool: True if the filter is available
+    """
+    try:
+        process = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-filters'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+    except OSError:
+        return False
+    return any(
+        len(parts) > 1 and parts[1] == name
+        for parts in (line.split() for line in process.stdout.splitlines())
+    )
+
+@lru_cache(maxsize=None)
+def has_encoder(name: str) -> bool:
+    """
+    Checks whether the installed ffmpeg provides an encoder.
+    
+    Args:
+        name (str): Encoder name, e.g. "libopus"
+    
+    Returns:
+        bool: True if the encoder is available
+    """
+    try:
+        process = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+    except OSError:
+        return False
+    return any(
+        len(parts) > 1 and parts[1] == name
+        for parts in (line.split() for line in process.stdout.splitlines())
+    )
+
+def atempo_chain(factor: float) -> str:
+    """
+    Builds an atempo filter chain for any positive tempo factor.
+    
+    A single atempo instance only accepts factors between 0.5 and 2.0,
+    so larger changes are split into several stages.
+    
+    Args:
+        factor (float): Tempo factor (> 1 speeds up, < 1 slows down)
+    
+    Returns:
+        str: Comma-separated atempo filters
+    """
+    if factor <= 0:
+        raise ValueError(f"Tempo factor must be positive, got {factor}")
+    
+    stages = []
+    while factor > 2.0:
+        stages.append(2.0)
+        factor /= 2.0
+    while factor < 0.5:
+        stages.append(0.5)
+        factor /= 0.5
+    stages.append(factor)
+    
+    return ','.join(f"atempo={stage:.6f}" for stage in stages)
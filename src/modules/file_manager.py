@@ -6,6 +6,7 @@ from pathlib import Path
 import shutil
 from datetime import datetime
 import tempfile
+import uuid
 
 class FileManager:
     def __init__(self, base_dir: str = "downloads"):
@@ -37,7 +38,8 @@ class FileManager:
             Path: Path to temporary file
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{prefix}_{timestamp}{suffix}"
+        # Random part keeps names unique when several jobs run in the same second
+        filename = f"{prefix}_{timestamp}_{uuid.uuid4().hex[:8]}{suffix}"
         return self.temp_dir / filename
 
     def get_output_path(self, prefix: str, suffix: str) -> Path:
@@ -52,7 +54,8 @@ class FileManager:
             Path: Path to output file
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{prefix}_{timestamp}{suffix}"
+        # Random part keeps names unique when several jobs run in the same second
+        filename = f"{prefix}_{timestamp}_{uuid.uuid4().hex[:8]}{suffix}"
         return self.output_dir / filename
 
     def cleanup_temp_files(self, max_age_hours: int = 24):
@@ -0,0 +1,601 @@
+"""
+Module for running translation jobs headlessly from a manifest.
+
+Each job gets its own directory with a stage journal, so a crashed or killed
+run resumes at the first incomplete stage.
+"""
+import concurrent.futures
+import json
+import os
+import shutil
+import threading
+import time
+import traceback
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from .artifact_cache import ArtifactCache, hash_text
+
+STAGES = ["download_audio", "download", "extract", "transcribe", "translate", "tts", "sync"]
+DOWNLOAD_MODES = ("audio_first", "muxed")
+DUB_MODES = ("segments", "full")
+
+# Exit codes of the batch command
+EXIT_OK = 0
+EXIT_JOB_FAILED = 1
+EXIT_USAGE = 2
+
+@dataclass
+class JobSpec:
+    """Options of one translation job."""
+    url: str
+    id: str = ""
+    source_language: str = "en"
+    target_language: str = "de"
+    tts_model: str = "tacotron2"
+    use_gpu: bool = False
+    speaker: Optional[str] = None
+    asr_backend: str = "assemblyai"
+    download_mode: str = "audio_first"
+    max_height: Optional[int] = None
+    dub_mode: str = "segments"
+    
+    def __post_init__(self):
+        if not self.url:
+            raise ValueError("Job is missing a url")
+        if self.tts_model not in ("tacotron2", "bark"):
+            raise ValueError(f"Unknown tts_model: {self.tts_model}")
+        if self.asr_backend not in ("assemblyai", "whisper"):
+            raise ValueError(f"Unknown asr_backend: {self.asr_backend}")
+        if self.download_mode not in DOWNLOAD_MODES:
+            raise ValueError(f"Unknown download_mode: {self.download_mode}")
+        if self.dub_mode not in DUB_MODES:
+            raise ValueError(f"Unknown dub_mode: {self.dub_mode}")
+        if self.max_height is not None and (not isinstance(self.max_height, int) or self.max_height <= 0):
+            raise ValueError(f"max_height must be a positive number of lines, got {self.max_height}")
+        if not self.id:
+            self.id = hash_text(self.url)[:12]
+
+def job_stages(job: JobSpec) -> List[str]:
+    """
+    Gets the stages of a job in the order they are run one after another.
+    
+    In audio_first mode, extraction and transcription work on the separately
+    downloaded audio stream and the video stream is only needed for sync.
+    """
+    if job.download_mode == "muxed":
+        return [stage for stage in STAGES if stage != "download_audio"]
+    return ["download_audio", "extract", "transcribe", "translate", "tts", "download", "sync"]
+
+class ManifestError(ValueError):
+    """Raised when a job manifest can't be read."""
+
+def _parse_job(entry: Any, location: str, defaults: Optional[Dict[str, Any]] = None) -> JobSpec:
+    """Build a JobSpec from one manifest entry, filling in options it doesn't set from defaults."""
+    if not isinstance(entry, dict):
+        raise ManifestError(f"{location}: job must be a mapping, got {type(entry).__name__}")
+    known = {field.name for field in fields(JobSpec)}
+    unknown = set(entry) - known
+    if unknown:
+        raise ManifestError(f"{location}: unknown job options: {', '.join(sorted(unknown))}")
+    try:
+        return JobSpec(**dict(defaults or {}, **entry))
+    except (TypeError, ValueError) as e:
+        raise ManifestError(f"{location}: {str(e)}")
+
+def load_manifest(manifest_path: str, defaults: Optional[Dict[str, Any]] = None) -> List[JobSpec]:
+    """
+    Reads the jobs of a manifest.
+    
+    JSONL manifests have one job object per line (blank lines and lines starting
+    with # are skipped). YAML manifests (requires PyYAML) contain a list of jobs
+    or a mapping with a "jobs" list.
+    
+    Args:
+        manifest_path (str): Path to a .jsonl, .yaml or .yml manifest
+        defaults (Optional[Dict[str, Any]]): Job options used where a job doesn't set them
+    
+    Returns:
+        List[JobSpec]: Jobs in manifest order
+    """
+    path = Path(manifest_path)
+    try:
+        content = path.read_text(encoding='utf-8')
+    except OSError as e:
+        raise ManifestError(f"Cannot read manifest {manifest_path}: {str(e)}")
+    
+    if path.suffix.lower() in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ManifestError("YAML manifests require PyYAML (pip install pyyaml), or use JSONL")
+        try:
+            data = yaml.safe_load(content) or []
+        except yaml.YAMLError as e:
+            raise ManifestError(f"Invalid YAML in {manifest_path}: {str(e)}")
+        if isinstance(data, dict):
+            data = data.get("jobs", [])
+        if not isinstance(data, list):
+            raise ManifestError(f"{manifest_path}: expected a list of jobs")
+        jobs = [_parse_job(entry, f"{manifest_path} job {i}", defaults) for i, entry in enumerate(data, 1)]
+    else:
+        jobs = []
+        for line_number, line in enumerate(content.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ManifestError(f"{manifest_path}:{line_number}: invalid JSON: {str(e)}")
+            jobs.append(_parse_job(entry, f"{manifest_path}:{line_number}", defaults))
+    
+    ids = [job.id for job in jobs]
+    duplicates = sorted({job_id for job_id in ids if ids.count(job_id) > 1})
+    if duplicates:
+        raise ManifestError(f"Duplicate job ids in manifest: {', '.join(duplicates)}")
+    return jobs
+
+_journal_locks: Dict[str, threading.Lock] = {}
+_journal_locks_guard = threading.Lock()
+
+def _journal_lock(path: Path) -> threading.Lock:
+    """Get the lock serializing updates of one journal file within the process."""
+    with _journal_locks_guard:
+        return _journal_locks.setdefault(str(path), threading.Lock())
+
+class StageJournal:
+    def __init__(self, job_dir: Path):
+        """
+        Initialize the stage journal of a job.
+        
+        The journal is a JSON file in the job directory, rewritten atomically
+        after every stage so it survives the process being killed. Stages of one
+        job may finish concurrently (e.g. the video download next to transcription),
+        so updates re-read the file and merge under a lock.
+        
+        Args:
+            job_dir (Path): Directory of the job
+        """
+        self.path = job_dir / "journal.json"
+        if self.path.exists():
+            self.data = json.loads(self.path.read_text(encoding='utf-8'))
+        else:
+            self.data = {"stages": {}}
+    
+    def _save(self):
+        """Write the journal atomically."""
+        partial_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.partial")
+        partial_path.write_text(json.dumps(self.data, indent=2), encoding='utf-8')
+        os.replace(partial_path, self.path)
+    
+    def _update(self, key: str, name: Optional[str], value: Any):
+        """Set data[key] (or data[key][name]) on top of the latest journal on disk and save."""
+        with _journal_lock(self.path):
+            data = json.loads(self.path.read_text(encoding='utf-8')) if self.path.exists() else {"stages": {}}
+            if name is None:
+                data[key] = value
+            else:
+                data.setdefault(key, {})[name] = value
+            # Replaced, not mutated, so readers in other threads never see a dict change size
+            self.data = data
+            self._save()
+    
+    def is_done(self, stage: str) -> bool:
+        """Check whether a stage finished and its output files still exist."""
+        entry = self.data["stages"].get(stage)
+        if not entry or entry.get("status") != "done":
+            return False
+        return all(Path(path).exists() for path in entry.get("outputs", {}).values())
+    
+    def outputs(self) -> Dict[str, str]:
+        """Get the outputs of all finished stages."""
+        merged = {}
+        for stage in STAGES:
+            entry = self.data["stages"].get(stage)
+            if entry and entry.get("status") == "done":
+                merged.update(entry.get("outputs", {}))
+        return merged
+    
+    def record_done(self, stage: str, outputs: Dict[str, str], duration: float):
+        """Mark a stage as finished with its output files."""
+        self._update("stages", stage, {
+            "status": "done",
+            "outputs": outputs,
+            "duration_s": round(duration, 3),
+            "finished_at": time.time()
+        })
+    
+    def record_failed(self, stage: str, error: str, duration: float):
+        """Mark a stage as failed."""
+        self._update("stages", stage, {
+            "status": "failed",
+            "error": error,
+            "duration_s": round(duration, 3),
+            "finished_at": time.time()
+        })
+    
+    def set_result(self, result: Dict[str, Any]):
+        """Store the final result of the job."""
+        self._update("result", None, result)
+
+class JobRunner:
+    def __init__(self,
+                 api_key: Optional[str],
+                 jobs_dir: Optional[str] = None,
+                 cache: Optional[ArtifactCache] = None,
+                 webhook_port: Optional[int] = None,
+                 webhook_url: Optional[str] = None,
+                 transcribe_timeout: Optional[float] = None,
+                 whisper_model: str = "small",
+                 segment_minutes: Optional[float] = None,
+                 concurrent_fragments: Optional[int] = None):
+        """
+        Initialize the job runner.
+        
+        Caches, the translation memory and loaded TTS models are shared by all
+        jobs of the runner. Stages of different jobs may run in parallel threads
+        (see scheduler.StageScheduler).
+        
+        Args:
+            api_key (Optional[str]): AssemblyAI API key (only needed for jobs using AssemblyAI)
+            jobs_dir (Optional[str]): Directory for job directories. If None, uses downloads/jobs in the project root
+            cache (Optional[ArtifactCache]): Artifact cache shared by the jobs
+            webhook_port (Optional[int]): Port of a local listener for transcript completion
+                webhooks. If None, transcripts are polled
+            webhook_url (Optional[str]): Public base URL of the webhook listener
+            transcribe_timeout (Optional[float]): Seconds to wait for a transcript before failing the job
+            whisper_model (str): Model size of the local whisper ASR backend
+            segment_minutes (Optional[float]): If set, AssemblyAI transcribes long audio as concurrent
+                segments of about this many minutes
+            concurrent_fragments (Optional[int]): Fragments fetched at the same time per download.
+                If None, video_downloader.DEFAULT_CONCURRENT_FRAGMENTS
+        """
+        if jobs_dir:
+            self.jobs_dir = Path(jobs_dir).absolute()
+        else:
+            # Get the project root directory (src's parent)
+            project_root = Path(__file__).parent.parent.parent
+            self.jobs_dir = project_root / "downloads" / "jobs"
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.api_key = api_key
+        self.cache = cache
+        self._translation_memory = None
+        self._synthesis_cache = None
+        self._tts_generators = {}
+        self._tts_locks = {}
+        self._transcription_client = None
+        self.webhook_port = webhook_port
+        self.webhook_url = webhook_url
+        self.transcribe_timeout = transcribe_timeout
+        self.whisper_model = whisper_model
+        self.segment_minutes = segment_minutes
+        self.concurrent_fragments = concurrent_fragments
+        self._asr_backends = {}
+        self._lock = threading.Lock()
+    
+    def job_dir(self, job: JobSpec) -> Path:
+        """Get (and create) the directory of a job."""
+        job_dir = self.jobs_dir / job.id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        return job_dir
+    
+    def _get_tts_generator(self, job: JobSpec):
+        """
+        Get a TTS generator for the job's model, loading it once per runner.
+        
+        Returns:
+            Tuple[TTSGenerator, threading.Lock]: Generator and the lock serializing its use
+        """
+        key = (job.tts_model, job.use_gpu)
+        with self._lock:
+            if key not in self._tts_generators:
+                from .tts_generator import TTSGenerator
+                from .tts_cache import SynthesisCache
+                if self._synthesis_cache is None:
+                    self._synthesis_cache = SynthesisCache()
+                self._tts_generators[key] = TTSGenerator(
+                    model_type=job.tts_model,
+                    use_gpu=job.use_gpu,
+                    cache=self.cache,
+                    synthesis_cache=self._synthesis_cache,
+                    num_workers=1 if job.use_gpu else None
+                )
+                self._tts_locks[key] = threading.Lock()
+            return self._tts_generators[key], self._tts_locks[key]
+    
+    def _download_options(self) -> Dict[str, Any]:
+        """Get the keyword arguments shared by all downloads."""
+        return {"concurrent_fragments": self.concurrent_fragments} if self.concurrent_fragments else {}
+    
+    def _stage_download_audio(self, job: JobSpec, job_dir: Path, inputs: Dict[str, str]) -> Dict[str, str]:
+        """Download the audio stream on its own."""
+        from .video_downloader import download_audio
+        return {"source_audio_path": download_audio(job.url, str(job_dir / "source_audio.m4a"), cache=self.cache,
+                                                    **self._download_options())}
+    
+    def _stage_download(self, job: JobSpec, job_dir: Path, inputs: Dict[str, str]) -> Dict[str, str]:
+        """Download the video (only its video stream in audio_first mode)."""
+        from .video_downloader import download_video
+        return {"video_path": download_video(
+            job.url,
+            str(job_dir / "video.mp4"),
+            cache=self.cache,
+            max_height=job.max_height,
+            video_only=job.download_mode == "audio_first",
+            **self._download_options()
+        )}
+    
+    def _stage_extract(self, job: JobSpec, job_dir: Path, inputs: Dict[str, str]) -> Dict[str, str]:
+        """Extract the audio track and its derivatives."""
+        from .audio_extractor import extract_audio_derivatives
+        source_path = inputs.get("source_audio_path") or inputs["video_path"]
+        extracted = extract_audio_derivatives(source_path, str(job_dir / "audio.wav"), cache=self.cache)
+        return {
+            "audio_path": extracted.audio_path,
+            "analysis_path": extracted.analysis_path,
+            "upload_path": extracted.upload_path,
+            "media_info_path": extracted.metadata_path
+        }
+    
+    def _get_asr_backend(self, name: str):
+        """Get the shared ASR backend of a job, creating it on first use."""
+        from .asr_backends import get_asr_backend
+        with self._lock:
+            if name not in self._asr_backends:
+                if name == "assemblyai":
+                    from .transcription_client import TranscriptionClient
+                    # One client (connection pool, poller thread, webhook listener) for all jobs
+                    self._transcription_client = TranscriptionClient(
+                        self.api_key,
+                        webhook_port=self.webhook_port,
+                        webhook_url=self.webhook_url
+                    )
+                    self._asr_backends[name] = get_asr_backend(
+                        name,
+                        self.api_key,
+                        client=self._transcription_client,
+                        timeout=self.transcribe_timeout,
+                        segment_seconds=self.segment_minutes * 60 if self.segment_minutes else None
+                    )
+                else:
+                    self._asr_backends[name] = get_asr_backend(name, model_size=self.whisper_model)
+            return self._asr_backends[name]
+    
+    def _stage_transcribe(self, job: JobSpec, job_dir: Path, inputs: Dict[str, str]) -> Dict[str, str]:
+        """Transcribe the audio and store the utterances as JSON."""
+        backend = self._get_asr_backend(job.asr_backend)
+        utterances = backend.transcribe(
+            inputs["audio_path"],
+            language_code=job.source_language,
+            cache=self.cache
+        )
+        transcript_path = job_dir / "utterances.json"
+        transcript_path.write_text(
+            json.dumps([asdict(utterance) for utterance in utterances], ensure_ascii=False),
+            encoding='utf-8'
+        )
+        return {"transcript_path": str(transcript_path)}
+    
+    def _stage_translate(self, job: JobSpec, job_dir: Path, inputs: Dict[str, str]) -> Dict[str, str]:
+        """Translate the transcript, per utterance in segments mode."""
+        from .translator import translate_text, translate_segments
+        from .translation_memory import TranslationMemory
+        with self._lock:
+            if self._translation_memory is None:
+                self._translation_memory = TranslationMemory()
+        
+        utterances = json.loads(Path(inputs["transcript_path"]).read_text(encoding='utf-8'))
+        if job.dub_mode == "segments":
+            from .dubbing_timeline import build_segments, save_segments
+            translations = translate_segments(
+                [utterance["text"] for utterance in utterances],
+                target_lang=job.target_language,
+                cache=self.cache,
+                source_lang=job.source_language,
+                memory=self._translation_memory
+            )
+            segments_path = save_segments(build_segments(utterances, translations), str(job_dir / "segments.json"))
+            return {"segments_path": segments_path}
+        
+        transcribed_text = " ".join(utterance["text"] for utterance in utterances)
+        translated_text = translate_text(
+            transcribed_text,
+            target_lang=job.target_language,
+            cache=self.cache,
+            source_lang=job.source_language,
+            memory=self._translation_memory
+        )
+        translation_path = job_dir / "translation.txt"
+        translation_path.write_text(translated_text, encoding='utf-8')
+        return {"translation_path": str(translation_path)}
+    
+    def _stage_tts(self, job: JobSpec, job_dir: Path, inputs: Dict[str, str]) -> Dict[str, str]:
+        """Generate the translated speech, placed on the original timeline in segments mode."""
+        tts, tts_lock = self._get_tts_generator(job)
+        speech_path = job_dir / "speech.wav"
+        if inputs.get("segments_path"):
+            from .dubbing_timeline import load_segments, render_timeline
+            from .media_info import media_duration
+            # The extracted audio is as long as the video
+            total_duration = media_duration(inputs["audio_path"])
+            with tts_lock:
+                render_timeline(load_segments(inputs["segments_path"]), tts, str(speech_path), total_duration,
+                                speaker=job.speaker)
+            return {"speech_path": str(speech_path)}
+        
+        translated_text = Path(inputs["translation_path"]).read_text(encoding='utf-8')
+        with tts_lock:
+            generated_path = tts.generate_speech(translated_text, job.speaker)
+        shutil.move(generated_path, speech_path)
+        return {"speech_path": str(speech_path)}
+    
+    def _stage_sync(self, job: JobSpec, job_dir: Path, inputs: Dict[str, str]) -> Dict[str, str]:
+        """Put the speech on the video."""
+        from .synchronizer import Synchronizer
+        # Journals of older runs have no media info, the video is probed then
+        media_info_path = inputs.get("media_info_path")
+        video_duration = None
+        if media_info_path:
+            source = json.loads(Path(media_info_path).read_text(encoding='utf-8'))["source"]
+            # Extracted from the audio stream alone, the duration isn't the video's
+            if source["video"]:
+                video_duration = source["duration"]
+        output_path = Synchronizer().sync_audio_with_video(
+            video_path=inputs["video_path"],
+            audio_path=inputs["speech_path"],
+            output_path=str(job_dir / f"{job.id}.mp4"),
+            video_duration=video_duration,
+            # Speech placed on the original timeline never needs the video retimed
+            mux_mode="copy" if inputs.get("segments_path") else "auto"
+        )
+        return {"output_path": output_path}
+    
+    def run_stage(self, job: JobSpec, stage: str, journal: Optional[StageJournal] = None) -> bool:
+        """
+        Runs one stage of a job unless the journal shows it already finished.
+        
+        Args:
+            job (JobSpec): Job to run
+            stage (str): Stage name (one of STAGES)
+            journal (Optional[StageJournal]): Journal of the job. If None, it is loaded from the job directory
+        
+        Returns:
+            bool: True if the stage ran, False if it was skipped as already finished
+        """
+        job_dir = self.job_dir(job)
+        journal = journal or StageJournal(job_dir)
+        if journal.is_done(stage):
+            print(f"[{job.id}] {stage}: already done, skipping")
+            return False
+        
+        print(f"[{job.id}] {stage}: starting")
+        start = time.perf_counter()
+        try:
+            outputs = getattr(self, f"_stage_{stage}")(job, job_dir, journal.outputs())
+        except Exception as e:
+            journal.record_failed(stage, str(e), time.perf_counter() - start)
+            raise
+        journal.record_done(stage, outputs, time.perf_counter() - start)
+        print(f"[{job.id}] {stage}: done in {time.perf_counter() - start:.1f}s")
+        return True
+    
+    def run_job(self, job: JobSpec) -> Dict[str, Any]:
+        """
+        Runs all stages of a job, resuming after the last finished stage.
+        
+        In audio_first mode the video stream downloads in a background thread
+        while the audio is extracted, transcribed, translated and synthesized.
+        
+        Args:
+            job (JobSpec): Job to run
+        
+        Returns:
+            Dict[str, Any]: Machine-readable result with job_id, status ("succeeded" or
+                "failed"), output, failed_stage, error, skipped_stages and duration_s
+        """
+        start = time.perf_counter()
+        journal = StageJournal(self.job_dir(job))
+        result = self.new_result(job)
+        
+        background = None
+        if job.download_mode == "audio_first":
+            background = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="video-download")
+            video_download = background.submit(self.run_stage, job, "download", journal)
+        try:
+            for stage in job_stages(job):
+                try:
+                    if background and stage == "download":
+                        ran = video_download.result()
+                    else:
+                        ran = self.run_stage(job, stage, journal)
+                    if not ran:
+                        result["skipped_stages"].append(stage)
+                except Exception as e:
+                    self.mark_failed(job, result, stage, e)
+                    break
+        finally:
+            if background:
+                # A running yt-dlp download can't be interrupted, a failed job waits for it
+                background.shutdown(wait=True)
+        
+        return self.finish_result(job, result, time.perf_counter() - start)
+    
+    @staticmethod
+    def new_result(job: JobSpec) -> Dict[str, Any]:
+        """Create the result record of a job, initially successful."""
+        return {"job_id": job.id, "url": job.url, "status": "succeeded", "output": None,
+                "failed_stage": None, "error": None, "skipped_stages": []}
+    
+    @staticmethod
+    def mark_failed(job: JobSpec, result: Dict[str, Any], stage: str, error: Exception):
+        """Report a failed stage and record it in the job's result."""
+        print(f"[{job.id}] {stage}: failed: {str(error)}")
+        traceback.print_exception(type(error), error, error.__traceback__)
+        result.update(status="failed", failed_stage=stage, error=str(error))
+    
+    def finish_result(self, job: JobSpec, result: Dict[str, Any], duration: float) -> Dict[str, Any]:
+        """Complete a job's result with its output and duration and store it in the journal."""
+        journal = StageJournal(self.job_dir(job))
+        result["output"] = journal.outputs().get("output_path") if result["status"] == "succeeded" else None
+        result["duration_s"] = round(duration, 3)
+        journal.set_result(result)
+        return result
+    
+    def results_path(self, results_path: Optional[str] = None) -> Path:
+        """Get the JSONL results file, by default results.jsonl in the jobs directory."""
+        return Path(results_path) if results_path else self.jobs_dir / "results.jsonl"
+    
+    @staticmethod
+    def append_result(results_path: Path, result: Dict[str, Any]):
+        """Append a job result to the JSONL results file."""
+        with open(results_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result) + "\n")
+    
+    def run_manifest(self,
+                     jobs: List[JobSpec],
+                     results_path: Optional[str] = None,
+                     fail_fast: bool = False) -> int:
+        """
+        Runs jobs one after another and appends each result as a JSON line.
+        
+        Args:
+            jobs (List[JobSpec]): Jobs to run
+            results_path (Optional[str]): JSONL results file. If None, uses results.jsonl in the jobs directory
+            fail_fast (bool): Stop after the first failed job
+        
+        Returns:
+            int: Exit code, EXIT_OK if all jobs succeeded, otherwise EXIT_JOB_FAILED
+        """
+        results_path = self.results_path(results_path)
+        succeeded = 0
+        failed = 0
+        
+        try:
+            for i, job in enumerate(jobs, 1):
+                print(f"\n=== Job {i}/{len(jobs)}: {job.id} ({job.url}) ===")
+                result = self.run_job(job)
+                self.append_result(results_path, result)
+                if result["status"] == "succeeded":
+                    succeeded += 1
+                else:
+                    failed += 1
+                    if fail_fast:
+                        break
+        finally:
+            self.close()
+        
+        print(f"\n{succeeded} of {len(jobs)} jobs succeeded, results in {results_path}")
+        return EXIT_JOB_FAILED if failed else EXIT_OK
+    
+    def close(self):
+        """Release the loaded TTS models, ASR workers and the transcription client."""
+        for tts in self._tts_generators.values():
+            tts.close()
+        self._tts_generators = {}
+        for backend in self._asr_backends.values():
+            backend.close()
+        self._asr_backends = {}
+        if self._transcription_client is not None:
+            self._transcription_client.close()
+            self._transcription_client = None
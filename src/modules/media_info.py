@@ -0,0 +1,198 @@
+"""
+Module for probing media files from their headers only.
+
+WAV files are read with the wave module; other containers with ffprobe (or,
+where ffprobe isn't installed, ffmpeg's input banner). Nothing is decoded.
+Results are memoized per file version, (path, mtime, size), so repeated
+duration checks on the same file cost one stat call.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import wave
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+# Channel counts of the layouts ffmpeg prints in its stream banner
+CHANNEL_LAYOUTS = {"mono": 1, "stereo": 2, "2.1": 3, "quad": 4, "4.0": 4, "5.0": 5, "5.1": 6, "6.1": 7, "7.1": 8}
+
+class MediaProbeError(RuntimeError):
+    """Raised when a media file can't be probed."""
+    pass
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """Container and stream details of a media file."""
+    duration: float                      # seconds
+    sample_rate: Optional[int] = None    # first audio stream
+    channels: Optional[int] = None
+    audio_codec: Optional[str] = None
+    fps: Optional[float] = None          # first video stream
+    video_codec: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    
+    @property
+    def has_audio(self) -> bool:
+        """Whether the file has an audio stream."""
+        return self.audio_codec is not None
+    
+    @property
+    def has_video(self) -> bool:
+        """Whether the file has a video stream."""
+        return self.video_codec is not None
+
+def parse_stream_info(ffmpeg_log: str) -> Dict[str, Any]:
+    """
+    Extracts the container duration and the first audio and video streams from ffmpeg's input banner.
+    
+    Args:
+        ffmpeg_log (str): stderr of an ffmpeg run at loglevel info
+    
+    Returns:
+        Dict[str, Any]: "duration" (seconds or None), "audio" and "video" stream details (or None)
+    """
+    info: Dict[str, Any] = {"duration": None, "audio": None, "video": None}
+    match = re.search(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)', ffmpeg_log)
+    if match:
+        hours, minutes, seconds = match.groups()
+        info["duration"] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    
+    # Only the input banner, the output banners list the same stream types
+    banner = ffmpeg_log.split("Output #0", 1)[0]
+    for line in banner.splitlines():
+        match = re.match(r'\s*Stream #0:\d+.*?: (Audio|Video): (\w+)(.*)', line)
+        if not match:
+            continue
+        kind, codec, details = match.groups()
+        if kind == "Audio" and info["audio"] is None:
+            rate = re.search(r'(\d+) Hz', details)
+            layout = re.search(r'Hz, ([^,]+)', details)
+            layout_name = layout.group(1).strip() if layout else None
+            channels = re.match(r'(\d+) channels', layout_name or "")
+            info["audio"] = {
+                "codec": codec,
+                "sample_rate": int(rate.group(1)) if rate else None,
+                "channel_layout": layout_name,
+                "channels": int(channels.group(1)) if channels else CHANNEL_LAYOUTS.get(
+                    (layout_name or "").split("(")[0]),
+            }
+        elif kind == "Video" and info["video"] is None:
+            size = re.search(r'(\d{2,5})x(\d{2,5})', details)
+            fps = re.search(r'([\d.]+) fps', details)
+            info["video"] = {
+                "codec": codec,
+                "width": int(size.group(1)) if size else None,
+                "height": int(size.group(2)) if size else None,
+                "fps": float(fps.group(1)) if fps else None,
+            }
+    return info
+
+def _probe_wav(path: str) -> Optional[MediaInfo]:
+    """Read the header of a PCM WAV file, None for other formats."""
+    try:
+        with wave.open(path, 'rb') as wav:
+            sample_rate = wav.getframerate()
+            return MediaInfo(
+                duration=wav.getnframes() / float(sample_rate),
+                sample_rate=sample_rate,
+                channels=wav.getnchannels(),
+                audio_codec="pcm_u8" if wav.getsampwidth() == 1 else f"pcm_s{wav.getsampwidth() * 8}le"
+            )
+    except (wave.Error, EOFError):
+        return None
+
+def _parse_rate(value: Optional[str]) -> Optional[float]:
+    """Convert an ffprobe rate like "30000/1001" to a number."""
+    if not value or value in ("0/0", "N/A"):
+        return None
+    numerator, _, denominator = value.partition('/')
+    try:
+        return float(numerator) / float(denominator or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+def _probe_ffprobe(path: str) -> MediaInfo:
+    """Read the container and stream headers with ffprobe."""
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-show_entries',
+        'format=duration:stream=codec_type,codec_name,sample_rate,channels,avg_frame_rate,r_frame_rate,'
+        'width,height,duration',
+        '-of', 'json',
+        path
+    ]
+    process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        raise MediaProbeError(f"Failed to probe {path}: {process.stderr.decode(errors='replace')[-1000:]}")
+    data = json.loads(process.stdout)
+    streams = data.get("streams", [])
+    audio = next((stream for stream in streams if stream.get("codec_type") == "audio"), {})
+    video = next((stream for stream in streams if stream.get("codec_type") == "video"), {})
+    
+    durations = [data.get("format", {}).get("duration")] + [stream.get("duration") for stream in streams]
+    durations = [float(value) for value in durations if value not in (None, "N/A")]
+    if not durations:
+        raise MediaProbeError(f"Failed to probe {path}: no duration in the headers")
+    return MediaInfo(
+        duration=durations[0],
+        sample_rate=int(audio["sample_rate"]) if audio.get("sample_rate") else None,
+        channels=audio.get("channels"),
+        audio_codec=audio.get("codec_name"),
+        fps=_parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate")),
+        video_codec=video.get("codec_name"),
+        width=video.get("width"),
+        height=video.get("height")
+    )
+
+def _probe_banner(path: str) -> MediaInfo:
+    """Read the container and stream headers from ffmpeg's input banner (without an output, nothing is decoded)."""
+    process = subprocess.run(['ffmpeg', '-hide_banner', '-nostdin', '-i', path],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    info = parse_stream_info(process.stderr.decode(errors='replace'))
+    if info["duration"] is None:
+        raise MediaProbeError(f"Failed to probe {path}: {process.stderr.decode(errors='replace')[-1000:]}")
+    audio, video = info["audio"] or {}, info["video"] or {}
+    return MediaInfo(
+        duration=info["duration"],
+        sample_rate=audio.get("sample_rate"),
+        channels=audio.get("channels"),
+        audio_codec=audio.get("codec"),
+        fps=video.get("fps"),
+        video_codec=video.get("codec"),
+        width=video.get("width"),
+        height=video.get("height")
+    )
+
+@lru_cache(maxsize=1024)
+def _probe_version(path: str, mtime_ns: int, size: int) -> MediaInfo:
+    """Probe one version of a file; the mtime and size only make up the cache key."""
+    info = _probe_wav(path)
+    if info is not None:
+        return info
+    if shutil.which('ffprobe'):
+        return _probe_ffprobe(path)
+    return _probe_banner(path)
+
+def probe_media(path: str) -> MediaInfo:
+    """
+    Gets the duration and stream details of a media file from its headers.
+    
+    Args:
+        path (str): Path to an audio or video file
+    
+    Returns:
+        MediaInfo: Duration, sample rate, channels, fps and codecs
+    """
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        raise MediaProbeError(f"Failed to probe {path}: {str(e)}")
+    return _probe_version(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+def media_duration(path: str) -> float:
+    """Get the duration of a media file in seconds from its headers."""
+    return probe_media(path).duration
@@ -2,72 +2,65 @@
 Module for adjusting speed of video and audio files to match durations.
 """
 from pathlib import Path
-from typing import Tuple, Optional
-import cv2
-from moviepy.editor import VideoFileClip, AudioFileClip
-from pydub import AudioSegment
-import numpy as np
-from .cleanup import TempCleanup
+from typing import Tuple, Optional, Union
+from .file_manager import FileManager
+from .ffmpeg_runner import run_ffmpeg, print_progress, has_filter, atempo_chain
+from .media_info import probe_media
+from .parallel_encoder import EncodeProfile, encode_retimed
+from .time_stretch import time_stretch_wav
 
 class MediaSpeedAdjuster:
     def __init__(self):
         """Initialize the MediaSpeedAdjuster."""
-        self.temp_cleanup = TempCleanup()
+        self.file_manager = FileManager()
 
     def get_video_duration(self, video_path: str) -> float:
-        """Get the duration of a video file in seconds."""
-        with VideoFileClip(video_path) as video:
-            return video.duration
+        """Get the duration of a video file in seconds (from its headers, memoized)."""
+        return probe_media(video_path).duration
 
     def get_audio_duration(self, audio_path: str) -> float:
-        """Get the duration of an audio file in seconds."""
-        audio = AudioSegment.from_wav(audio_path)
-        return len(audio) / 1000.0
+        """Get the duration of an audio file in seconds (from its headers, memoized)."""
+        return probe_media(audio_path).duration
 
     def adjust_video_speed(self, 
                          video_path: str, 
                          target_duration: float,
-                         preserve_pitch: bool = True) -> str:
+                         preserve_pitch: bool = True,
+                         encode_profile: Union[str, EncodeProfile] = "balanced",
+                         workers: Optional[int] = None,
+                         output_path: Optional[str] = None) -> str:
         """
         Adjust video speed to match target duration.
         
+        The video is cut at keyframes and the segments are retimed and encoded
+        by parallel ffmpeg processes (see parallel_encoder).
+        
         Args:
             video_path (str): Path to the video file
             target_duration (float): Target duration in seconds
-            preserve_pitch (bool): Whether to preserve audio pitch when adjusting speed
+            preserve_pitch (bool): Unused, the adjusted video has no audio track
+            encode_profile (Union[str, EncodeProfile]): "fast", "balanced", "quality" or custom encoder settings
+            workers (Optional[int]): Concurrent encoder processes. If None, one per two CPUs
+            output_path (Optional[str]): Where to save the adjusted video. If None, a new file
+                in the temp directory
             
         Returns:
-            str: Path to the adjusted video file
+            str: Path to the adjusted video file (video stream only)
         """
         try:
-            # Load the video
-            video = VideoFileClip(video_path)
-            current_duration = video.duration
-            
-            # Calculate the speed factor
-            speed_factor = current_duration / target_duration
-            
-            # Create adjusted video
-            adjusted_video = video.speedx(factor=speed_factor)
-            
-            # Create output path in temp directory
-            output_filename = f"adjusted_{Path(video_path).name}"
-            output_path = str(self.temp_cleanup.get_temp_path(output_filename))
-            
-            # Write the adjusted video
-            adjusted_video.write_videofile(
-                output_path, 
-                codec='libx264',
-                audio=False,  # Don't include audio
-                preset='medium',
-                fps=video.fps
-            )
+            current_duration = self.get_video_duration(video_path)
             
-            # Clean up
-            video.close()
-            adjusted_video.close()
+            if output_path is None:
+                # Unique name in the temp directory, concurrent jobs retime files of the same name
+                output_path = str(self.file_manager.get_temp_path(f"adjusted_{Path(video_path).stem}", ".mp4"))
             
-            return output_path
+            return encode_retimed(
+                video_path,
+                output_path,
+                time_scale=target_duration / current_duration,
+                profile=encode_profile,
+                workers=workers
+            )
             
         except Exception as e:
             raise RuntimeError(f"Failed to adjust video speed: {str(e)}")
@@ -88,47 +81,81 @@ class MediaSpeedAdjuster:
             str: Path to the adjusted audio file
         """
         try:
-            # Load the audio
-            audio = AudioSegment.from_wav(audio_path)
-            current_duration = len(audio) / 1000.0  # Convert to seconds
+            info = probe_media(audio_path)
             
             # Calculate the speed factor
-            speed_factor = current_duration / target_duration
+            speed_factor = info.duration / target_duration
+            
+            # Unique name in the temp directory, concurrent jobs retime files of the same name
+            output_path = str(self.file_manager.get_temp_path(f"adjusted_{Path(audio_path).stem}", ".wav"))
             
             if preserve_pitch:
-                # Use frame rate adjustment for pitch-preserved speed change
-                new_frame_rate = int(audio.frame_rate * speed_factor)
-                adjusted_audio = audio._spawn(audio.raw_data, overrides={
-                    "frame_rate": new_frame_rate
-                }).set_frame_rate(audio.frame_rate)
+                # WSOLA time-stretch, streamed block by block
+                time_stretch_wav(audio_path, output_path, speed_factor)
             else:
-                # Simple resampling for non-pitch-preserved speed change
-                samples = np.array(audio.get_array_of_samples())
-                adjusted_samples = np.interp(
-                    np.linspace(0, len(samples), int(len(samples) / speed_factor)),
-                    np.arange(len(samples)),
-                    samples
-                ).astype(np.int16)
-                adjusted_audio = audio._spawn(adjusted_samples.tobytes())
-            
-            # Create output path in temp directory
-            output_filename = f"adjusted_{Path(audio_path).name}"
-            output_path = str(self.temp_cleanup.get_temp_path(output_filename))
-            
-            # Export the adjusted audio
-            adjusted_audio.export(output_path, format="wav")
+                # Resample: playing at a higher rate changes tempo and pitch together
+                cmd = [
+                    'ffmpeg',
+                    '-i', audio_path,
+                    '-af', f"asetrate={info.sample_rate * speed_factor:.6f},aresample={info.sample_rate}",
+                    '-c:a', 'pcm_s16le',
+                    '-y',
+                    output_path
+                ]
+                run_ffmpeg(cmd, total_duration=target_duration)
             
             return output_path
             
         except Exception as e:
             raise RuntimeError(f"Failed to adjust audio speed: {str(e)}")
 
+    def _plan_harmonization(self,
+                            video_path: str,
+                            audio_path: str,
+                            target_duration: Optional[float],
+                            max_adjustment_ratio: float) -> Tuple[float, float, float]:
+        """
+        Get the current durations and the target duration, checking the speed change.
+        
+        Args:
+            video_path (str): Path to the video file
+            audio_path (str): Path to the audio file
+            target_duration (Optional[float]): Target duration in seconds. If None, uses the average duration
+            max_adjustment_ratio (float): Maximum allowed speed change ratio
+            
+        Returns:
+            Tuple[float, float, float]: Video, audio and target duration in seconds
+        """
+        # Get current durations
+        video_duration = self.get_video_duration(video_path)
+        audio_duration = self.get_audio_duration(audio_path)
+        
+        # Calculate target duration if not provided
+        if target_duration is None:
+            target_duration = (video_duration + audio_duration) / 2
+        
+        print(f"Original durations - Video: {video_duration:.2f}s, Audio: {audio_duration:.2f}s")
+        print(f"Target duration: {target_duration:.2f}s")
+        
+        # Check if adjustment is within acceptable range
+        video_ratio = max(video_duration / target_duration, target_duration / video_duration)
+        audio_ratio = max(audio_duration / target_duration, target_duration / audio_duration)
+        
+        if max(video_ratio, audio_ratio) > max_adjustment_ratio:
+            raise ValueError(
+                f"Required speed adjustment ({max(video_ratio, audio_ratio):.2f}x) "
+                f"exceeds maximum allowed ratio ({max_adjustment_ratio}x)"
+            )
+        
+        return video_duration, audio_duration, target_duration
+
     def harmonize_durations(self, 
                           video_path: str, 
                           audio_path: str,
                           target_duration: Optional[float] = None,
                           max_adjustment_ratio: float = 1.5,
-                          preserve_pitch: bool = True) -> Tuple[str, str]:
+                          preserve_pitch: bool = True,
+                          encode_profile: Union[str, EncodeProfile] = "balanced") -> Tuple[str, str]:
         """
         Adjust video and audio speeds to meet at a target duration.
         
@@ -138,37 +165,22 @@ class MediaSpeedAdjuster:
             target_duration (Optional[float]): Target duration in seconds. If None, uses the average duration
             max_adjustment_ratio (float): Maximum allowed speed change ratio
             preserve_pitch (bool): Whether to preserve pitch when adjusting speed
+            encode_profile (Union[str, EncodeProfile]): Encoder settings of the video re-encode
             
         Returns:
             Tuple[str, str]: Paths to the adjusted (video, audio) files
         """
         try:
-            # Get current durations
-            video_duration = self.get_video_duration(video_path)
-            audio_duration = self.get_audio_duration(audio_path)
-            
-            # Calculate target duration if not provided
-            if target_duration is None:
-                target_duration = (video_duration + audio_duration) / 2
-            
-            print(f"Original durations - Video: {video_duration:.2f}s, Audio: {audio_duration:.2f}s")
-            print(f"Target duration: {target_duration:.2f}s")
-            
-            # Check if adjustment is within acceptable range
-            video_ratio = max(video_duration / target_duration, target_duration / video_duration)
-            audio_ratio = max(audio_duration / target_duration, target_duration / audio_duration)
-            
-            if max(video_ratio, audio_ratio) > max_adjustment_ratio:
-                raise ValueError(
-                    f"Required speed adjustment ({max(video_ratio, audio_ratio):.2f}x) "
-                    f"exceeds maximum allowed ratio ({max_adjustment_ratio}x)"
-                )
+            video_duration, audio_duration, target_duration = self._plan_harmonization(
+                video_path, audio_path, target_duration, max_adjustment_ratio
+            )
             
             # Adjust both video and audio to the target duration
             adjusted_video_path = self.adjust_video_speed(
                 video_path, 
                 target_duration,
-                preserve_pitch=preserve_pitch
+                preserve_pitch=preserve_pitch,
+                encode_profile=encode_profile
             )
             
             adjusted_audio_path = self.adjust_audio_speed(
@@ -187,3 +199,106 @@ class MediaSpeedAdjuster:
             
         except Exception as e:
             raise RuntimeError(f"Failed to harmonize durations: {str(e)}")
+
+    def build_harmonize_filtergraph(self,
+                                    video_duration: float,
+                                    audio_duration: float,
+                                    target_duration: float,
+                                    sample_rate: int,
+                                    preserve_pitch: bool = True) -> str:
+        """
+        Build an ffmpeg filtergraph that retimes video and audio to the target duration.
+        
+        Args:
+            video_duration (float): Current video duration in seconds
+            audio_duration (float): Current audio duration in seconds
+            target_duration (float): Target duration in seconds
+            sample_rate (int): Sample rate of the audio input
+            preserve_pitch (bool): Whether to preserve pitch when adjusting speed
+            
+        Returns:
+            str: Filtergraph with [v] and [a] output pads
+        """
+        video_filter = f"[0:v]setpts=PTS*{target_duration / video_duration:.8f}[v]"
+        
+        tempo = audio_duration / target_duration
+        if abs(tempo - 1.0) < 1e-4:
+            audio_filter = "anull"
+        elif preserve_pitch and has_filter("rubberband"):
+            audio_filter = f"rubberband=tempo={tempo:.6f}"
+        elif preserve_pitch:
+            audio_filter = atempo_chain(tempo)
+        else:
+            # Resample like a tape speed change, shifting the pitch along with the tempo
+            audio_filter = f"asetrate={sample_rate * tempo:.3f},aresample={sample_rate}"
+        
+        return f"{video_filter};[1:a]{audio_filter}[a]"
+
+    def harmonize_single_pass(self,
+                              video_path: str,
+                              audio_path: str,
+                              output_path: str,
+                              target_duration: Optional[float] = None,
+                              max_adjustment_ratio: float = 1.5,
+                              preserve_pitch: bool = True,
+                              preset: str = 'medium') -> str:
+        """
+        Retime video and audio to a target duration and mux them in one ffmpeg pass.
+        
+        Unlike harmonize_durations, the video is decoded and encoded only once
+        and no intermediate files are written.
+        
+        Args:
+            video_path (str): Path to the video file
+            audio_path (str): Path to the audio file (WAV)
+            output_path (str): Path where the final video will be saved
+            target_duration (Optional[float]): Target duration in seconds. If None, uses the average duration
+            max_adjustment_ratio (float): Maximum allowed speed change ratio
+            preserve_pitch (bool): Whether to preserve pitch when adjusting speed
+            preset (str): libx264 encoding preset
+            
+        Returns:
+            str: Path to the final video file
+        """
+        try:
+            video_duration, audio_duration, target_duration = self._plan_harmonization(
+                video_path, audio_path, target_duration, max_adjustment_ratio
+            )
+            
+            sample_rate = probe_media(audio_path).sample_rate
+            
+            filtergraph = self.build_harmonize_filtergraph(
+                video_duration,
+                audio_duration,
+                target_duration,
+                sample_rate,
+                preserve_pitch=preserve_pitch
+            )
+            
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            cmd = [
+                'ffmpeg',
+                '-i', video_path,
+                '-i', audio_path,
+                '-filter_complex', filtergraph,
+                '-map', '[v]',
+                '-map', '[a]',
+                '-c:v', 'libx264',
+                '-preset', preset,
+                '-c:a', 'aac',
+                '-b:a', '192k',
+                '-y',
+                output_path
+            ]
+            
+            final_duration = run_ffmpeg(
+                cmd,
+                total_duration=target_duration,
+                on_progress=print_progress("Encoding")
+            )
+            print(f"\nFinal duration: {final_duration:.2f}s")
+            
+            return output_path
+            
+        except Exception as e:
+            raise RuntimeError(f"Failed to harmonize durations: {str(e)}")
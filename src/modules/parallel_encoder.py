@@ -0,0 +1,182 @@
+"""
+Module for re-encoding (and retiming) video in parallel, one keyframe-aligned segment per process.
+
+The source is cut at keyframes with a stream copy, so no frame is decoded
+twice and every segment decodes on its own. The segments are retimed and
+encoded by concurrent ffmpeg processes and joined with the concat demuxer,
+again without re-encoding: each encoded segment starts with a keyframe.
+"""
+import concurrent.futures
+import os
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Union
+from .ffmpeg_runner import FFmpegError
+from .media_info import probe_media
+
+# Segments shorter than this aren't worth an extra ffmpeg process
+MIN_SEGMENT_SECONDS = 2.0
+
+@dataclass(frozen=True)
+class EncodeProfile:
+    """Video encoder settings of a re-encode."""
+    preset: str = "medium"
+    crf: int = 23
+    codec: str = "libx264"
+    pix_fmt: str = "yuv420p"
+    
+    def args(self) -> List[str]:
+        """Get the ffmpeg output options of the profile."""
+        return ['-c:v', self.codec, '-preset', self.preset, '-crf', str(self.crf), '-pix_fmt', self.pix_fmt]
+
+ENCODE_PROFILES = {
+    "fast": EncodeProfile(preset="veryfast", crf=23),
+    "balanced": EncodeProfile(preset="medium", crf=23),
+    "quality": EncodeProfile(preset="slow", crf=20),
+}
+
+def get_profile(profile: Union[str, EncodeProfile]) -> EncodeProfile:
+    """Get an encode profile by name ("fast", "balanced", "quality") or pass one through."""
+    if isinstance(profile, EncodeProfile):
+        return profile
+    if profile not in ENCODE_PROFILES:
+        raise ValueError(f"Unknown encode profile: {profile} (choose from {', '.join(ENCODE_PROFILES)})")
+    return ENCODE_PROFILES[profile]
+
+def _run(cmd: List[str], what: str):
+    """Run an ffmpeg command, raising FFmpegError with the end of its log on failure."""
+    process = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        raise FFmpegError(f"Failed to {what}: {process.stderr.decode(errors='replace')[-1000:]}")
+
+def split_at_keyframes(video_path: str, output_dir: str, segment_seconds: float) -> List[str]:
+    """
+    Cuts the video stream into segments at keyframes, without re-encoding.
+    
+    Args:
+        video_path (str): Path to the video file
+        output_dir (str): Directory receiving the segments
+        segment_seconds (float): Target segment length; each cut is made at the first
+            keyframe after it, so segments are longer for sparse keyframes
+    
+    Returns:
+        List[str]: Paths of the segments in order
+    """
+    list_path = Path(output_dir) / "segments.txt"
+    _run([
+        'ffmpeg', '-hide_banner', '-nostdin',
+        '-i', video_path,
+        '-map', '0:v:0', '-c', 'copy',
+        '-f', 'segment',
+        '-segment_time', f"{segment_seconds:.3f}",
+        '-segment_format', 'matroska',
+        '-segment_list', str(list_path),
+        '-reset_timestamps', '1',
+        '-y', str(Path(output_dir) / "source%05d.mkv")
+    ], "split the video at keyframes")
+    names = list_path.read_text(encoding='utf-8').split()
+    return [str(Path(output_dir) / name) for name in names]
+
+def encode_segment(segment_path: str,
+                   output_path: str,
+                   time_scale: float,
+                   profile: EncodeProfile,
+                   threads: int) -> str:
+    """
+    Retimes and encodes one segment.
+    
+    Args:
+        segment_path (str): Path of the source segment
+        output_path (str): Path of the encoded segment
+        time_scale (float): Factor applied to timestamps (> 1 slows down)
+        profile (EncodeProfile): Encoder settings
+        threads (int): Encoder threads
+    
+    Returns:
+        str: The output path
+    """
+    _run([
+        'ffmpeg', '-hide_banner', '-nostdin',
+        '-i', segment_path,
+        '-vf', f"setpts=(PTS-STARTPTS)*{time_scale:.8f}",
+        *profile.args(),
+        '-threads', str(threads),
+        '-an',
+        '-y', output_path
+    ], f"encode {Path(segment_path).name}")
+    return output_path
+
+def concat_segments(segment_paths: List[str], output_path: str) -> str:
+    """
+    Joins encoded segments with the concat demuxer, copying the streams.
+    
+    Args:
+        segment_paths (List[str]): Encoded segments in order
+        output_path (str): Path of the joined video
+    
+    Returns:
+        str: The output path
+    """
+    list_path = Path(segment_paths[0]).parent / "concat.txt"
+    list_path.write_text(
+        "".join(f"file '{Path(path).absolute()}'\n" for path in segment_paths),
+        encoding='utf-8'
+    )
+    _run([
+        'ffmpeg', '-hide_banner', '-nostdin',
+        '-f', 'concat', '-safe', '0',
+        '-i', str(list_path),
+        '-c', 'copy',
+        '-movflags', '+faststart',
+        '-y', output_path
+    ], "concatenate the encoded segments")
+    return output_path
+
+def encode_retimed(video_path: str,
+                   output_path: str,
+                   time_scale: float = 1.0,
+                   profile: Union[str, EncodeProfile] = "balanced",
+                   workers: Optional[int] = None,
+                   segment_seconds: Optional[float] = None) -> str:
+    """
+    Re-encodes the video stream of a file, retimed by time_scale, in parallel segments.
+    
+    Args:
+        video_path (str): Path to the video file
+        output_path (str): Path of the encoded video (video stream only)
+        time_scale (float): Factor applied to the duration (> 1 slows down)
+        profile (Union[str, EncodeProfile]): Encode profile or its name
+        workers (Optional[int]): Concurrent encoder processes. If None, one per two CPUs
+        segment_seconds (Optional[float]): Source length per segment. If None, about two
+            segments per worker
+    
+    Returns:
+        str: The output path
+    """
+    profile = get_profile(profile)
+    cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    workers = workers or max(1, cpu_count // 2)
+    # Split the cores among the encoders, x264 scales poorly past a few threads per frame row
+    threads = max(1, cpu_count // workers)
+    if segment_seconds is None:
+        duration = probe_media(video_path).duration
+        segment_seconds = max(MIN_SEGMENT_SECONDS, duration / (2 * workers))
+    
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=str(Path(output_path).parent), prefix=".segments-") as tmp:
+        segments = split_at_keyframes(video_path, tmp, segment_seconds)
+        print(f"Encoding {len(segments)} segments with {workers} workers "
+              f"({profile.codec} {profile.preset}, CRF {profile.crf})")
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            # Each task only waits on its ffmpeg process, the encoding runs in parallel processes
+            futures = [
+                executor.submit(encode_segment, segment, str(Path(tmp) / f"encoded{i:05d}.mp4"),
+                                time_scale, profile, threads)
+                for i, segment in enumerate(segments)
+            ]
+            encoded = [future.result() for future in futures]
+        
+        return concat_segments(encoded, output_path)
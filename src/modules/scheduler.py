@@ -0,0 +1,349 @@
+"""
+Module for running the stages of many jobs concurrently.
+
+Every stage belongs to a resource class (network I/O, ffmpeg encoding, TTS
+model, memory-heavy Bark). Each class has its own concurrency limit, and a
+memory admission check keeps a stage from starting when its estimated memory
+would push the machine past a ceiling. Stages of different jobs overlap, so
+downloads and transcription polling run while another job is in TTS.
+"""
+import os
+import time
+import concurrent.futures
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from .job_runner import JobRunner, JobSpec, EXIT_OK, EXIT_JOB_FAILED, job_stages
+
+# Stages each stage needs finished before it can start (audio_first jobs, see stage_dependencies)
+STAGE_DEPENDENCIES = {
+    "download_audio": [],
+    "download": [],
+    "extract": ["download_audio"],
+    "transcribe": ["extract"],
+    "translate": ["transcribe"],
+    "tts": ["translate"],
+    "sync": ["download", "tts"],
+}
+
+STAGE_RESOURCE_CLASSES = {
+    "download_audio": "network",
+    "download": "network",
+    "extract": "ffmpeg",
+    "transcribe": "network",
+    "translate": "network",
+    "tts": "tts",
+    "sync": "ffmpeg",
+}
+
+DEFAULT_LIMITS = {
+    "network": 4,
+    "ffmpeg": max(1, (os.cpu_count() or 2) // 2),
+    "tts": 1,
+    "bark": 1,
+    "asr": 1,
+}
+
+# Rough peak memory of one running stage per class, used for admission
+DEFAULT_MEMORY_ESTIMATES = {
+    "network": 64 * 1024 ** 2,
+    "ffmpeg": 512 * 1024 ** 2,
+    "tts": 2 * 1024 ** 3,
+    "bark": 8 * 1024 ** 3,
+    "asr": 4 * 1024 ** 3,
+}
+
+def stage_resource_class(job: JobSpec, stage: str) -> str:
+    """Get the resource class of a job's stage (Bark TTS is memory-heavy, local ASR CPU-heavy)."""
+    if stage == "tts" and job.tts_model == "bark":
+        return "bark"
+    if stage == "transcribe" and job.asr_backend == "whisper":
+        return "asr"
+    return STAGE_RESOURCE_CLASSES[stage]
+
+def stage_dependencies(job: JobSpec, stage: str) -> List[str]:
+    """Get the stages a job's stage waits for (muxed downloads extract from the video)."""
+    if stage == "extract" and job.download_mode == "muxed":
+        return ["download"]
+    return STAGE_DEPENDENCIES[stage]
+
+def read_meminfo() -> Optional[Dict[str, int]]:
+    """
+    Reads system memory figures from /proc/meminfo.
+    
+    Returns:
+        Optional[Dict[str, int]]: Values in bytes by field name, or None if unavailable
+    """
+    try:
+        with open('/proc/meminfo') as f:
+            return {
+                line.split(':')[0]: int(line.split()[1]) * 1024
+                for line in f
+                if line.split()[-1] == 'kB'
+            }
+    except OSError:
+        return None
+
+def process_rss() -> Optional[int]:
+    """Get the resident set size of this process in bytes from /proc, or None if unavailable."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+class MemoryAdmission:
+    def __init__(self,
+                 memory_ceiling: Optional[int] = None,
+                 estimates: Optional[Dict[str, int]] = None,
+                 ramp_seconds: float = 60.0):
+        """
+        Initialize the memory admission controller.
+        
+        A stage is admitted when the memory in use, plus the estimates of stages
+        started within the last ramp_seconds (which may not have reached their
+        peak yet), plus its own estimate stays below the ceiling.
+        
+        Args:
+            memory_ceiling (Optional[int]): Maximum memory in use in bytes. If None, 90% of total memory
+            estimates (Optional[Dict[str, int]]): Peak memory per resource class in bytes
+            ramp_seconds (float): How long a started stage's estimate stays reserved
+        """
+        meminfo = read_meminfo()
+        self.enabled = meminfo is not None and 'MemAvailable' in meminfo
+        if memory_ceiling is None and self.enabled:
+            memory_ceiling = int(meminfo['MemTotal'] * 0.9)
+        self.memory_ceiling = memory_ceiling
+        self.estimates = dict(DEFAULT_MEMORY_ESTIMATES, **(estimates or {}))
+        self.ramp_seconds = ramp_seconds
+    
+    def memory_in_use(self) -> Optional[int]:
+        """Get the memory currently in use on the machine in bytes."""
+        meminfo = read_meminfo()
+        if not meminfo or 'MemAvailable' not in meminfo:
+            return None
+        return meminfo['MemTotal'] - meminfo['MemAvailable']
+    
+    def admits(self, resource_class: str, running: List["StageTask"]) -> bool:
+        """
+        Checks whether a stage of a resource class may start now.
+        
+        Args:
+            resource_class (str): Resource class of the stage
+            running (List[StageTask]): Stages currently running
+        
+        Returns:
+            bool: True if the stage fits below the memory ceiling
+        """
+        if not self.enabled or self.memory_ceiling is None:
+            return True
+        in_use = self.memory_in_use()
+        if in_use is None:
+            return True
+        
+        now = time.monotonic()
+        ramping = sum(
+            self.estimates.get(task.resource_class, 0)
+            for task in running
+            if now - task.started_at < self.ramp_seconds
+        )
+        return in_use + ramping + self.estimates.get(resource_class, 0) <= self.memory_ceiling
+
+@dataclass
+class StageTask:
+    """One stage of one job in the scheduler's graph."""
+    job_index: int
+    job: JobSpec
+    stage: str
+    resource_class: str
+    dependencies: List[str]
+    state: str = "pending"  # pending, running, done, failed, cancelled
+    started_at: float = 0.0
+
+@dataclass
+class _JobState:
+    """Progress of one job in the scheduler."""
+    result: Dict[str, Any]
+    started_at: Optional[float] = None
+    tasks: Dict[str, StageTask] = field(default_factory=dict)
+
+class StageScheduler:
+    def __init__(self,
+                 runner: JobRunner,
+                 limits: Optional[Dict[str, int]] = None,
+                 memory_ceiling: Optional[int] = None,
+                 memory_estimates: Optional[Dict[str, int]] = None,
+                 poll_interval: float = 1.0):
+        """
+        Initialize the stage scheduler.
+        
+        Args:
+            runner (JobRunner): Runner that executes the stages
+            limits (Optional[Dict[str, int]]): Concurrent stages per resource class, merged over DEFAULT_LIMITS
+            memory_ceiling (Optional[int]): Memory ceiling in bytes for admission. If None, 90% of total memory
+            memory_estimates (Optional[Dict[str, int]]): Peak memory per resource class in bytes
+            poll_interval (float): Seconds between admission retries while stages are held back
+        """
+        self.runner = runner
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        unknown = set(self.limits) - set(DEFAULT_LIMITS)
+        if unknown:
+            raise ValueError(f"Unknown resource classes: {', '.join(sorted(unknown))}")
+        if any(limit < 1 for limit in self.limits.values()):
+            raise ValueError("Resource class limits must be at least 1")
+        self.admission = MemoryAdmission(memory_ceiling, memory_estimates)
+        self.poll_interval = poll_interval
+        self.busy_seconds = {resource_class: 0.0 for resource_class in self.limits}
+    
+    def _ready_tasks(self, jobs: List[_JobState]) -> List[StageTask]:
+        """Get pending tasks whose dependencies are done, earliest jobs first."""
+        ready = []
+        for job_state in jobs:
+            for task in job_state.tasks.values():
+                if task.state == "pending" and all(
+                    job_state.tasks[dependency].state == "done" for dependency in task.dependencies
+                ):
+                    ready.append(task)
+        return ready
+    
+    def _run_task(self, task: StageTask) -> bool:
+        """Run one stage in a worker thread."""
+        return self.runner.run_stage(task.job, task.stage)
+    
+    def run_manifest(self,
+                     jobs: List[JobSpec],
+                     results_path: Optional[str] = None,
+                     fail_fast: bool = False) -> int:
+        """
+        Runs the jobs with stages of different jobs overlapping.
+        
+        Args:
+            jobs (List[JobSpec]): Jobs to run
+            results_path (Optional[str]): JSONL results file. If None, uses results.jsonl in the jobs directory
+            fail_fast (bool): Start no new stages after the first failed job
+        
+        Returns:
+            int: Exit code, EXIT_OK if all jobs succeeded, otherwise EXIT_JOB_FAILED
+        """
+        results_path = self.runner.results_path(results_path)
+        job_states = []
+        for index, job in enumerate(jobs):
+            job_state = _JobState(result=self.runner.new_result(job))
+            for stage in job_stages(job):
+                job_state.tasks[stage] = StageTask(
+                    job_index=index,
+                    job=job,
+                    stage=stage,
+                    resource_class=stage_resource_class(job, stage),
+                    dependencies=stage_dependencies(job, stage)
+                )
+            job_states.append(job_state)
+        
+        print(f"Scheduling {len(jobs)} jobs with limits "
+              + ", ".join(f"{name}={limit}" for name, limit in self.limits.items())
+              + (f", memory ceiling {self.admission.memory_ceiling / 1024 ** 3:.1f} GB"
+                 if self.admission.enabled else ""))
+        
+        start = time.perf_counter()
+        running: Dict[concurrent.futures.Future, StageTask] = {}
+        finished_jobs = 0
+        succeeded = 0
+        stop = False
+        
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=sum(self.limits.values()))
+        try:
+            while finished_jobs < len(job_states):
+                if not stop:
+                    self._dispatch(executor, job_states, running)
+                if not running:
+                    # Nothing running and nothing startable: only cancelled tasks are left
+                    break
+                
+                done, _ = concurrent.futures.wait(
+                    running, timeout=self.poll_interval, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    task = running.pop(future)
+                    job_state = job_states[task.job_index]
+                    self.busy_seconds[task.resource_class] += time.monotonic() - task.started_at
+                    try:
+                        if not future.result():
+                            job_state.result["skipped_stages"].append(task.stage)
+                        task.state = "done"
+                    except Exception as e:
+                        task.state = "failed"
+                        self.runner.mark_failed(task.job, job_state.result, task.stage, e)
+                        for other in job_state.tasks.values():
+                            if other.state == "pending":
+                                other.state = "cancelled"
+                        stop = stop or fail_fast
+                    
+                    if all(other.state in ("done", "failed", "cancelled") for other in job_state.tasks.values()):
+                        result = self.runner.finish_result(
+                            task.job, job_state.result, time.perf_counter() - job_state.started_at
+                        )
+                        self.runner.append_result(results_path, result)
+                        finished_jobs += 1
+                        if result["status"] == "succeeded":
+                            succeeded += 1
+                        self._report_progress(finished_jobs, len(job_states), succeeded, start)
+            
+            # After a fail-fast stop, jobs that already started are reported as cancelled
+            for job_state in job_states:
+                pending = [task for task in job_state.tasks.values() if task.state == "pending"]
+                if job_state.started_at is not None and pending:
+                    job_state.result.update(status="failed", failed_stage=pending[0].stage,
+                                            error="Cancelled after an earlier job failed")
+                    result = self.runner.finish_result(
+                        pending[0].job, job_state.result, time.perf_counter() - job_state.started_at
+                    )
+                    self.runner.append_result(results_path, result)
+        finally:
+            executor.shutdown(wait=True)
+            self.runner.close()
+        
+        self._report_summary(len(jobs), succeeded, start, results_path)
+        return EXIT_OK if succeeded == len(jobs) else EXIT_JOB_FAILED
+    
+    def _dispatch(self,
+                  executor: concurrent.futures.ThreadPoolExecutor,
+                  job_states: List[_JobState],
+                  running: Dict[concurrent.futures.Future, StageTask]):
+        """Start every ready task that fits its class limit and the memory ceiling."""
+        active = {resource_class: 0 for resource_class in self.limits}
+        for task in running.values():
+            active[task.resource_class] += 1
+        
+        for task in self._ready_tasks(job_states):
+            if active[task.resource_class] >= self.limits[task.resource_class]:
+                continue
+            # With nothing running the stage always starts, otherwise the batch could stall
+            if running and not self.admission.admits(task.resource_class, list(running.values())):
+                continue
+            
+            job_state = job_states[task.job_index]
+            if job_state.started_at is None:
+                job_state.started_at = time.perf_counter()
+            task.state = "running"
+            task.started_at = time.monotonic()
+            running[executor.submit(self._run_task, task)] = task
+            active[task.resource_class] += 1
+    
+    def _report_progress(self, finished: int, total: int, succeeded: int, start: float):
+        """Print the number of finished jobs and the throughput so far."""
+        elapsed = time.perf_counter() - start
+        rss = process_rss()
+        print(f"Progress: {finished}/{total} jobs finished, {succeeded / elapsed * 3600:.1f} videos/hour"
+              + (f", scheduler RSS {rss / 1024 ** 2:.0f} MB" if rss else ""))
+    
+    def _report_summary(self, total: int, succeeded: int, start: float, results_path):
+        """Print throughput and per-class utilization of the run."""
+        elapsed = time.perf_counter() - start
+        print(f"\n{succeeded} of {total} jobs succeeded in {elapsed / 60:.1f} min "
+              f"({succeeded / elapsed * 3600:.1f} videos/hour), results in {results_path}")
+        for resource_class, limit in self.limits.items():
+            utilization = self.busy_seconds[resource_class] / (elapsed * limit) if elapsed > 0 else 0.0
+            print(f"  {resource_class:8s} busy {self.busy_seconds[resource_class]:8.1f}s "
+                  f"({utilization:.0%} of {limit} slots)")
@@ -0,0 +1,223 @@
+"""
+Module for transcribing long audio as segments split at silences.
+
+The segments are uploaded and transcribed concurrently through one
+TranscriptionClient. Failed segments are retried on their own, and finished
+segments are cached, so a failure never restarts the whole transcript.
+"""
+import concurrent.futures
+from collections import defaultdict
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
+from .artifact_cache import ArtifactCache, hash_file
+from .audio_extractor import ANALYSIS_SAMPLE_RATE as EXTRACTED_SAMPLE_RATE, load_derivatives
+from .audio_analysis import decode_audio, split_points
+from .transcriber import Utterance, TranscriptionError
+from .transcription_client import TranscriptionClient
+
+# Silence detection doesn't need full bandwidth, 8 kHz halves the memory for long sources
+ANALYSIS_SAMPLE_RATE = 8000
+DEFAULT_SEGMENT_SECONDS = 20 * 60
+
+def plan_segments(audio_path: str, segment_seconds: float = DEFAULT_SEGMENT_SECONDS) -> List[Tuple[float, float]]:
+    """
+    Splits audio at silences into segments of about segment_seconds.
+    
+    The analysis PCM of an extracted WAV is read from disk instead of decoding the audio.
+    
+    Args:
+        audio_path (str): Path to the audio file
+        segment_seconds (float): Target segment duration in seconds
+    
+    Returns:
+        List[Tuple[float, float]]: (start, end) of each segment in seconds, covering the whole audio
+    """
+    derivatives = load_derivatives(audio_path)
+    if derivatives:
+        # Mapped from disk, so the higher rate costs no memory
+        sample_rate = EXTRACTED_SAMPLE_RATE
+        samples = decode_audio(derivatives.analysis_path, sample_rate, dtype="int16")
+    else:
+        sample_rate = ANALYSIS_SAMPLE_RATE
+        samples = decode_audio(audio_path, sample_rate, dtype="int16")
+    total = len(samples) / sample_rate
+    num_segments = max(1, round(total / segment_seconds))
+    points = split_points(samples, sample_rate, num_segments)
+    bounds = [0.0] + [point / sample_rate for point in points] + [total]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _speaking_time(utterances: List[Utterance]) -> Dict[str, int]:
+    """Get the total speaking time per speaker label in milliseconds."""
+    totals: Dict[str, int] = defaultdict(int)
+    for utterance in utterances:
+        totals[utterance.speaker] += utterance.end - utterance.start
+    return totals
+
+def _speaker_label(index: int) -> str:
+    """Get the label of the index-th speaker (A-Z, then S27, S28, ...)."""
+    return chr(ord('A') + index) if index < 26 else f"S{index + 1}"
+
+def reconcile_speakers(segment_utterances: List[List[Utterance]]) -> List[Dict[str, str]]:
+    """
+    Maps the per-segment speaker labels onto labels shared by all segments.
+    
+    AssemblyAI labels the speakers of each segment independently (A, B, ... in
+    order of appearance). Speakers are matched by rank of speaking time: the
+    speaker who talks most in a segment gets the label of the speaker who
+    talks most overall so far, and so on. Extra speakers get new labels.
+    
+    Args:
+        segment_utterances (List[List[Utterance]]): Utterances of each segment
+    
+    Returns:
+        List[Dict[str, str]]: Per segment, a mapping from its labels to the shared labels
+    """
+    global_totals: Dict[str, int] = defaultdict(int)
+    mappings = []
+    for utterances in segment_utterances:
+        local_ranked = sorted(_speaking_time(utterances).items(), key=lambda item: -item[1])
+        global_ranked = sorted(global_totals, key=lambda label: -global_totals[label])
+        mapping = {}
+        for rank, (label, talk_time) in enumerate(local_ranked):
+            if rank < len(global_ranked):
+                shared = global_ranked[rank]
+            else:
+                shared = _speaker_label(len(global_totals))
+            mapping[label] = shared
+            global_totals[shared] += talk_time
+        mappings.append(mapping)
+    return mappings
+
+def merge_segments(segment_utterances: List[List[Utterance]],
+                   segments: List[Tuple[float, float]]) -> List[Utterance]:
+    """
+    Merges per-segment transcripts into one transcript on the global timeline.
+    
+    Args:
+        segment_utterances (List[List[Utterance]]): Utterances of each segment, times relative to the segment
+        segments (List[Tuple[float, float]]): (start, end) of each segment in seconds
+    
+    Returns:
+        List[Utterance]: Ordered utterances with offset-corrected times and shared speaker labels
+    """
+    merged = []
+    mappings = reconcile_speakers(segment_utterances)
+    for utterances, (segment_start, _), mapping in zip(segment_utterances, segments, mappings):
+        offset = int(round(segment_start * 1000))
+        for utterance in utterances:
+            speaker = mapping.get(utterance.speaker, utterance.speaker)
+            words = [
+                dict(word,
+                     start=word["start"] + offset,
+                     end=word["end"] + offset,
+                     **({"speaker": mapping.get(word["speaker"], word["speaker"])} if "speaker" in word else {}))
+                for word in utterance.words
+            ]
+            merged.append(Utterance(
+                speaker=speaker,
+                text=utterance.text,
+                start=utterance.start + offset,
+                end=utterance.end + offset,
+                confidence=utterance.confidence,
+                words=words
+            ))
+    merged.sort(key=lambda utterance: utterance.start)
+    return merged
+
+def transcribe_segmented(audio_path: str,
+                         client: TranscriptionClient,
+                         language_code: str = "en",
+                         speakers_expected: Optional[int] = None,
+                         segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+                         timeout: Optional[float] = None,
+                         max_attempts: int = 3,
+                         upload_workers: int = 4,
+                         cache: Optional[ArtifactCache] = None) -> List[Utterance]:
+    """
+    Transcribes long audio as concurrent segments split at silences.
+    
+    Args:
+        audio_path (str): Path to the audio file
+        client (TranscriptionClient): Client used for all segments
+        language_code (str): Language code for transcription
+        speakers_expected (Optional[int]): Expected number of speakers (per segment)
+        segment_seconds (float): Target segment duration in seconds
+        timeout (Optional[float]): Seconds to wait for each segment's transcript
+        max_attempts (int): Attempts per segment before giving up
+        upload_workers (int): Number of segments encoded and uploaded at the same time
+        cache (Optional[ArtifactCache]): Artifact cache for finished segments
+    
+    Returns:
+        List[Utterance]: Ordered utterances of the whole audio
+    """
+    segments = plan_segments(audio_path, segment_seconds)
+    print(f"Transcribing {len(segments)} segments: " +
+          ", ".join(f"{start / 60:.1f}-{end / 60:.1f} min" for start, end in segments))
+    
+    results: List[Optional[List[Utterance]]] = [None] * len(segments)
+    attempts = [0] * len(segments)
+    audio_hash = hash_file(audio_path) if cache else None
+    
+    def cache_params(index: int) -> Dict[str, object]:
+        start, end = segments[index]
+        return {
+            "audio": audio_hash,
+            "start": round(start, 3),
+            "end": round(end, 3),
+            "language": language_code,
+            "speakers_expected": speakers_expected
+        }
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=upload_workers) as uploader:
+        uploads: Dict[concurrent.futures.Future, int] = {}
+        transcripts: Dict[concurrent.futures.Future, int] = {}
+        
+        def submit(index: int):
+            attempts[index] += 1
+            start, end = segments[index]
+            future = uploader.submit(client.submit, audio_path, language_code, speakers_expected, timeout,
+                                     start=start, duration=end - start)
+            uploads[future] = index
+        
+        def retry_or_raise(index: int, error: Exception):
+            if attempts[index] >= max_attempts:
+                for future in transcripts:
+                    future.cancel()
+                raise TranscriptionError(
+                    f"Segment {index + 1}/{len(segments)} failed after {attempts[index]} attempts: {str(error)}")
+            print(f"Segment {index + 1}/{len(segments)} failed ({str(error)[:100]}), retrying...")
+            submit(index)
+        
+        for index in range(len(segments)):
+            cached = cache.get_json("transcribe_segment", cache_params(index)) if cache else None
+            if cached is not None:
+                results[index] = [Utterance(**utterance) for utterance in cached]
+            else:
+                submit(index)
+        
+        while uploads or transcripts:
+            done, _ = concurrent.futures.wait(
+                list(uploads) + list(transcripts),
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                if future in uploads:
+                    index = uploads.pop(future)
+                    try:
+                        transcripts[future.result()] = index
+                    except Exception as e:
+                        retry_or_raise(index, e)
+                    continue
+                
+                index = transcripts.pop(future)
+                try:
+                    results[index] = future.result()
+                except TranscriptionError as e:
+                    retry_or_raise(index, e)
+                    continue
+                if cache:
+                    cache.put_json("transcribe_segment", cache_params(index),
+                                   [asdict(utterance) for utterance in results[index]])
+                print(f"Segment {index + 1}/{len(segments)} transcribed")
+    
+    return merge_segments(results, segments)
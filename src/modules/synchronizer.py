@@ -1,10 +1,12 @@
 """
 Module for synchronizing audio with video using moviepy.
 """
+import subprocess
 from pathlib import Path
-from moviepy.editor import VideoFileClip, AudioFileClip, CompositeVideoClip
+from typing import Literal, Optional
 from .file_manager import FileManager
 from .media_speed_adjuster import MediaSpeedAdjuster
+from .parallel_encoder import get_profile
 
 class Synchronizer:
     def __init__(self):
@@ -17,71 +19,208 @@ class Synchronizer:
         video_path: str,
         audio_path: str,
         preserve_pitch: bool = True,
-        max_speed_change: float = 1.5
+        max_speed_change: float = 1.5,
+        mux_mode: Literal["auto", "copy", "reencode"] = "auto",
+        duration_tolerance: float = 0.1,
+        reencode_engine: Literal["parallel", "ffmpeg", "moviepy"] = "parallel",
+        output_path: Optional[str] = None,
+        video_duration: Optional[float] = None,
+        encode_profile: str = "balanced"
     ) -> str:
         """
         Synchronizes TTS audio with video by adjusting speeds to match durations.
         
+        When the audio already matches the video duration, the original video
+        bitstream is kept and only the new audio track is encoded. The full
+        re-encode is used when a retime is required or the stream copy fails.
+        
         Args:
             video_path (str): Path to the input video file
             audio_path (str): Path to the TTS audio file
             preserve_pitch (bool): Whether to preserve pitch when adjusting speed
             max_speed_change (float): Maximum allowed speed change ratio
+            mux_mode (str): "auto" to stream copy when timing is unchanged, "copy" to
+                always stream copy, "reencode" to always re-encode the video
+            duration_tolerance (float): Maximum duration difference in seconds that
+                still counts as unchanged video timing
+            reencode_engine (str): "parallel" to encode keyframe-aligned segments in parallel
+                processes, "ffmpeg" for a single-pass filtergraph re-encode, "moviepy" for the
+                legacy multi-pass path
+            output_path (Optional[str]): Where to save the result. If None, a new file in the output directory
+            video_duration (Optional[float]): Duration of the video if already known (e.g. from the
+                audio extraction metadata). If None, the video is probed
+            encode_profile (str): Encoder settings of a re-encode: "fast", "balanced" or "quality"
+                (see parallel_encoder.ENCODE_PROFILES)
             
         Returns:
             str: Path to the synchronized video file
         """
         try:
             print("Loading and analyzing media files...")
-            video_duration = self.speed_adjuster.get_video_duration(video_path)
+            if video_duration is None:
+                video_duration = self.speed_adjuster.get_video_duration(video_path)
             audio_duration = self.speed_adjuster.get_audio_duration(audio_path)
             
             print(f"Original video duration: {video_duration:.2f}s")
             print(f"Original audio duration: {audio_duration:.2f}s")
             
-            # Calculate target duration (use audio duration as target)
-            target_duration = audio_duration
-            
-            # Adjust video and audio speeds
-            adjusted_video_path, adjusted_audio_path = self.speed_adjuster.harmonize_durations(
-                video_path=video_path,
-                audio_path=audio_path,
-                target_duration=target_duration,
-                max_adjustment_ratio=max_speed_change,
-                preserve_pitch=preserve_pitch
-            )
+            output_path = output_path or str(self.file_manager.get_output_path("synchronized_video", ".mp4"))
             
-            # Load adjusted files
-            video = VideoFileClip(adjusted_video_path)
-            audio = AudioFileClip(adjusted_audio_path)
+            timing_unchanged = abs(video_duration - audio_duration) <= duration_tolerance
+            if mux_mode == "copy" or (mux_mode == "auto" and timing_unchanged):
+                print(f"Muxing audio into original video stream at {output_path}...")
+                try:
+                    return self.mux_audio_stream_copy(video_path, audio_path, output_path)
+                except RuntimeError as e:
+                    if mux_mode == "copy":
+                        raise
+                    print(f"Stream copy failed, falling back to re-encode: {str(e)}")
             
-            # Create final video with synchronized audio
-            final_video = video.set_audio(audio)
+            if reencode_engine == "parallel":
+                # Only the video needs retiming, the speech already has the target duration
+                ratio = max(video_duration / audio_duration, audio_duration / video_duration)
+                if ratio > max_speed_change:
+                    raise ValueError(
+                        f"Required speed adjustment ({ratio:.2f}x) exceeds maximum allowed ratio ({max_speed_change}x)"
+                    )
+                # Next to the output, so concurrent jobs don't share the intermediate
+                adjusted_video_path = self.speed_adjuster.adjust_video_speed(
+                    video_path,
+                    audio_duration,
+                    encode_profile=encode_profile,
+                    output_path=str(Path(output_path).with_name(f"{Path(output_path).stem}.video.mp4"))
+                )
+                try:
+                    print(f"Saving synchronized video to {output_path}...")
+                    return self.mux_audio_stream_copy(adjusted_video_path, audio_path, output_path)
+                finally:
+                    Path(adjusted_video_path).unlink(missing_ok=True)
             
-            # Save to output directory with specific codec settings
-            output_path = self.file_manager.get_output_path("synchronized_video", ".mp4")
-            print(f"Saving synchronized video to {output_path}...")
+            if reencode_engine == "ffmpeg":
+                print(f"Saving synchronized video to {output_path}...")
+                return self.speed_adjuster.harmonize_single_pass(
+                    video_path=video_path,
+                    audio_path=audio_path,
+                    output_path=output_path,
+                    target_duration=audio_duration,
+                    max_adjustment_ratio=max_speed_change,
+                    preserve_pitch=preserve_pitch,
+                    preset=get_profile(encode_profile).preset
+                )
             
-            final_video.write_videofile(
-                str(output_path),
-                codec='libx264',
-                audio_codec='aac',
-                temp_audiofile=str(self.file_manager.get_temp_path("temp_audio", ".m4a")),
-                remove_temp=True,
-                fps=video.fps
+            return self._sync_with_reencode(
+                video_path=video_path,
+                audio_path=audio_path,
+                target_duration=audio_duration,
+                preserve_pitch=preserve_pitch,
+                max_speed_change=max_speed_change,
+                output_path=output_path,
+                encode_profile=encode_profile
             )
             
-            # Clean up
-            video.close()
-            audio.close()
-            final_video.close()
-            
-            return str(output_path)
-            
         except Exception as e:
             print(f"Error: Failed to synchronize audio with video: {str(e)}")
             raise
 
+    def mux_audio_stream_copy(self, video_path: str, audio_path: str, output_path: str) -> str:
+        """
+        Replaces the audio track of a video without re-encoding the video stream.
+        
+        Args:
+            video_path (str): Path to the input video file
+            audio_path (str): Path to the new audio file
+            output_path (str): Path where the muxed video will be saved
+            
+        Returns:
+            str: Path to the muxed video file
+        """
+        cmd = [
+            'ffmpeg',
+            '-i', video_path,
+            '-i', audio_path,
+            '-map', '0:v:0',  # Video from the original file
+            '-map', '1:a:0',  # Audio from the TTS track
+            '-c:v', 'copy',  # Keep the original video bitstream
+            '-c:a', 'aac',
+            '-b:a', '192k',
+            '-y',
+            output_path
+        ]
+        
+        process = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        
+        if process.returncode != 0:
+            Path(output_path).unlink(missing_ok=True)
+            raise RuntimeError(f"FFmpeg stream copy failed: {process.stderr.decode()[-1000:]}")
+            
+        return output_path
+
+    def _sync_with_reencode(
+        self,
+        video_path: str,
+        audio_path: str,
+        target_duration: float,
+        preserve_pitch: bool,
+        max_speed_change: float,
+        output_path: str,
+        encode_profile: str = "balanced"
+    ) -> str:
+        """
+        Retimes video and audio to the target duration and re-encodes the result.
+        
+        Args:
+            video_path (str): Path to the input video file
+            audio_path (str): Path to the TTS audio file
+            target_duration (float): Target duration in seconds
+            preserve_pitch (bool): Whether to preserve pitch when adjusting speed
+            max_speed_change (float): Maximum allowed speed change ratio
+            output_path (str): Path where the synchronized video will be saved
+            encode_profile (str): Encoder settings of the video retime
+            
+        Returns:
+            str: Path to the synchronized video file
+        """
+        # Adjust video and audio speeds
+        adjusted_video_path, adjusted_audio_path = self.speed_adjuster.harmonize_durations(
+            video_path=video_path,
+            audio_path=audio_path,
+            target_duration=target_duration,
+            max_adjustment_ratio=max_speed_change,
+            preserve_pitch=preserve_pitch,
+            encode_profile=encode_profile
+        )
+        
+        # Load adjusted files
+        from moviepy.editor import VideoFileClip, AudioFileClip
+        video = VideoFileClip(adjusted_video_path)
+        audio = AudioFileClip(adjusted_audio_path)
+        
+        # Create final video with synchronized audio
+        final_video = video.set_audio(audio)
+        
+        # Save with specific codec settings
+        print(f"Saving synchronized video to {output_path}...")
+        
+        final_video.write_videofile(
+            str(output_path),
+            codec='libx264',
+            audio_codec='aac',
+            temp_audiofile=str(self.file_manager.get_temp_path("temp_audio", ".m4a")),
+            remove_temp=True,
+            fps=video.fps
+        )
+        
+        # Clean up
+        video.close()
+        audio.close()
+        final_video.close()
+        
+        return str(output_path)
+
     def create_video_with_subtitles(
         self,
         video_path: str,
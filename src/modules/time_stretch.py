@@ -0,0 +1,231 @@
+"""
+Module for changing the tempo of audio without changing its pitch.
+
+Implements WSOLA (waveform similarity overlap-add): Hann-windowed frames are
+taken from the input at the analysis hop and overlap-added at the synthesis hop.
+Each frame's position is moved within a small tolerance to where it best
+continues the previous frame, which avoids the phasiness of plain OLA.
+
+The input is processed in blocks, so memory stays bounded for hours-long
+tracks. Only the search for each frame's position is sequential; it uses a
+decimated cross-correlation refined at full rate, and the overlap-add of a
+block's frames is a single vectorized step.
+"""
+import wave
+from typing import Optional
+import numpy as np
+from .wav_writer import WavWriter
+
+DEFAULT_FRAME_MS = 40
+DEFAULT_TOLERANCE_MS = 10
+DEFAULT_BLOCK_FRAMES = 1 << 16
+# The coarse search looks at every DECIMATION-th sample
+DECIMATION = 4
+
+class TimeStretcher:
+    def __init__(self,
+                 tempo: float,
+                 sample_rate: int,
+                 channels: int = 1,
+                 frame_ms: int = DEFAULT_FRAME_MS,
+                 tolerance_ms: int = DEFAULT_TOLERANCE_MS):
+        """
+        Initialize a streaming WSOLA time-stretcher.
+        
+        Feed the input with process() and finish with flush(); together they
+        return int(round(input_length / tempo)) samples, with the dimensionality
+        of the blocks passed to process().
+        
+        Args:
+            tempo (float): Tempo factor (> 1 speeds up, < 1 slows down)
+            sample_rate (int): Sample rate in Hz
+            channels (int): Number of channels (the search uses their mean)
+            frame_ms (int): Frame length in milliseconds
+            tolerance_ms (int): How far a frame may move from its nominal position
+        """
+        if tempo <= 0:
+            raise ValueError(f"Tempo factor must be positive, got {tempo}")
+        self.tempo = tempo
+        self.channels = channels
+        self.synthesis_hop = max(DECIMATION, sample_rate * frame_ms // 2000)
+        self.frame_length = 2 * self.synthesis_hop
+        self.analysis_hop = self.synthesis_hop * tempo
+        self.tolerance = max(DECIMATION, sample_rate * tolerance_ms // 1000)
+        
+        # Periodic Hann window, sums to one at 50% overlap
+        n = np.arange(self.frame_length)
+        self._window = (0.5 - 0.5 * np.cos(2 * np.pi * n / self.frame_length)).astype(np.float32)[:, None]
+        
+        # The input is padded in front with tolerance samples (room for the search) and
+        # half a frame (the first output half-frame is dropped, so the output starts at
+        # full gain). Positions below count in padded input samples.
+        lead = self.tolerance + self.synthesis_hop
+        self._buffer = np.zeros((lead, channels), dtype=np.float32)
+        self._buffer_start = 0
+        self._frame_index = 0
+        self._previous_position = None
+        self._tail = np.zeros((self.synthesis_hop, channels), dtype=np.float32)
+        self._input_length = 0
+        self._output_length = 0
+        self._skip = self.synthesis_hop
+        # Dimensionality of the caller's blocks, (n, channels) until the first one
+        self._input_ndim = 2
+    
+    def _nominal_position(self, frame_index: int) -> int:
+        """Get the position of a frame before the similarity search."""
+        return self.tolerance + int(round(frame_index * self.analysis_hop))
+    
+    def _frame_end(self, frame_index: int) -> int:
+        """Get the input position needed to place a frame."""
+        end = self._nominal_position(frame_index) + self.tolerance + self.frame_length
+        if self._previous_position is not None:
+            end = max(end, self._previous_position + self.synthesis_hop + self.frame_length)
+        return end
+    
+    def _search(self, nominal: int) -> int:
+        """Find the position near nominal where a frame best continues the previous frame."""
+        start = self._previous_position + self.synthesis_hop - self._buffer_start
+        natural = self._mono[start:start + self.frame_length]
+        low = nominal - self.tolerance - self._buffer_start
+        region = self._mono[low:low + 2 * self.tolerance + self.frame_length]
+        
+        # Coarse search on decimated signals, then refine around the best match
+        coarse = np.correlate(region[::DECIMATION], natural[::DECIMATION], mode='valid')
+        best = int(np.argmax(coarse)) * DECIMATION
+        first = max(0, best - DECIMATION + 1)
+        last = min(2 * self.tolerance, best + DECIMATION - 1)
+        candidates = np.lib.stride_tricks.sliding_window_view(
+            region[first:last + self.frame_length], self.frame_length
+        )
+        offset = first + int(np.argmax(candidates @ natural))
+        return low + offset + self._buffer_start
+    
+    def _place_frames(self, available: int) -> np.ndarray:
+        """Place every frame the buffered input allows and overlap-add them."""
+        positions = []
+        while self._frame_end(self._frame_index) <= available:
+            nominal = self._nominal_position(self._frame_index)
+            position = nominal if self._previous_position is None else self._search(nominal)
+            positions.append(position)
+            self._previous_position = position
+            self._frame_index += 1
+        if not positions:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        
+        starts = np.asarray(positions) - self._buffer_start
+        frames = self._buffer[starts[:, None] + np.arange(self.frame_length)] * self._window
+        # Output hop k is the first half of frame k plus the second half of frame k - 1
+        previous_halves = np.concatenate([self._tail[None], frames[:-1, self.synthesis_hop:]])
+        output = (frames[:, :self.synthesis_hop] + previous_halves).reshape(-1, self.channels)
+        self._tail = frames[-1, self.synthesis_hop:].copy()
+        
+        # Keep only the input later frames and searches can still reach
+        keep_from = min(self._nominal_position(self._frame_index) - self.tolerance,
+                        self._previous_position + self.synthesis_hop)
+        drop = max(0, keep_from - self._buffer_start)
+        self._buffer = self._buffer[drop:]
+        self._buffer_start += drop
+        return output
+    
+    def _emit(self, output: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+        """Drop the leading half-frame and cap the total output length."""
+        if self._skip:
+            skipped = min(self._skip, len(output))
+            output = output[skipped:]
+            self._skip -= skipped
+        if limit is not None:
+            output = output[:max(0, limit - self._output_length)]
+        self._output_length += len(output)
+        return output
+    
+    def _shape(self, output: np.ndarray) -> np.ndarray:
+        """Return output with the dimensionality of the caller's input."""
+        return output[:, 0] if self._input_ndim == 1 else output
+    
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Stretches the next block of input.
+        
+        Args:
+            samples (np.ndarray): Float samples, shape (n,) or (n, channels)
+        
+        Returns:
+            np.ndarray: Stretched float32 samples available so far, same dimensionality as the input
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        self._input_ndim = samples.ndim
+        block = samples.reshape(len(samples), self.channels)
+        self._input_length += len(block)
+        self._buffer = np.concatenate([self._buffer, block])
+        self._mono = self._buffer.mean(axis=1) if self.channels > 1 else self._buffer[:, 0]
+        output = self._place_frames(self._buffer_start + len(self._buffer))
+        return self._shape(self._emit(output))
+    
+    def flush(self) -> np.ndarray:
+        """
+        Stretches the rest of the input.
+        
+        Returns:
+            np.ndarray: The remaining stretched float32 samples, same dimensionality as the input of process()
+        """
+        target = int(round(self._input_length / self.tempo))
+        # Silence after the end lets the last frames be placed
+        padding = int(np.ceil(self.analysis_hop)) + 2 * self.tolerance + 2 * self.frame_length
+        outputs = []
+        while self._output_length + sum(len(part) for part in outputs) < target + self._skip:
+            self._buffer = np.concatenate([self._buffer, np.zeros((padding, self.channels), dtype=np.float32)])
+            self._mono = self._buffer.mean(axis=1) if self.channels > 1 else self._buffer[:, 0]
+            outputs.append(self._place_frames(self._buffer_start + len(self._buffer)))
+        outputs.append(self._tail)
+        return self._shape(self._emit(np.concatenate(outputs), limit=target))
+
+def stretch_array(samples: np.ndarray, sample_rate: int, tempo: float, **options) -> np.ndarray:
+    """
+    Changes the tempo of in-memory audio without changing its pitch.
+    
+    Args:
+        samples (np.ndarray): Float samples, shape (n,) or (n, channels)
+        sample_rate (int): Sample rate in Hz
+        tempo (float): Tempo factor (> 1 speeds up, < 1 slows down)
+        **options: frame_ms and tolerance_ms of TimeStretcher
+    
+    Returns:
+        np.ndarray: Stretched float32 samples with the input's dimensionality
+    """
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+    stretcher = TimeStretcher(tempo, sample_rate, channels, **options)
+    return np.concatenate([stretcher.process(samples), stretcher.flush()])
+
+def time_stretch_wav(input_path: str,
+                     output_path: str,
+                     tempo: float,
+                     block_frames: int = DEFAULT_BLOCK_FRAMES,
+                     **options) -> str:
+    """
+    Changes the tempo of a 16-bit WAV file without changing its pitch, block by block.
+    
+    Args:
+        input_path (str): Path to the input WAV file
+        output_path (str): Path of the stretched WAV file
+        tempo (float): Tempo factor (> 1 speeds up, < 1 slows down)
+        block_frames (int): Frames read per block
+        **options: frame_ms and tolerance_ms of TimeStretcher
+    
+    Returns:
+        str: The output path
+    """
+    with wave.open(input_path, 'rb') as reader:
+        if reader.getsampwidth() != 2:
+            raise ValueError(f"Only 16-bit PCM WAV files can be stretched: {input_path}")
+        sample_rate = reader.getframerate()
+        channels = reader.getnchannels()
+        stretcher = TimeStretcher(tempo, sample_rate, channels, **options)
+        with WavWriter(output_path, sample_rate, channels) as writer:
+            while True:
+                data = reader.readframes(block_frames)
+                if not data:
+                    break
+                block = np.frombuffer(data, dtype='<i2').reshape(-1, channels).astype(np.float32) / 32768.0
+                writer.write(stretcher.process(block))
+            writer.write(stretcher.flush())
+    return output_path
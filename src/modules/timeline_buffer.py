@@ -0,0 +1,163 @@
+"""
+Module for assembling long audio tracks in a memory-mapped WAV file.
+
+Clips are mixed into (or overwrite) the file at any sample offset. Each
+operation maps only the region it touches and unmaps it afterwards, so the
+pages are written back to the file instead of staying resident: peak memory
+depends on the clip sizes, not on the length of the track.
+"""
+import struct
+from typing import Literal
+import numpy as np
+
+WAV_HEADER_BYTES = 44
+# WAV format tag and sample type per buffer dtype
+SAMPLE_FORMATS = {"int16": (1, np.dtype('<i2')), "float32": (3, np.dtype('<f4'))}
+# Frames converted at once when mixing, bounds the temporary float copies
+BLOCK_FRAMES = 1 << 18
+
+class TimelineBuffer:
+    def __init__(self,
+                 output_path: str,
+                 sample_rate: int,
+                 channels: int = 1,
+                 num_frames: int = 0,
+                 dtype: Literal["int16", "float32"] = "int16"):
+        """
+        Initialize a timeline backed by a WAV file on disk.
+        
+        The file is created (sparse, all silence) with num_frames frames and grows
+        when a clip is placed past its end.
+        
+        Args:
+            output_path (str): Path of the WAV file to write
+            sample_rate (int): Sample rate in Hz
+            channels (int): Number of interleaved channels
+            num_frames (int): Initial length in frames
+            dtype (str): "int16" (PCM) or "float32" (IEEE float, no clipping while mixing)
+        """
+        self.output_path = output_path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.dtype = dtype
+        self._format_tag, self._sample_type = SAMPLE_FORMATS[dtype]
+        self._frame_bytes = self._sample_type.itemsize * channels
+        self.num_frames = 0
+        self._file = open(output_path, 'w+b')
+        self.resize(num_frames)
+    
+    def _write_header(self):
+        """Write the RIFF header for the current length."""
+        data_bytes = self.num_frames * self._frame_bytes
+        bits = self._sample_type.itemsize * 8
+        header = struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', WAV_HEADER_BYTES - 8 + data_bytes, b'WAVE',
+            b'fmt ', 16, self._format_tag, self.channels, self.sample_rate,
+            self.sample_rate * self._frame_bytes, self._frame_bytes, bits,
+            b'data', data_bytes
+        )
+        self._file.seek(0)
+        self._file.write(header)
+        self._file.flush()
+    
+    def resize(self, num_frames: int):
+        """Set the length of the track in frames; new frames are silent."""
+        self._file.truncate(WAV_HEADER_BYTES + num_frames * self._frame_bytes)
+        self.num_frames = num_frames
+        self._write_header()
+    
+    def _map(self, start: int, length: int) -> np.memmap:
+        """Map frames [start, start + length) of the file, growing it if needed."""
+        if start < 0:
+            raise ValueError(f"Timeline offsets must not be negative, got {start}")
+        if start + length > self.num_frames:
+            self.resize(start + length)
+        return np.memmap(self._file, dtype=self._sample_type, mode='r+',
+                         offset=WAV_HEADER_BYTES + start * self._frame_bytes, shape=(length, self.channels))
+    
+    def _convert(self, samples: np.ndarray) -> np.ndarray:
+        """Convert float samples in [-1, 1] or int16 samples to float32 in the buffer's scale."""
+        scale = 32767.0 if self.dtype == "int16" else 1.0
+        if samples.dtype == np.int16:
+            return samples.astype(np.float32) * (scale / 32768.0)
+        return samples.astype(np.float32) * scale
+    
+    def _store(self, region: np.ndarray, values: np.ndarray):
+        """Store float32 values in a mapped region, saturating for int16."""
+        if self.dtype == "int16":
+            np.clip(np.rint(values, out=values), -32768, 32767, out=values)
+        region[:] = values
+    
+    def write(self, samples: np.ndarray, start: int):
+        """
+        Overwrites the track with samples from frame start on.
+        
+        Args:
+            samples (np.ndarray): Float samples in [-1, 1] or int16 samples, shape (n,) or (n, channels)
+            start (int): Frame offset
+        """
+        samples = np.asarray(samples).reshape(-1, self.channels)
+        for first in range(0, len(samples), BLOCK_FRAMES):
+            block = samples[first:first + BLOCK_FRAMES]
+            region = self._map(start + first, len(block))
+            self._store(region, self._convert(block))
+            region.flush()
+            del region
+    
+    def mix(self, samples: np.ndarray, start: int):
+        """
+        Adds samples to the track from frame start on.
+        
+        Args:
+            samples (np.ndarray): Float samples in [-1, 1] or int16 samples, shape (n,) or (n, channels)
+            start (int): Frame offset
+        """
+        samples = np.asarray(samples).reshape(-1, self.channels)
+        for first in range(0, len(samples), BLOCK_FRAMES):
+            block = samples[first:first + BLOCK_FRAMES]
+            region = self._map(start + first, len(block))
+            values = region.astype(np.float32)
+            values += self._convert(block)
+            self._store(region, values)
+            region.flush()
+            del region
+    
+    def read(self, start: int, length: int) -> np.ndarray:
+        """
+        Reads frames of the track.
+        
+        Args:
+            start (int): Frame offset
+            length (int): Number of frames (fewer are returned at the end of the track)
+        
+        Returns:
+            np.ndarray: Copy of the samples, shape (n, channels)
+        """
+        length = max(0, min(length, self.num_frames - start))
+        if length == 0:
+            return np.zeros((0, self.channels), dtype=self._sample_type)
+        region = np.memmap(self._file, dtype=self._sample_type, mode='r',
+                           offset=WAV_HEADER_BYTES + start * self._frame_bytes, shape=(length, self.channels))
+        samples = np.array(region)
+        del region
+        return samples
+    
+    @property
+    def duration(self) -> float:
+        """Duration of the track in seconds."""
+        return self.num_frames / self.sample_rate
+    
+    def close(self):
+        """Finalize the WAV header and close the file."""
+        if not self._file.closed:
+            self._write_header()
+            self._file.close()
+    
+    def __enter__(self):
+        """Context manager entry point."""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit point - finalizes the file."""
+        self.close()
@@ -5,11 +5,25 @@ import time
 import requests
 import os
 import subprocess
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator, Literal, TYPE_CHECKING
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from datetime import datetime
 from .file_manager import FileManager
+from .artifact_cache import ArtifactCache, hash_file
+from .ffmpeg_runner import has_encoder
+
+if TYPE_CHECKING:
+    from .transcription_client import TranscriptionClient
+
+DEFAULT_BASE_URL = "https://api.assemblyai.com"
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Speech-optimized upload encodings: ffmpeg codec arguments and container format
+UPLOAD_ENCODINGS = {
+    "opus": (['-c:a', 'libopus', '-b:a', '24k', '-application', 'voip'], 'ogg'),
+    "mp3": (['-c:a', 'libmp3lame', '-b:a', '32k'], 'mp3'),
+}
 
 @dataclass
 class Utterance:
@@ -25,6 +39,10 @@ class TranscriptionError(Exception):
     """Custom exception for transcription-related errors."""
     pass
 
+def api_base_url() -> str:
+    """Get the AssemblyAI API base URL, overridable with ASSEMBLYAI_BASE_URL (e.g. for a local stand-in)."""
+    return os.environ.get("ASSEMBLYAI_BASE_URL", DEFAULT_BASE_URL).rstrip('/')
+
 def convert_audio_to_mp3(input_path: str, file_manager: FileManager) -> str:
     """
     Convert audio file to MP3 format for better compatibility.
@@ -90,7 +108,7 @@ def upload_audio(audio_path: str, api_key: str) -> str:
         }
         
         upload_response = requests.post(
-            'https://api.assemblyai.com/v2/upload',
+            f'{api_base_url()}/v2/upload',
             headers={'authorization': api_key},
             data=read_file(audio_path)
         )
@@ -104,11 +122,181 @@ def upload_audio(audio_path: str, api_key: str) -> str:
     except Exception as e:
         raise TranscriptionError(f"Failed to upload audio: {str(e)}")
 
+def stream_encoded_audio(audio_path: str,
+                         codec: Literal["opus", "mp3"] = "opus",
+                         sample_rate: int = 16000,
+                         chunk_size: int = UPLOAD_CHUNK_SIZE,
+                         start: Optional[float] = None,
+                         duration: Optional[float] = None) -> Iterator[bytes]:
+    """
+    Encodes audio to speech-optimized mono and yields ffmpeg's output as it is produced.
+    
+    Nothing is written to disk. If the consumer stops early, ffmpeg is killed.
+    
+    Args:
+        audio_path (str): Path to the input audio or video file
+        codec (str): "opus" (Ogg Opus, 24 kbit/s) or "mp3" (32 kbit/s)
+        sample_rate (int): Output sample rate in Hz
+        chunk_size (int): Maximum size of the yielded chunks in bytes
+        start (Optional[float]): Offset in seconds to start encoding at
+        duration (Optional[float]): Seconds to encode. If None, up to the end
+        
+    Yields:
+        bytes: Encoded audio
+    """
+    codec_args, container = UPLOAD_ENCODINGS[codec]
+    range_args = []
+    if start:
+        range_args += ['-ss', f'{start:.3f}']
+    if duration is not None:
+        range_args += ['-t', f'{duration:.3f}']
+    cmd = [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin',
+        *range_args,
+        '-i', audio_path,
+        '-vn',
+        '-ac', '1',  # mono (required for speaker diarization)
+        '-ar', str(sample_rate),
+        *codec_args,
+        '-f', container,
+        'pipe:1'
+    ]
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read1(chunk_size)
+            if not data:
+                break
+            yield data
+        
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise TranscriptionError(f"FFmpeg encoding failed: {stderr.decode(errors='replace')[-1000:]}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+def read_file_chunks(file_path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the contents of a file in chunks."""
+    with open(file_path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            yield data
+
+def upload_audio_stream(audio_path: str,
+                        api_key: str,
+                        codec: Optional[Literal["opus", "mp3"]] = None,
+                        session: Optional[requests.Session] = None,
+                        start: Optional[float] = None,
+                        duration: Optional[float] = None) -> str:
+    """
+    Encodes audio with ffmpeg and streams it straight into a chunked upload to AssemblyAI.
+    
+    For a WAV written by audio_extractor, the upload encoded during extraction is
+    sent as is, and parts are cut from its 16 kHz analysis PCM.
+    
+    Args:
+        audio_path (str): Path to the audio (or video) file
+        api_key (str): AssemblyAI API key
+        codec (Optional[str]): "opus" or "mp3". If None, Opus when ffmpeg has libopus, otherwise MP3
+        session (Optional[requests.Session]): Session to upload with
+        start (Optional[float]): Offset in seconds of the part to upload
+        duration (Optional[float]): Seconds to upload. If None, up to the end
+        
+    Returns:
+        str: Upload URL for the audio file
+    """
+    from .audio_extractor import load_derivatives
+    derivatives = load_derivatives(audio_path)
+    if codec is None:
+        codec = derivatives.upload_codec if derivatives else ("opus" if has_encoder("libopus") else "mp3")
+    
+    if derivatives and derivatives.upload_codec == codec and start is None and duration is None:
+        source, chunks = derivatives.upload_path, read_file_chunks(derivatives.upload_path)
+    else:
+        source = derivatives.analysis_path if derivatives else audio_path
+        chunks = stream_encoded_audio(source, codec, start=start, duration=duration)
+    uploaded = 0
+    
+    def counted_chunks():
+        nonlocal uploaded
+        for chunk in chunks:
+            uploaded += len(chunk)
+            yield chunk
+    
+    try:
+        part = f" [{start or 0:.0f}s +{duration:.0f}s]" if duration is not None else ""
+        print(f"Streaming {source}{part} as 16 kHz mono {codec} to AssemblyAI...")
+        upload_start = time.perf_counter()
+        # A generator body makes requests use chunked transfer encoding
+        upload_response = (session or requests).post(
+            f'{api_base_url()}/v2/upload',
+            headers={'authorization': api_key},
+            data=counted_chunks()
+        )
+        elapsed = time.perf_counter() - upload_start
+        
+        if upload_response.status_code != 200:
+            raise TranscriptionError(f"Upload failed: {upload_response.text}")
+        
+        print(f"Uploaded {uploaded / 1024:.0f} KB in {elapsed:.1f}s "
+              f"({uploaded * 8 / 1000 / max(elapsed, 1e-6):.0f} kbit/s)")
+        return upload_response.json()['upload_url']
+        
+    except TranscriptionError:
+        raise
+    except Exception as e:
+        raise TranscriptionError(f"Failed to upload audio: {str(e)}")
+
+def parse_transcript(transcription: Dict[str, Any]) -> List[Utterance]:
+    """
+    Converts a completed AssemblyAI transcript into utterances.
+    
+    Args:
+        transcription (Dict[str, Any]): Transcript response with status "completed"
+        
+    Returns:
+        List[Utterance]: List of transcribed utterances with speaker information
+    """
+    utterances = []
+    # Check if 'utterances' exists and is not empty
+    if 'utterances' in transcription and transcription['utterances']:
+        for utterance in transcription['utterances']:
+            utterances.append(Utterance(
+                speaker=utterance['speaker'],
+                text=utterance['text'],
+                start=utterance['start'],
+                end=utterance['end'],
+                confidence=utterance.get('confidence', 0.0),
+                words=utterance.get('words', [])
+            ))
+    else:
+        # If no utterances, create a single utterance from the full text
+        utterances.append(Utterance(
+            speaker="speaker_1",
+            text=transcription['text'],
+            start=0,
+            end=int(float(transcription['audio_duration']) * 1000),
+            confidence=1.0,
+            words=[]
+        ))
+    return utterances
+
 def transcribe_audio(
     audio_path: str,
     api_key: str,
     language_code: str = "en",
-    speakers_expected: Optional[int] = None
+    speakers_expected: Optional[int] = None,
+    cache: Optional[ArtifactCache] = None,
+    upload_codec: Optional[Literal["opus", "mp3"]] = None,
+    client: Optional["TranscriptionClient"] = None,
+    timeout: Optional[float] = None,
+    segment_seconds: Optional[float] = None
 ) -> List[Utterance]:
     """
     Transcribes audio using AssemblyAI API with speaker diarization.
@@ -118,81 +306,55 @@ def transcribe_audio(
         api_key (str): AssemblyAI API key
         language_code (str): Language code for transcription (default: "en")
         speakers_expected (Optional[int]): Expected number of speakers (improves accuracy)
+        cache (Optional[ArtifactCache]): Artifact cache to reuse transcripts of the same audio
+        upload_codec (Optional[str]): Upload encoding, "opus" or "mp3". If None, Opus when available
+        client (Optional[TranscriptionClient]): Client to transcribe with. If None, a client
+            shared by all calls with the same API key is used
+        timeout (Optional[float]): Seconds to wait for the transcript before giving up
+        segment_seconds (Optional[float]): If set, split the audio at silences into segments of about
+            this length and transcribe them concurrently (for long sources)
         
     Returns:
         List[Utterance]: List of transcribed utterances with speaker information
     """
-    try:
-        file_manager = FileManager()
-        
-        # Convert audio to MP3 if needed
-        if not audio_path.lower().endswith('.mp3'):
-            print("Converting audio to MP3 format...")
-            audio_path = convert_audio_to_mp3(audio_path, file_manager)
-        
-        print("Uploading audio file...")
-        upload_url = upload_audio(audio_path, api_key)
-        
-        headers = {
-            "authorization": api_key,
-            "content-type": "application/json"
+    if cache:
+        cache_params = {
+            "audio": hash_file(audio_path),
+            "language": language_code,
+            "speakers_expected": speakers_expected
         }
+        cached = cache.get_json("transcribe", cache_params)
+        if cached is not None:
+            print("Using cached transcription")
+            return [Utterance(**utterance) for utterance in cached]
         
-        # Configure transcription options
-        data = {
-            "audio_url": upload_url,
-            "language_code": language_code,
-            "speaker_labels": True
-        }
-        if speakers_expected:
-            data["speakers_expected"] = speakers_expected
-            
-        # Start transcription
-        response = requests.post("https://api.assemblyai.com/v2/transcript", json=data, headers=headers)
-        if response.status_code != 200:
-            raise TranscriptionError(f"Failed to start transcription: {response.text}")
-            
-        transcript_id = response.json()['id']
-        polling_endpoint = f"https://api.assemblyai.com/v2/transcript/{transcript_id}"
+    try:
+        from .transcription_client import shared_client
+        transcription_client = client or shared_client(api_key)
+        if segment_seconds:
+            from .segmented_transcriber import transcribe_segmented
+            utterances = transcribe_segmented(
+                audio_path,
+                transcription_client,
+                language_code=language_code,
+                speakers_expected=speakers_expected,
+                segment_seconds=segment_seconds,
+                timeout=timeout,
+                cache=cache
+            )
+        else:
+            utterances = transcription_client.transcribe(
+                audio_path,
+                language_code=language_code,
+                speakers_expected=speakers_expected,
+                timeout=timeout,
+                upload_codec=upload_codec
+            )
+        if cache:
+            cache.put_json("transcribe", cache_params, [asdict(u) for u in utterances])
+        return utterances
         
-        print("Processing audio... This may take a few minutes.")
-        while True:
-            transcription = requests.get(polling_endpoint, headers=headers).json()
-            
-            if transcription['status'] == 'completed':
-                utterances = []
-                # Check if 'utterances' exists and is not empty
-                if 'utterances' in transcription and transcription['utterances']:
-                    for utterance in transcription['utterances']:
-                        utterances.append(Utterance(
-                            speaker=utterance['speaker'],
-                            text=utterance['text'],
-                            start=utterance['start'],
-                            end=utterance['end'],
-                            confidence=utterance.get('confidence', 0.0),
-                            words=utterance.get('words', [])
-                        ))
-                else:
-                    # If no utterances, create a single utterance from the full text
-                    utterances.append(Utterance(
-                        speaker="speaker_1",
-                        text=transcription['text'],
-                        start=0,
-                        end=int(float(transcription['audio_duration']) * 1000),
-                        confidence=1.0,
-                        words=[]
-                    ))
-                return utterances
-                
-            elif transcription['status'] == 'error':
-                raise TranscriptionError(f"Transcription failed: {transcription['error']}")
-                
-            print(".", end="", flush=True)  # Show progress
-            time.sleep(3)
-            
+    except TranscriptionError:
+        raise
     except Exception as e:
         raise TranscriptionError(f"Transcription failed: {str(e)}")
-    finally:
-        # Clean up temporary files
-        if 'file_manager' in locals():
-            file_manager.cleanup_temp_files()
@@ -0,0 +1,446 @@
+"""
+Module for running many AssemblyAI transcriptions over one pooled HTTP session.
+
+Uploads and API calls reuse keep-alive connections. A single poller thread
+tracks all pending transcripts, polling each with a backoff tuned to its audio
+duration until its deadline. Completion can also be signalled to a local
+webhook listener, which makes the poller fetch the result right away.
+"""
+import heapq
+import itertools
+import json
+import secrets
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Literal, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .media_info import MediaProbeError, media_duration
+from .transcriber import (
+    Utterance, TranscriptionError, api_base_url, parse_transcript, upload_audio_stream
+)
+
+# AssemblyAI typically needs a fraction of the audio duration
+EXPECTED_PROCESSING_RATIO = 0.25
+MIN_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 30.0
+POLL_BACKOFF = 1.5
+# With a webhook listener, polling only catches lost callbacks
+WEBHOOK_FALLBACK_INTERVAL = 60.0
+WEBHOOK_PATH = "/assemblyai-webhook"
+WEBHOOK_AUTH_HEADER = "X-Transcript-Token"
+HTTP_TIMEOUT = 30.0
+
+class TranscriptionTimeout(TranscriptionError):
+    """Raised when a transcript is not completed before its deadline."""
+    pass
+
+def audio_duration(audio_path: str) -> Optional[float]:
+    """Get the duration of an audio (or video) file in seconds, None if it can't be probed."""
+    try:
+        return media_duration(audio_path)
+    except MediaProbeError:
+        return None
+
+def poll_schedule(duration: Optional[float],
+                  min_interval: float = MIN_POLL_INTERVAL,
+                  max_interval: float = MAX_POLL_INTERVAL) -> Tuple[float, float]:
+    """
+    Gets the delay before the first poll and the polling interval after it.
+    
+    The first poll comes at about half the expected processing time; later
+    polls start at a tenth of it and back off by POLL_BACKOFF per poll.
+    
+    Args:
+        duration (Optional[float]): Audio duration in seconds, None if unknown
+        min_interval (float): Shortest polling interval in seconds
+        max_interval (float): Longest polling interval in seconds
+    
+    Returns:
+        Tuple[float, float]: First poll delay and initial interval in seconds
+    """
+    if not duration:
+        return min_interval, min_interval
+    expected = duration * EXPECTED_PROCESSING_RATIO
+    first_delay = min(max(expected * 0.5, min_interval), max_interval)
+    interval = min(max(expected * 0.1, min_interval), max_interval)
+    return first_delay, interval
+
+@dataclass
+class _PendingTranscript:
+    """A submitted transcript tracked by the poller."""
+    transcript_id: str
+    future: Future
+    submitted: float
+    deadline: Optional[float]
+    interval: float
+    next_poll: float = 0.0
+    polls: int = 0
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        """Silence the per-request log."""
+        pass
+    
+    def _reply(self, status: int):
+        """Send an empty response."""
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+    
+    def do_POST(self):
+        """Handle a transcript status callback."""
+        client: TranscriptionClient = self.server.client
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        token = self.headers.get(WEBHOOK_AUTH_HEADER, "")
+        if self.path != WEBHOOK_PATH or not secrets.compare_digest(token, client.webhook_token):
+            self._reply(403)
+            return
+        try:
+            transcript_id = json.loads(body)["transcript_id"]
+        except (ValueError, KeyError, TypeError):
+            self._reply(400)
+            return
+        client.notify(transcript_id)
+        self._reply(204)
+
+class TranscriptionClient:
+    def __init__(self,
+                 api_key: str,
+                 base_url: Optional[str] = None,
+                 max_connections: int = 32,
+                 min_poll_interval: float = MIN_POLL_INTERVAL,
+                 max_poll_interval: float = MAX_POLL_INTERVAL,
+                 webhook_port: Optional[int] = None,
+                 webhook_host: str = "127.0.0.1",
+                 webhook_url: Optional[str] = None):
+        """
+        Initialize the transcription client.
+        
+        Args:
+            api_key (str): AssemblyAI API key
+            base_url (Optional[str]): API base URL. If None, uses api_base_url()
+            max_connections (int): Size of the HTTP connection pool
+            min_poll_interval (float): Shortest polling interval in seconds
+            max_poll_interval (float): Longest polling interval in seconds
+            webhook_port (Optional[int]): Port of the local webhook listener (0 for a free port).
+                If None, completion is detected by polling only
+            webhook_host (str): Address the webhook listener binds to
+            webhook_url (Optional[str]): Public base URL of the listener as seen by AssemblyAI
+                (e.g. a tunnel). If None, http://webhook_host:port is used
+        """
+        self.api_key = api_key
+        self.base_url = (base_url or api_base_url()).rstrip('/')
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        
+        self.session = requests.Session()
+        # Only idempotent GETs are retried, a retried POST could create a second transcript
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset({"GET"}))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_connections, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["authorization"] = api_key
+        
+        self._pending: Dict[str, _PendingTranscript] = {}
+        self._queue: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._poller = None
+        
+        self.webhook_token = secrets.token_urlsafe(16)
+        self._webhook_server = None
+        self.webhook_url = None
+        if webhook_port is not None:
+            self._webhook_server = ThreadingHTTPServer((webhook_host, webhook_port), _WebhookHandler)
+            self._webhook_server.daemon_threads = True
+            self._webhook_server.client = self
+            port = self._webhook_server.server_address[1]
+            self.webhook_url = (webhook_url or f"http://{webhook_host}:{port}").rstrip('/')
+            threading.Thread(target=self._webhook_server.serve_forever, name="transcript-webhook",
+                             daemon=True).start()
+            print(f"Listening for transcript webhooks on {webhook_host}:{port}")
+    
+    def _schedule(self, pending: _PendingTranscript, when: float):
+        """Queue the next poll of a transcript (caller holds the condition)."""
+        if pending.deadline is not None:
+            when = min(when, pending.deadline)
+        pending.next_poll = when
+        heapq.heappush(self._queue, (when, next(self._sequence), pending.transcript_id))
+        self._condition.notify()
+    
+    def _ensure_poller(self):
+        """Start the poller thread (caller holds the condition)."""
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll_loop, name="transcript-poller", daemon=True)
+            self._poller.start()
+    
+    def submit(self,
+               audio_path: str,
+               language_code: str = "en",
+               speakers_expected: Optional[int] = None,
+               timeout: Optional[float] = None,
+               upload_codec: Optional[Literal["opus", "mp3"]] = None,
+               start: Optional[float] = None,
+               duration: Optional[float] = None) -> Future:
+        """
+        Uploads an audio file (or a part of it) and starts its transcription.
+        
+        The upload happens in the calling thread; waiting for the transcript does not.
+        
+        Args:
+            audio_path (str): Path to the audio (or video) file
+            language_code (str): Language code for transcription
+            speakers_expected (Optional[int]): Expected number of speakers
+            timeout (Optional[float]): Seconds until the transcript fails with TranscriptionTimeout
+            upload_codec (Optional[str]): Upload encoding, "opus" or "mp3". If None, Opus when available
+            start (Optional[float]): Offset in seconds of the part to transcribe
+            duration (Optional[float]): Seconds to transcribe. If None, up to the end
+        
+        Returns:
+            Future: Resolves to List[Utterance], with times relative to start. Cancelling it
+                stops tracking the transcript
+        """
+        upload_url = upload_audio_stream(audio_path, self.api_key, upload_codec, session=self.session,
+                                         start=start, duration=duration)
+        if duration is None:
+            duration = audio_duration(audio_path)
+            if duration is not None and start:
+                duration -= start
+        return self.submit_url(upload_url, language_code, speakers_expected, timeout, duration=duration)
+    
+    def submit_url(self,
+                   audio_url: str,
+                   language_code: str = "en",
+                   speakers_expected: Optional[int] = None,
+                   timeout: Optional[float] = None,
+                   duration: Optional[float] = None) -> Future:
+        """
+        Starts the transcription of already uploaded audio.
+        
+        Args:
+            audio_url (str): URL of the audio (e.g. an upload URL)
+            language_code (str): Language code for transcription
+            speakers_expected (Optional[int]): Expected number of speakers
+            timeout (Optional[float]): Seconds until the transcript fails with TranscriptionTimeout
+            duration (Optional[float]): Audio duration in seconds, used to pace the polling
+        
+        Returns:
+            Future: Resolves to List[Utterance]
+        """
+        if self._closed:
+            raise TranscriptionError("Transcription client is closed")
+        
+        data: Dict[str, Any] = {
+            "audio_url": audio_url,
+            "language_code": language_code,
+            "speaker_labels": True
+        }
+        if speakers_expected:
+            data["speakers_expected"] = speakers_expected
+        if self.webhook_url:
+            data["webhook_url"] = f"{self.webhook_url}{WEBHOOK_PATH}"
+            data["webhook_auth_header_name"] = WEBHOOK_AUTH_HEADER
+            data["webhook_auth_header_value"] = self.webhook_token
+        
+        try:
+            response = self.session.post(f"{self.base_url}/v2/transcript", json=data, timeout=HTTP_TIMEOUT)
+        except requests.RequestException as e:
+            raise TranscriptionError(f"Failed to start transcription: {str(e)}")
+        if response.status_code != 200:
+            raise TranscriptionError(f"Failed to start transcription: {response.text}")
+        transcript_id = response.json()['id']
+        
+        first_delay, interval = poll_schedule(duration, self.min_poll_interval, self.max_poll_interval)
+        if self.webhook_url:
+            first_delay = interval = max(first_delay, WEBHOOK_FALLBACK_INTERVAL)
+        
+        now = time.monotonic()
+        future = Future()
+        pending = _PendingTranscript(
+            transcript_id=transcript_id,
+            future=future,
+            submitted=now,
+            deadline=now + timeout if timeout else None,
+            interval=interval
+        )
+        with self._condition:
+            self._pending[transcript_id] = pending
+            self._schedule(pending, now + first_delay)
+            self._ensure_poller()
+        future.add_done_callback(lambda _: self._forget(transcript_id))
+        
+        print(f"Transcript {transcript_id} queued, first check in {first_delay:.0f}s")
+        return future
+    
+    def transcribe(self,
+                   audio_path: str,
+                   language_code: str = "en",
+                   speakers_expected: Optional[int] = None,
+                   timeout: Optional[float] = None,
+                   upload_codec: Optional[Literal["opus", "mp3"]] = None) -> List[Utterance]:
+        """
+        Transcribes an audio file and waits for the result.
+        
+        Args:
+            audio_path (str): Path to the audio (or video) file
+            language_code (str): Language code for transcription
+            speakers_expected (Optional[int]): Expected number of speakers
+            timeout (Optional[float]): Seconds to wait for the transcript
+            upload_codec (Optional[str]): Upload encoding, "opus" or "mp3". If None, Opus when available
+        
+        Returns:
+            List[Utterance]: List of transcribed utterances with speaker information
+        """
+        future = self.submit(audio_path, language_code, speakers_expected, timeout, upload_codec)
+        try:
+            return future.result()
+        except BaseException:
+            # Stop tracking the transcript when the wait is interrupted (e.g. Ctrl+C)
+            future.cancel()
+            raise
+    
+    def notify(self, transcript_id: str):
+        """Poll a transcript right away, e.g. after a webhook callback."""
+        with self._condition:
+            pending = self._pending.get(transcript_id)
+            if pending is not None:
+                self._schedule(pending, time.monotonic())
+    
+    def pending_count(self) -> int:
+        """Get the number of transcripts that are still being waited for."""
+        with self._condition:
+            return len(self._pending)
+    
+    def _forget(self, transcript_id: str):
+        """Stop tracking a transcript whose future is done (or cancelled)."""
+        with self._condition:
+            self._pending.pop(transcript_id, None)
+    
+    def _resolve(self, pending: _PendingTranscript, result: Any = None, error: Optional[BaseException] = None):
+        """Complete the future of a transcript unless it was cancelled meanwhile."""
+        try:
+            if error is not None:
+                pending.future.set_exception(error)
+            else:
+                pending.future.set_result(result)
+        except InvalidStateError:
+            pass
+    
+    def _poll_loop(self):
+        """Poll due transcripts one at a time until the client is closed."""
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    if not self._queue:
+                        self._condition.wait()
+                        continue
+                    when, _, transcript_id = self._queue[0]
+                    delay = when - time.monotonic()
+                    if delay > 0:
+                        self._condition.wait(delay)
+                        continue
+                    heapq.heappop(self._queue)
+                    pending = self._pending.get(transcript_id)
+                    # Entries superseded by a later _schedule call are skipped
+                    if pending is not None and pending.next_poll == when:
+                        break
+            
+            if pending.future.cancelled():
+                continue
+            try:
+                self._poll(pending)
+            except Exception as e:
+                # Never let one transcript take the poller (and every other transcript) down
+                self._resolve(pending, error=TranscriptionError(f"Polling failed: {str(e)}"))
+    
+    def _poll(self, pending: _PendingTranscript):
+        """Check a transcript once and resolve or reschedule it."""
+        pending.polls += 1
+        now = time.monotonic()
+        transcription = None
+        try:
+            response = self.session.get(f"{self.base_url}/v2/transcript/{pending.transcript_id}",
+                                        timeout=HTTP_TIMEOUT)
+            if response.status_code == 200:
+                transcription = response.json()
+            elif response.status_code != 429 and response.status_code < 500:
+                self._resolve(pending, error=TranscriptionError(
+                    f"Polling transcript {pending.transcript_id} failed: {response.text}"))
+                return
+        except (requests.RequestException, ValueError):
+            # Transient failures are retried on the normal schedule
+            pass
+        
+        if transcription is not None:
+            status = transcription.get('status')
+            if status == 'completed':
+                elapsed = time.monotonic() - pending.submitted
+                print(f"Transcript {pending.transcript_id} completed in {elapsed:.0f}s ({pending.polls} polls)")
+                try:
+                    self._resolve(pending, parse_transcript(transcription))
+                except (KeyError, TypeError, ValueError) as e:
+                    self._resolve(pending, error=TranscriptionError(f"Malformed transcript: {str(e)}"))
+                return
+            if status == 'error':
+                self._resolve(pending, error=TranscriptionError(
+                    f"Transcription failed: {transcription.get('error')}"))
+                return
+        
+        if pending.deadline is not None and now >= pending.deadline:
+            self._resolve(pending, error=TranscriptionTimeout(
+                f"Transcript {pending.transcript_id} not completed after "
+                f"{now - pending.submitted:.0f}s ({pending.polls} polls)"))
+            return
+        
+        with self._condition:
+            if pending.transcript_id in self._pending:
+                self._schedule(pending, now + pending.interval)
+                pending.interval = min(pending.interval * POLL_BACKOFF, self.max_poll_interval)
+    
+    def close(self):
+        """Stop the poller and webhook listener and fail transcripts still pending."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            pending = list(self._pending.values())
+            self._condition.notify_all()
+        for item in pending:
+            self._resolve(item, error=TranscriptionError("Transcription client closed"))
+        if self._poller is not None:
+            self._poller.join(timeout=HTTP_TIMEOUT)
+        if self._webhook_server is not None:
+            self._webhook_server.shutdown()
+            self._webhook_server.server_close()
+        self.session.close()
+    
+    def __enter__(self):
+        """Context manager entry point."""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit point - closes the client."""
+        self.close()
+
+_shared_clients: Dict[str, TranscriptionClient] = {}
+_shared_lock = threading.Lock()
+
+def shared_client(api_key: str) -> TranscriptionClient:
+    """Get the process-wide client for an API key, creating it on first use."""
+    with _shared_lock:
+        client = _shared_clients.get(api_key)
+        if client is None or client._closed:
+            client = TranscriptionClient(api_key)
+            _shared_clients[api_key] = client
+        return client
@@ -0,0 +1,247 @@
+"""
+Module for translating text chunks concurrently with rate limiting and retries.
+"""
+import concurrent.futures
+import random
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional, Protocol
+import requests
+
+class TransientTranslationError(Exception):
+    """Raised by backends for failures that are worth retrying (rate limits, timeouts, 5xx)."""
+    pass
+
+class TranslationBackend(Protocol):
+    """Interface of a translation backend. Implementations must be safe to call from several threads."""
+    
+    def translate(self, text: str) -> str:
+        """Translate a single chunk of text."""
+        ...
+
+class GoogleTranslateBackend:
+    def __init__(self, source_lang: str = "auto", target_lang: str = "de"):
+        """
+        Initialize the Google Translate backend (via Deep Translator).
+        
+        Args:
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+        """
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self._local = threading.local()
+    
+    def translate(self, text: str) -> str:
+        """Translate a single chunk of text."""
+        from deep_translator import GoogleTranslator
+        from deep_translator.exceptions import RequestError, TooManyRequests
+        
+        # One translator per thread, the instances aren't meant to be shared
+        if not hasattr(self._local, "translator"):
+            self._local.translator = GoogleTranslator(source=self.source_lang, target=self.target_lang)
+        
+        try:
+            return self._local.translator.translate(text) or ''
+        except (TooManyRequests, RequestError, requests.ConnectionError, requests.Timeout) as e:
+            raise TransientTranslationError(str(e)) from e
+
+class HTTPTranslationBackend:
+    def __init__(self,
+                 url: str,
+                 source_lang: str = "auto",
+                 target_lang: str = "de",
+                 api_key: Optional[str] = None,
+                 timeout: float = 30.0):
+        """
+        Initialize a backend for a LibreTranslate-compatible HTTP API.
+        
+        Requests are POSTed as JSON {"q", "source", "target", "format"} and
+        the response must contain "translatedText".
+        
+        Args:
+            url (str): Translation endpoint, e.g. "http://localhost:5000/translate"
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+            api_key (Optional[str]): API key sent with each request
+            timeout (float): Request timeout in seconds
+        """
+        self.url = url
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = requests.Session()
+    
+    def translate(self, text: str) -> str:
+        """Translate a single chunk of text."""
+        payload = {
+            "q": text,
+            "source": self.source_lang,
+            "target": self.target_lang,
+            "format": "text"
+        }
+        if self.api_key:
+            payload["api_key"] = self.api_key
+        
+        try:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise TransientTranslationError(str(e)) from e
+        
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientTranslationError(f"HTTP {response.status_code}: {response.text[:200]}")
+        if response.status_code != 200:
+            raise Exception(f"Translation request failed: HTTP {response.status_code}: {response.text[:200]}")
+        
+        return response.json()["translatedText"]
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize a token bucket rate limiter.
+        
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Maximum number of tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0):
+        """Block until the requested number of tokens is available and take them."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Computes an exponential backoff delay with full jitter.
+    
+    Args:
+        attempt (int): Zero-based retry attempt
+        base_delay (float): Delay scale in seconds
+        max_delay (float): Upper bound of the delay in seconds
+    
+    Returns:
+        float: Delay in seconds
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+class ConcurrentTranslator:
+    def __init__(self,
+                 backend: TranslationBackend,
+                 max_workers: int = 4,
+                 requests_per_second: float = 5.0,
+                 burst: int = 5,
+                 max_retries: int = 5,
+                 base_delay: float = 1.0,
+                 max_delay: float = 30.0):
+        """
+        Initialize the concurrent translation executor.
+        
+        Args:
+            backend (TranslationBackend): Backend performing the actual translation
+            max_workers (int): Maximum number of chunks translated in parallel
+            requests_per_second (float): Sustained request rate (including retries)
+            burst (int): Number of requests that may be sent at once before rate limiting starts
+            max_retries (int): Maximum number of retries per chunk on transient failures
+            base_delay (float): Initial backoff delay in seconds
+            max_delay (float): Maximum backoff delay in seconds
+        """
+        self.backend = backend
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(requests_per_second, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.latencies: List[float] = []
+        self.retries = 0
+        self._stats_lock = threading.Lock()
+    
+    def _translate_chunk(self, chunk: str) -> str:
+        """Translate one chunk, retrying transient failures with backoff."""
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                result = self.backend.translate(chunk)
+                break
+            except TransientTranslationError as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+                print(f"Transient translation error ({str(e)[:100]}), retrying in {delay:.1f}s...")
+                with self._stats_lock:
+                    self.retries += 1
+                time.sleep(delay)
+                attempt += 1
+        
+        with self._stats_lock:
+            self.latencies.append(time.perf_counter() - start)
+        return result
+    
+    def translate_chunks(self, chunks: List[str]) -> List[str]:
+        """
+        Translates chunks concurrently.
+        
+        Args:
+            chunks (List[str]): Text chunks to translate
+        
+        Returns:
+            List[str]: Translated chunks in input order
+        """
+        if not chunks:
+            return []
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            futures = [executor.submit(self._translate_chunk, chunk) for chunk in chunks]
+            
+            done = 0
+            for _ in concurrent.futures.as_completed(futures):
+                done += 1
+                print(f"Translated chunk {done}/{len(chunks)}")
+            
+            return [future.result() for future in futures]
+    
+    def reset_stats(self):
+        """Clear the latency statistics, e.g. before reusing the translator for another text."""
+        with self._stats_lock:
+            self.latencies = []
+            self.retries = 0
+    
+    def latency_stats(self) -> Dict[str, float]:
+        """
+        Summarizes per-chunk latencies (including retries and rate limit waits) since the last reset.
+        
+        Returns:
+            Dict[str, float]: Chunk count, retries, mean, p50, p95 and max latency in seconds
+        """
+        with self._stats_lock:
+            latencies = sorted(self.latencies)
+            retries = self.retries
+        
+        if not latencies:
+            return {"chunks": 0, "retries": retries}
+        
+        return {
+            "chunks": len(latencies),
+            "retries": retries,
+            "mean_s": statistics.fmean(latencies),
+            "p50_s": latencies[len(latencies) // 2],
+            "p95_s": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "max_s": latencies[-1],
+        }
@@ -0,0 +1,121 @@
+"""
+Module for a persistent sentence-level translation memory backed by SQLite.
+"""
+import sqlite3
+import time
+import unicodedata
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+class TranslationMemory:
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the translation memory.
+        
+        Args:
+            db_path (Optional[str]): Path to the SQLite database. If None, uses
+                downloads/cache/translation_memory.sqlite in the project root
+        """
+        if db_path:
+            self.db_path = Path(db_path).absolute()
+        else:
+            # Get the project root directory (src's parent)
+            project_root = Path(__file__).parent.parent.parent
+            self.db_path = project_root / "downloads" / "cache" / "translation_memory.sqlite"
+        
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " source TEXT NOT NULL, source_lang TEXT NOT NULL, target_lang TEXT NOT NULL,"
+                " translation TEXT NOT NULL, created_at REAL NOT NULL,"
+                " hits INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (source, source_lang, target_lang))"
+            )
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the database (one per call, so the memory is thread-safe)."""
+        return sqlite3.connect(str(self.db_path), timeout=30)
+    
+    @staticmethod
+    def normalize(sentence: str) -> str:
+        """
+        Normalizes a source sentence for lookup.
+        
+        Args:
+            sentence (str): Source sentence
+        
+        Returns:
+            str: Sentence in Unicode NFC form with collapsed whitespace
+        """
+        return ' '.join(unicodedata.normalize('NFC', sentence).split())
+    
+    def lookup(self, sentences: Iterable[str], source_lang: str, target_lang: str) -> Dict[str, str]:
+        """
+        Looks up translations for normalized source sentences.
+        
+        Args:
+            sentences (Iterable[str]): Normalized source sentences
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+        
+        Returns:
+            Dict[str, str]: Translations of the sentences found in the memory
+        """
+        sentences = list(dict.fromkeys(sentences))
+        found = {}
+        
+        with closing(self._connect()) as conn, conn:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(sentences), 500):
+                batch = sentences[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = conn.execute(
+                    f"SELECT source, translation FROM translations"
+                    f" WHERE source_lang = ? AND target_lang = ? AND source IN ({placeholders})",
+                    [source_lang, target_lang] + batch
+                ).fetchall()
+                found.update(rows)
+            
+            if found:
+                conn.executemany(
+                    "UPDATE translations SET hits = hits + 1"
+                    " WHERE source = ? AND source_lang = ? AND target_lang = ?",
+                    [(source, source_lang, target_lang) for source in found]
+                )
+        
+        return found
+    
+    def store(self, translations: Dict[str, str], source_lang: str, target_lang: str):
+        """
+        Stores translations of normalized source sentences.
+        
+        Args:
+            translations (Dict[str, str]): Translations keyed by normalized source sentence
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations"
+                " (source, source_lang, target_lang, translation, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (source, source_lang, target_lang, translation, now)
+                    for source, translation in translations.items()
+                ]
+            )
+    
+    def size(self) -> Tuple[int, int]:
+        """
+        Gets the number of stored sentences and total lookups served.
+        
+        Returns:
+            Tuple[int, int]: (number of entries, total hits)
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM translations"
+            ).fetchone()
@@ -1,29 +1,43 @@
 """
 Module for translating text using Deep Translator.
 """
-from typing import List
-from deep_translator import GoogleTranslator
+from typing import Dict, List, Optional
+from .artifact_cache import ArtifactCache, hash_text
+from .translation_memory import TranslationMemory
+from .translation_executor import ConcurrentTranslator, GoogleTranslateBackend
 
-def chunk_text(text: str, max_length: int = 4500) -> List[str]:
+SENTENCE_SEPARATOR = "\n"
+
+def split_sentences(text: str) -> List[str]:
     """
-    Split text into chunks that respect sentence boundaries and max length.
+    Split text into sentences (roughly) at sentence-ending punctuation.
     
     Args:
         text (str): Text to split
-        max_length (int): Maximum length of each chunk
         
     Returns:
-        List[str]: List of text chunks
+        List[str]: List of sentences
     """
-    # Split into sentences (roughly)
     sentences = text.replace('! ', '!|').replace('? ', '?|').replace('. ', '.|').split('|')
+    return [sentence.strip() for sentence in sentences]
+
+def pack_sentences(sentences: List[str], max_length: int = 4500, separator: str = ' ') -> List[str]:
+    """
+    Pack sentences into chunks of at most max_length characters.
     
+    Args:
+        sentences (List[str]): Sentences to pack
+        max_length (int): Maximum length of each chunk
+        separator (str): String placed between sentences within a chunk
+        
+    Returns:
+        List[str]: List of text chunks
+    """
     chunks = []
     current_chunk = []
     current_length = 0
     
     for sentence in sentences:
-        sentence = sentence.strip()
         sentence_length = len(sentence)
         
         if current_length + sentence_length + 1 <= max_length:
@@ -31,43 +45,234 @@ def chunk_text(text: str, max_length: int = 4500) -> List[str]:
             current_length += sentence_length + 1
         else:
             if current_chunk:
-                chunks.append(' '.join(current_chunk))
+                chunks.append(separator.join(current_chunk))
             current_chunk = [sentence]
             current_length = sentence_length
     
     if current_chunk:
-        chunks.append(' '.join(current_chunk))
+        chunks.append(separator.join(current_chunk))
     
     return chunks
 
-def translate_text(text: str, target_lang: str = "de") -> str:
+def chunk_text(text: str, max_length: int = 4500) -> List[str]:
+    """
+    Split text into chunks that respect sentence boundaries and max length.
+    
+    Args:
+        text (str): Text to split
+        max_length (int): Maximum length of each chunk
+        
+    Returns:
+        List[str]: List of text chunks
+    """
+    return pack_sentences(split_sentences(text), max_length)
+
+def translate_sentences(sentences: List[str], translator: ConcurrentTranslator) -> List[str]:
+    """
+    Translates sentences with as few requests as possible.
+    
+    Sentences are packed into newline-separated chunks. If a translated chunk
+    doesn't split back into the same number of lines, its sentences are
+    translated one by one instead.
+    
+    Args:
+        sentences (List[str]): Sentences to translate
+        translator (ConcurrentTranslator): Translation executor
+        
+    Returns:
+        List[str]: Translated sentences in input order
+    """
+    chunks = pack_sentences(sentences, separator=SENTENCE_SEPARATOR)
+    print(f"Split {len(sentences)} sentences into {len(chunks)} chunks for translation")
+    
+    translated_chunks = translator.translate_chunks(chunks)
+    
+    translations = []
+    for i, (chunk, translated) in enumerate(zip(chunks, translated_chunks), 1):
+        chunk_sentences = chunk.split(SENTENCE_SEPARATOR)
+        translated_lines = (translated or '').split(SENTENCE_SEPARATOR)
+        
+        if len(translated_lines) != len(chunk_sentences):
+            print(f"Chunk {i} lost sentence boundaries, translating its sentences individually")
+            translated_lines = translator.translate_chunks(chunk_sentences)
+        
+        translations.extend(line.strip() for line in translated_lines)
+    
+    return translations
+
+def translate_text(text: str,
+                   target_lang: str = "de",
+                   cache: Optional[ArtifactCache] = None,
+                   source_lang: str = "auto",
+                   memory: Optional[TranslationMemory] = None,
+                   translator: Optional[ConcurrentTranslator] = None) -> str:
     """
     Translates text to target language using Deep Translator.
     
+    With a translation memory, only sentences that haven't been translated
+    before are sent to the translator. Chunks are translated concurrently.
+    
     Args:
         text (str): Text to translate
         target_lang (str): Target language code (default: "de" for German)
+        cache (Optional[ArtifactCache]): Artifact cache to reuse earlier translations of the same text
+        source_lang (str): Source language code (default: "auto" for detection)
+        memory (Optional[TranslationMemory]): Sentence-level translation memory
+        translator (Optional[ConcurrentTranslator]): Translation executor. If None, uses
+            Google Translate with the default concurrency and rate limits
         
     Returns:
         str: Translated text
     """
+    if cache:
+        cache_params = {"text": hash_text(text), "source": source_lang, "target": target_lang}
+        cached = cache.get_json("translate", cache_params)
+        if cached is not None:
+            print("Using cached translation")
+            return cached["text"]
+        
     try:
         # Initialize translator
-        translator = GoogleTranslator(source='auto', target=target_lang)
+        if translator is None:
+            translator = ConcurrentTranslator(GoogleTranslateBackend(source_lang, target_lang))
+        translator.reset_stats()
         
-        # Split text into chunks
-        chunks = chunk_text(text)
-        print(f"Split text into {len(chunks)} chunks for translation")
+        if memory:
+            translated_text = _translate_with_memory(text, translator, memory, source_lang, target_lang)
+        else:
+            # Split text into chunks
+            chunks = chunk_text(text)
+            print(f"Split text into {len(chunks)} chunks for translation")
+            
+            # Translate chunks concurrently and combine them in order
+            translated_text = ' '.join(translator.translate_chunks(chunks))
         
-        # Translate each chunk
-        translated_chunks = []
-        for i, chunk in enumerate(chunks, 1):
-            print(f"Translating chunk {i}/{len(chunks)}...")
-            translated = translator.translate(chunk)
-            translated_chunks.append(translated)
+        _print_latency(translator)
         
-        # Combine translated chunks
-        return ' '.join(translated_chunks)
+        if cache:
+            cache.put_json("translate", cache_params, {"text": translated_text})
+        return translated_text
         
     except Exception as e:
         raise Exception(f"Translation failed: {str(e)}")
+
+def translate_segments(texts: List[str],
+                       target_lang: str = "de",
+                       cache: Optional[ArtifactCache] = None,
+                       source_lang: str = "auto",
+                       memory: Optional[TranslationMemory] = None,
+                       translator: Optional[ConcurrentTranslator] = None) -> List[str]:
+    """
+    Translates each text (e.g. one utterance) on its own, keeping one translation per text.
+    
+    Texts are still packed into as few concurrent requests as possible; repeated
+    texts and translation memory hits aren't sent at all.
+    
+    Args:
+        texts (List[str]): Texts to translate
+        target_lang (str): Target language code (default: "de" for German)
+        cache (Optional[ArtifactCache]): Artifact cache to reuse earlier translations of the same texts
+        source_lang (str): Source language code (default: "auto" for detection)
+        memory (Optional[TranslationMemory]): Sentence-level translation memory
+        translator (Optional[ConcurrentTranslator]): Translation executor. If None, uses
+            Google Translate with the default concurrency and rate limits
+    
+    Returns:
+        List[str]: Translations in input order ("" for empty texts)
+    """
+    texts = [TranslationMemory.normalize(text) for text in texts]
+    if cache:
+        cache_params = {"segments": hash_text(SENTENCE_SEPARATOR.join(texts)), "source": source_lang,
+                        "target": target_lang}
+        cached = cache.get_json("translate", cache_params)
+        if cached is not None:
+            print("Using cached translation")
+            return cached["segments"]
+    
+    try:
+        if translator is None:
+            translator = ConcurrentTranslator(GoogleTranslateBackend(source_lang, target_lang))
+        translator.reset_stats()
+        
+        unique = [text for text in dict.fromkeys(texts) if text]
+        if memory:
+            translations = _lookup_or_translate(unique, translator, memory, source_lang, target_lang)
+        else:
+            translations = dict(zip(unique, translate_sentences(unique, translator))) if unique else {}
+        translated = [translations.get(text, '') for text in texts]
+        _print_latency(translator)
+        
+        if cache:
+            cache.put_json("translate", cache_params, {"segments": translated})
+        return translated
+    
+    except Exception as e:
+        raise Exception(f"Translation failed: {str(e)}")
+
+def _print_latency(translator: ConcurrentTranslator):
+    """Print the chunk latency statistics of a translation run."""
+    stats = translator.latency_stats()
+    if stats["chunks"]:
+        print(f"Chunk latency: mean {stats['mean_s']:.2f}s, p95 {stats['p95_s']:.2f}s, "
+              f"max {stats['max_s']:.2f}s ({stats['retries']} retries)")
+
+def _translate_with_memory(text: str,
+                           translator: ConcurrentTranslator,
+                           memory: TranslationMemory,
+                           source_lang: str,
+                           target_lang: str) -> str:
+    """
+    Translates text sentence by sentence, consulting the translation memory first.
+    
+    Args:
+        text (str): Text to translate
+        translator (ConcurrentTranslator): Translation executor used for cache misses
+        memory (TranslationMemory): Sentence-level translation memory
+        source_lang (str): Source language code
+        target_lang (str): Target language code
+        
+    Returns:
+        str: Translated text with sentences in their original order
+    """
+    sentences = [memory.normalize(sentence) for sentence in split_sentences(text)]
+    sentences = [sentence for sentence in sentences if sentence]
+    translations = _lookup_or_translate(sentences, translator, memory, source_lang, target_lang)
+    return ' '.join(translations[sentence] for sentence in sentences)
+    
+def _lookup_or_translate(sentences: List[str],
+                         translator: ConcurrentTranslator,
+                         memory: TranslationMemory,
+                         source_lang: str,
+                         target_lang: str) -> Dict[str, str]:
+    """
+    Translates normalized sentences, consulting the translation memory first.
+    
+    Args:
+        sentences (List[str]): Normalized, non-empty source sentences (may repeat)
+        translator (ConcurrentTranslator): Translation executor used for cache misses
+        memory (TranslationMemory): Sentence-level translation memory
+        source_lang (str): Source language code
+        target_lang (str): Target language code
+    
+    Returns:
+        Dict[str, str]: Translation of each distinct sentence
+    """
+    translations = memory.lookup(sentences, source_lang, target_lang)
+    misses = [sentence for sentence in dict.fromkeys(sentences) if sentence not in translations]
+    
+    hits = sum(1 for sentence in sentences if sentence in translations)
+    hit_rate = hits / len(sentences) * 100 if sentences else 0.0
+    print(f"Translation memory: {hits}/{len(sentences)} sentences reused ({hit_rate:.1f}% hit rate), "
+          f"{len(misses)} unique sentences to translate")
+    
+    if misses:
+        new_translations = dict(zip(misses, translate_sentences(misses, translator)))
+        # Don't remember empty results, they are more likely failures than translations
+        memory.store(
+            {source: translation for source, translation in new_translations.items() if translation},
+            source_lang,
+            target_lang
+        )
+        translations.update(new_translations)
+    
+    return translations
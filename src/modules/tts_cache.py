@@ -0,0 +1,222 @@
+"""
+Module for caching synthesized speech per sentence as int16 PCM arrays.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+class SynthesisCache:
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the synthesis cache.
+        
+        Each entry is stored as one .npy file of int16 samples that can be
+        memory-mapped on load, with an SQLite index for lookups and LRU eviction.
+        
+        Args:
+            cache_dir (Optional[str]): Cache directory. If None, uses downloads/cache/tts in the project root
+            max_bytes (int): Maximum total size of cached audio before LRU eviction
+        """
+        if cache_dir:
+            self.cache_dir = Path(cache_dir).absolute()
+        else:
+            # Get the project root directory (src's parent)
+            project_root = Path(__file__).parent.parent.parent
+            self.cache_dir = project_root / "downloads" / "cache" / "tts"
+        self.index_path = self.cache_dir / "index.sqlite"
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, sample_rate INTEGER NOT NULL, num_samples INTEGER NOT NULL,"
+                " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the cache index (one per call, so the cache is thread-safe)."""
+        return sqlite3.connect(str(self.index_path), timeout=30)
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize sentence text for lookup by collapsing whitespace."""
+        return ' '.join(text.split())
+    
+    def make_key(self,
+                 model_type: str,
+                 model_name: str,
+                 speaker: Optional[str],
+                 text: str,
+                 seed: Optional[int] = None,
+                 index: int = 0) -> str:
+        """
+        Builds the cache key of a synthesized sentence.
+        
+        Args:
+            model_type (str): TTS model type ("tacotron2" or "bark")
+            model_name (str): Model name or variant
+            speaker (Optional[str]): Speaker ID or Bark history prompt
+            text (str): Sentence text
+            seed (Optional[int]): Seed of seeded Bark generation, None if unseeded
+            index (int): Script position of a seeded Bark chunk, which its seed is derived from
+        
+        Returns:
+            str: Hex digest identifying the entry
+        """
+        key_parts = [model_type, model_name, speaker, self.normalize(text)]
+        if seed is not None:
+            key_parts += [seed, index]
+        payload = json.dumps(key_parts)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _entry_path(self, key: str) -> Path:
+        """Get the storage path of an entry."""
+        return self.cache_dir / key[:2] / f"{key}.npy"
+    
+    def get(self,
+            model_type: str,
+            model_name: str,
+            speaker: Optional[str],
+            text: str,
+            seed: Optional[int] = None,
+            index: int = 0) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Looks up the synthesized audio of a sentence.
+        
+        Args:
+            model_type (str): TTS model type
+            model_name (str): Model name or variant
+            speaker (Optional[str]): Speaker ID or Bark history prompt
+            text (str): Sentence text
+            seed (Optional[int]): Seed of seeded Bark generation, None if unseeded
+            index (int): Script position of a seeded Bark chunk
+        
+        Returns:
+            Optional[Tuple[np.ndarray, int]]: Read-only memory-mapped int16 samples and
+                sample rate, or None on a miss
+        """
+        key = self.make_key(model_type, model_name, speaker, text, seed, index)
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT sample_rate FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            
+            try:
+                samples = np.load(self._entry_path(key), mmap_mode='r')
+            except (FileNotFoundError, ValueError):
+                # Entry without data (deleted or truncated file), treat as a miss
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        
+        self.hits += 1
+        return samples, row[0]
+    
+    def put(self,
+            model_type: str,
+            model_name: str,
+            speaker: Optional[str],
+            text: str,
+            audio: np.ndarray,
+            sample_rate: int,
+            seed: Optional[int] = None,
+            index: int = 0):
+        """
+        Stores the synthesized audio of a sentence.
+        
+        Args:
+            model_type (str): TTS model type
+            model_name (str): Model name or variant
+            speaker (Optional[str]): Speaker ID or Bark history prompt
+            text (str): Sentence text
+            audio (np.ndarray): Float samples in [-1, 1] or int16 samples
+            sample_rate (int): Sample rate in Hz
+            seed (Optional[int]): Seed of seeded Bark generation, None if unseeded
+            index (int): Script position of a seeded Bark chunk
+        """
+        key = self.make_key(model_type, model_name, speaker, text, seed, index)
+        samples = to_int16(audio)
+        
+        entry_path = self._entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write under a temporary name first so readers never see a partial file
+        partial_path = entry_path.with_name(f"{key}.{os.getpid()}.partial.npy")
+        np.save(partial_path, samples)
+        os.replace(partial_path, entry_path)
+        
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, sample_rate, num_samples, size, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, sample_rate, len(samples), entry_path.stat().st_size, time.time())
+            )
+        self.prune()
+    
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Evicts least recently used entries until the cache fits within the size limit.
+        
+        Args:
+            max_bytes (Optional[int]): Size limit in bytes. If None, uses the configured limit
+        
+        Returns:
+            int: Number of bytes freed
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        freed = 0
+        
+        with closing(self._connect()) as conn, conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= limit:
+                return 0
+            
+            for key, size in conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC"
+            ).fetchall():
+                if total <= limit:
+                    break
+                try:
+                    self._entry_path(key).unlink()
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.error(f"Error while evicting TTS cache entry {key}: {str(e)}")
+                    continue
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                freed += size
+        
+        return freed
+
+def to_int16(audio: np.ndarray) -> np.ndarray:
+    """
+    Converts audio samples to int16 PCM.
+    
+    Args:
+        audio (np.ndarray): Float samples in [-1, 1] or int16 samples
+    
+    Returns:
+        np.ndarray: int16 samples
+    """
+    audio = np.asarray(audio)
+    if audio.dtype == np.int16:
+        return audio
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
@@ -3,15 +3,17 @@ Module for generating speech from text using either Tacotron2 or Bark TTS models
 """
 from pathlib import Path
 import re
-from typing import Optional, Literal, List, Tuple
-import torch
-from TTS.api import TTS
-from scipy.io import wavfile
-from bark import SAMPLE_RATE, generate_audio, preload_models
-from pydub import AudioSegment
+from typing import Any, Dict, Optional, Literal, List, Tuple, Iterator
 import numpy as np
 from .file_manager import FileManager
 from .cleanup import TempCleanup
+from .artifact_cache import ArtifactCache, hash_text
+from .tts_cache import SynthesisCache, to_int16
+from .wav_writer import WavWriter
+from .media_info import media_duration
+from .time_stretch import time_stretch_wav
+from .tts_worker_pool import TacotronProcessPool
+from .tts_server import TTSClient, TTSServerError
 import concurrent.futures
 from tqdm import tqdm
 import os
@@ -19,34 +21,137 @@ import os
 os.environ["SUNO_OFFLOAD_CPU"] = "False"     # CPU Offloading aktivieren
 os.environ["SUNO_USE_SMALL_MODELS"] = "False" # Kleine Modelle verwenden
 
+TACOTRON2_MODEL_NAME = "tts_models/de/thorsten/tacotron2-DDC"
+TACOTRON2_SENTENCE_GAP = 10000  # Silence samples between sentences, as inserted by Coqui TTS
+BARK_SAMPLE_RATE = 24000  # bark.SAMPLE_RATE, kept here so Tacotron2 runs don't import Bark
+
 class TTSGenerator:
-    def __init__(self, model_type: Literal["tacotron2", "bark"] = "tacotron2", use_gpu: bool = True):
+    def __init__(self,
+                 model_type: Literal["tacotron2", "bark"] = "tacotron2",
+                 use_gpu: bool = True,
+                 cache: Optional[ArtifactCache] = None,
+                 synthesis_cache: Optional[SynthesisCache] = None,
+                 bark_batch_size: Optional[int] = 1,
+                 seed: Optional[int] = None,
+                 num_workers: Optional[int] = 1,
+                 threads_per_worker: int = 2,
+                 server_socket: Optional[str] = None):
         """
         Initialize TTS Generator with choice of model.
         
         Args:
             model_type (str): Type of TTS model to use ("tacotron2" or "bark")
             use_gpu (bool): Whether to use GPU acceleration
+            cache (Optional[ArtifactCache]): Artifact cache to reuse speech generated for the same text
+            synthesis_cache (Optional[SynthesisCache]): Per-sentence cache consulted before running the model
+            bark_batch_size (Optional[int]): Bark chunks generated side by side in worker processes
+                (see bark_batch). 1 runs chunks one by one in this process, None chooses the number
+                of workers from available RAM
+            seed (Optional[int]): Seed for reproducible Bark output, each chunk is seeded from it and
+                its position. The worker processes always seed (default 0); their output is bit for
+                bit that of per-chunk generation with the same seed and torch thread count
+            num_workers (Optional[int]): Tacotron2 worker processes. 1 synthesizes in this process,
+                None starts one worker per threads_per_worker CPUs
+            threads_per_worker (int): Torch threads of each Tacotron2 or Bark worker process
+            server_socket (Optional[str]): Socket of a resident TTS server (see tts_server) to
+                synthesize on instead of loading the model. If None, uses $TTS_SERVER_SOCKET or the
+                default socket when a server with this model ready is running there; "" disables it
         """
         self.model_type = model_type
         self.use_gpu = use_gpu
+        self.cache = cache
+        self.synthesis_cache = synthesis_cache
+        self.bark_batch_size = bark_batch_size
+        self.seed = seed
         self.file_manager = FileManager()
         self.temp_cleanup = TempCleanup()
+        self.worker_pool = None
+        self.bark_pool = None
+        self.server = self._connect_server(server_socket)
         
-        if model_type == "tacotron2":
+        if self.server is not None:
+            # The resident server already has the model loaded
+            self.model = None
+            if model_type == "bark":
+                self.speaker = "v2/de_speaker_6"  # German male voice
+        elif model_type == "tacotron2" and num_workers != 1:
+            # The workers load their own copy of the model, the parent doesn't need one
+            self.model_name = TACOTRON2_MODEL_NAME
+            self.model = None
+            self.worker_pool = TacotronProcessPool(
+                self.model_name,
+                num_workers=num_workers,
+                threads_per_worker=threads_per_worker
+            )
+        elif model_type == "tacotron2":
+            # Backends are imported only for the model that is actually used
+            import torch
+            from TTS.api import TTS
+            self.model_name = TACOTRON2_MODEL_NAME
             self.model = TTS(
-                model_name="tts_models/de/thorsten/tacotron2-DDC",
+                model_name=self.model_name,
                 progress_bar=True,
             )
             if use_gpu and torch.cuda.is_available():
                 self.model.to('cuda')
+        elif bark_batch_size != 1:
+            # The workers load their own copy of the models, the parent doesn't need one
+            from .bark_batch import BarkProcessPool
+            self.model_name = "bark_small" if os.environ.get("SUNO_USE_SMALL_MODELS") == "True" else "bark"
+            self.speaker = "v2/de_speaker_6"  # German male voice
+            self.bark_pool = BarkProcessPool(bark_batch_size, threads_per_worker=threads_per_worker)
         else:  # bark
+            import torch
+            from bark import preload_models
             if use_gpu and not torch.cuda.is_available():
                 print("Warning: GPU requested but not available. Using CPU instead.")
             # Download and load all models
             preload_models()
+            self.model_name = "bark_small" if os.environ.get("SUNO_USE_SMALL_MODELS") == "True" else "bark"
             self.speaker = "v2/de_speaker_6"  # German male voice
 
+    def _connect_server(self, server_socket: Optional[str]) -> Optional[TTSClient]:
+        """
+        Connects to a resident TTS server that has this generator's model ready.
+        
+        Args:
+            server_socket (Optional[str]): Socket path, None for the default, "" to not use a server
+        
+        Returns:
+            Optional[TTSClient]: Client of the server, or None to load the model locally
+        """
+        if server_socket == "":
+            return None
+        
+        client = TTSClient(server_socket)
+        if not os.path.exists(client.socket_path):
+            if server_socket:
+                print(f"Warning: No TTS server at {server_socket}. Loading the model locally.")
+            return None
+        
+        try:
+            status = client.model_status(self.model_type)
+        except TTSServerError as e:
+            status = {"ready": False, "state": str(e)}
+        if not status["ready"]:
+            print(f"Warning: TTS server has no {self.model_type} model ready ({status['state']}). "
+                  f"Loading the model locally.")
+            client.close()
+            return None
+        
+        print(f"Using TTS server at {client.socket_path}")
+        self.model_name = status["model_name"]
+        return client
+
+    @property
+    def bark_seed(self) -> Optional[int]:
+        """Seed of Bark generation: the configured one, 0 in the worker pool (which always seeds), or None."""
+        if self.model_type != "bark":
+            return None
+        if self.seed is None and self.bark_pool is not None:
+            return 0
+        return self.seed
+
     def preprocess_text(self, text: str) -> str:
         """Preprocess text to ensure consistent formatting."""
         # Remove extra whitespace
@@ -85,6 +190,130 @@ class TTSGenerator:
         
         return chunks
 
+    def synthesize_chunk(self,
+                         text: str,
+                         speaker: Optional[str] = None,
+                         index: int = 0) -> Tuple[np.ndarray, int]:
+        """
+        Synthesizes a single sentence or chunk, consulting the synthesis cache first.
+        
+        Args:
+            text (str): Text to synthesize
+            speaker (Optional[str]): Speaker preset (for Bark) or speaker ID (for Tacotron2)
+            index (int): Script position of a Bark chunk, seeds its generation when a seed is set
+        
+        Returns:
+            Tuple[np.ndarray, int]: int16 samples and sample rate
+        """
+        if self.model_type == "bark":
+            speaker = speaker or self.speaker
+        # Seeded Bark output depends on the seed and the chunk position
+        seed = self.bark_seed
+        
+        if self.synthesis_cache:
+            cached = self.synthesis_cache.get(self.model_type, self.model_name, speaker, text, seed, index)
+            if cached is not None:
+                return cached
+        
+        if self.server is not None:
+            audio, sample_rate = self.server.synthesize(self.model_type, text, speaker, seed=seed, index=index)
+        elif self.bark_pool is not None:
+            audio, _ = next(self.bark_pool.imap([text], speaker, seed, [index]))
+            sample_rate = BARK_SAMPLE_RATE
+        elif self.worker_pool is not None:
+            audio, sample_rate = next(self.worker_pool.imap([text], speaker))
+        elif self.model_type == "tacotron2":
+            audio = np.asarray(self.model.tts(text=text, speaker=speaker), dtype=np.float32)
+            sample_rate = self.model.synthesizer.output_sample_rate
+        elif seed is not None:  # bark
+            from .bark_batch import generate_audio_seeded
+            audio = generate_audio_seeded(text, speaker, seed, index)
+            sample_rate = BARK_SAMPLE_RATE
+        else:  # bark
+            from bark import generate_audio
+            audio = generate_audio(text, history_prompt=speaker)
+            sample_rate = BARK_SAMPLE_RATE
+        
+        samples = to_int16(audio)
+        if self.synthesis_cache:
+            self.synthesis_cache.put(self.model_type, self.model_name, speaker, text, samples, sample_rate,
+                                     seed, index)
+        
+        return samples, sample_rate
+
+    def synthesize_many(self, texts: List[str], speaker: Optional[str] = None) -> Iterator[Tuple[np.ndarray, int]]:
+        """
+        Synthesizes several sentences, in parallel when a Tacotron2 or Bark worker pool is in use.
+        
+        Args:
+            texts (List[str]): Texts to synthesize, Bark chunks in script order
+            speaker (Optional[str]): Speaker preset (for Bark) or speaker ID (for Tacotron2)
+        
+        Yields:
+            Tuple[np.ndarray, int]: int16 samples and sample rate per text, in input order
+        """
+        if self.worker_pool is None and self.bark_pool is None:
+            for i, text in enumerate(texts):
+                yield self.synthesize_chunk(text, speaker, index=i)
+            return
+        
+        if self.model_type == "bark":
+            speaker = speaker or self.speaker
+        seed = self.bark_seed
+        
+        cached = {}
+        if self.synthesis_cache:
+            for i, text in enumerate(texts):
+                entry = self.synthesis_cache.get(self.model_type, self.model_name, speaker, text, seed, i)
+                if entry is not None:
+                    cached[i] = entry
+        
+        misses = [i for i in range(len(texts)) if i not in cached]
+        if self.bark_pool is not None:
+            generated = (
+                (to_int16(audio), BARK_SAMPLE_RATE)
+                for audio, _ in self.bark_pool.imap([texts[i] for i in misses], speaker, seed, misses)
+            )
+        else:
+            generated = self.worker_pool.imap([texts[i] for i in misses], speaker)
+        for i, text in enumerate(texts):
+            if i in cached:
+                yield cached[i]
+                continue
+            samples, sample_rate = next(generated)
+            if self.synthesis_cache:
+                self.synthesis_cache.put(self.model_type, self.model_name, speaker, text, samples, sample_rate,
+                                         seed, i)
+            yield samples, sample_rate
+
+    def synthesize_segments(self,
+                            texts: List[str],
+                            speaker: Optional[str] = None) -> Iterator[Tuple[np.ndarray, int]]:
+        """
+        Synthesizes one clip per text, e.g. per translated utterance of a dubbing timeline.
+        
+        The sentences (Bark: chunks) of all texts are queued together, so a
+        Tacotron2 worker pool stays busy across text boundaries.
+        
+        Args:
+            texts (List[str]): Non-empty texts to synthesize
+            speaker (Optional[str]): Speaker preset (for Bark) or speaker ID (for Tacotron2)
+        
+        Yields:
+            Tuple[np.ndarray, int]: int16 samples and sample rate per text, in input order
+        """
+        max_chars = 0 if self.model_type == "tacotron2" else 150
+        chunks_per_text = [self.split_text_into_chunks(text, max_chars=max_chars) for text in texts]
+        results = self.synthesize_many([chunk for chunks in chunks_per_text for chunk in chunks], speaker)
+        for chunks in chunks_per_text:
+            parts = []
+            for i in range(len(chunks)):
+                samples, sample_rate = next(results)
+                if i > 0 and self.model_type == "tacotron2":
+                    parts.append(np.zeros(TACOTRON2_SENTENCE_GAP, dtype=np.int16))
+                parts.append(samples)
+            yield np.concatenate(parts), sample_rate
+
     def generate_speech_batch(self,
                             texts: List[str],
                             speaker: Optional[str] = None,
@@ -107,6 +336,9 @@ class TTSGenerator:
             # For Bark, process sequentially as it's more memory intensive
             return [self.generate_speech(text, speaker) for text in tqdm(texts)]
         
+        if self.worker_pool is not None:
+            return [path for path in self._generate_batch_with_pool(texts, speaker) if path]
+        
         output_paths = []
         
         def process_text(text: str) -> str:
@@ -129,6 +361,80 @@ class TTSGenerator:
         
         return output_paths
 
+    def _generate_batch_with_pool(self, texts: List[str], speaker: Optional[str] = None) -> List[Optional[str]]:
+        """
+        Generates one audio file per text with the Tacotron2 worker pool.
+        
+        Texts found in the artifact cache are reused, the sentences of all
+        other texts are queued at once, so the workers stay busy across text
+        boundaries. If synthesis fails, the texts not written yet are generated
+        one by one, so a single bad text doesn't lose the whole batch.
+        
+        Args:
+            texts (List[str]): Preprocessed texts
+            speaker (Optional[str]): Speaker ID
+        
+        Returns:
+            List[Optional[str]]: Paths to the generated audio files in input order,
+                None for texts that failed
+        """
+        output_paths: List[Optional[str]] = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if not text:
+                print(f"Error processing text: {text[:50]}... - no text to synthesize")
+                continue
+            if self.cache:
+                output_path = str(self.file_manager.get_temp_path("tts_audio", ".wav"))
+                if self.cache.get_file("tts", self._speech_cache_params(text, speaker), output_path):
+                    output_paths[i] = output_path
+                    continue
+            pending.append(i)
+        
+        sentences_per_text = {i: self.split_text_into_chunks(texts[i], max_chars=0) for i in pending}
+        results = self.synthesize_many([s for i in pending for s in sentences_per_text[i]], speaker)
+        
+        for position, i in enumerate(tqdm(pending)):
+            output_path = str(self.file_manager.get_temp_path("tts_audio", ".wav"))
+            try:
+                with WavWriter(output_path) as writer:
+                    for n in range(len(sentences_per_text[i])):
+                        if n > 0:
+                            writer.write_silence(TACOTRON2_SENTENCE_GAP)
+                        writer.write(*next(results))
+            except Exception as e:
+                Path(output_path).unlink(missing_ok=True)
+                # The failed sentence may belong to any text still queued
+                print(f"Batch synthesis failed ({str(e)}), generating the remaining texts one by one")
+                for j in pending[position:]:
+                    output_paths[j] = self._generate_speech_or_none(texts[j], speaker)
+                break
+            if self.cache:
+                self.cache.put_file("tts", self._speech_cache_params(texts[i], speaker), output_path)
+            output_paths[i] = output_path
+        
+        return output_paths
+
+    def _generate_speech_or_none(self, text: str, speaker: Optional[str] = None) -> Optional[str]:
+        """Generate speech for one text, printing the error and returning None if it fails."""
+        try:
+            return self.generate_speech(text, speaker)
+        except Exception as e:
+            print(f"Error processing text: {text[:50]}... - {str(e)}")
+            return None
+
+    def _speech_cache_params(self, text: str, speaker: Optional[str] = None) -> Dict[str, Any]:
+        """Get the artifact cache parameters of the speech generated for a preprocessed text."""
+        cache_params = {
+            "text": hash_text(text),
+            "model_type": self.model_type,
+            "model": self.model_name,
+            "speaker": speaker or getattr(self, "speaker", None)
+        }
+        if self.bark_seed is not None:
+            cache_params["seed"] = self.bark_seed
+        return cache_params
+
     def generate_speech(self, 
                        text: str, 
                        speaker: Optional[str] = None) -> str:
@@ -145,41 +451,39 @@ class TTSGenerator:
         try:
             # Preprocess text
             text = self.preprocess_text(text)
+            if not text:
+                raise ValueError("No text to synthesize (empty or whitespace only)")
             
             # Generate unique output path
             output_path = str(self.file_manager.get_temp_path("tts_audio", ".wav"))
             
+            if self.cache:
+                cache_params = self._speech_cache_params(text, speaker)
+                if self.cache.get_file("tts", cache_params, output_path):
+                    print("Using cached speech")
+                    return output_path
+            
             if self.model_type == "tacotron2":
-                # For Tacotron2, process the entire text at once
-                self.model.tts_to_file(
-                    text=text,
-                    file_path=output_path,
-                    speaker=speaker
-                )
+                # For Tacotron2, synthesize sentence by sentence so each one can be cached
+                sentences = self.split_text_into_chunks(text, max_chars=0)
+                with WavWriter(output_path) as writer:
+                    for i, (samples, sample_rate) in enumerate(self.synthesize_many(sentences, speaker)):
+                        if i > 0:
+                            writer.write_silence(TACOTRON2_SENTENCE_GAP)
+                        writer.write(samples, sample_rate)
             else:  # bark
                 # Split text into chunks if using Bark
                 text_chunks = self.split_text_into_chunks(text)
                 print(f"Split text into {len(text_chunks)} chunks")
                 
-                # Generate audio for each chunk
-                combined_audio = AudioSegment.empty()
-                for i, chunk in enumerate(text_chunks, 1):
-                    print(f"Generating audio for chunk {i}/{len(text_chunks)}")
-                    audio_array = generate_audio(chunk, history_prompt=speaker or self.speaker)
-                    
-                    # Save chunk temporarily
-                    chunk_path = str(self.file_manager.get_temp_path(f"chunk_{i}", ".wav"))
-                    wavfile.write(chunk_path, SAMPLE_RATE, audio_array)
-                    
-                    # Add to combined audio
-                    chunk_audio = AudioSegment.from_wav(chunk_path)
-                    combined_audio += chunk_audio
+                # Generate audio for each chunk and stream it straight into the output file
+                with WavWriter(output_path, BARK_SAMPLE_RATE) as writer:
+                    for i, (samples, sample_rate) in enumerate(self.synthesize_many(text_chunks, speaker), 1):
+                        writer.write(samples, sample_rate)
+                        print(f"Generated audio for chunk {i}/{len(text_chunks)}")
                     
-                    # Clean up chunk file
-                    Path(chunk_path).unlink()
-                
-                # Export final combined audio
-                combined_audio.export(output_path, format="wav")
+            if self.cache:
+                self.cache.put_file("tts", cache_params, output_path)
             
             return output_path
             
@@ -202,34 +506,23 @@ class TTSGenerator:
         Returns:
             str: Path to the adjusted audio file (same as input if no adjustment needed)
         """
-        # Load the audio
-        audio = AudioSegment.from_wav(audio_path)
-        current_duration = len(audio) / 1000.0  # Convert to seconds
+        current_duration = media_duration(audio_path)
         
         # If audio is shorter or equal to target, no need to adjust
         if current_duration <= target_duration:
             return audio_path
-            
+        
         # Calculate the required speed up factor
-        # When we want to speed up, we need to reduce the frame rate
-        # So we divide the frame rate by the speed factor
         speed_factor = current_duration / target_duration
-        new_frame_rate = int(audio.frame_rate / speed_factor)
         
         # Create a new file path for the adjusted audio
         adjusted_path = str(self.file_manager.get_temp_path("adjusted_audio", ".wav"))
         
-        # Speed up the audio by reducing the frame rate first, then setting it back
-        adjusted_audio = audio._spawn(audio.raw_data, overrides={
-            "frame_rate": new_frame_rate
-        }).set_frame_rate(audio.frame_rate)
-        
-        # Export the sped up audio
-        adjusted_audio.export(adjusted_path, format="wav")
+        # Speed up without raising the pitch of the voice
+        time_stretch_wav(audio_path, adjusted_path, speed_factor)
         
         # Verify the new duration
-        new_audio = AudioSegment.from_wav(adjusted_path)
-        new_duration = len(new_audio) / 1000.0
+        new_duration = media_duration(adjusted_path)
         print(f"Audio sped up: {current_duration:.2f}s -> {new_duration:.2f}s (target: {target_duration:.2f}s)")
         
         return adjusted_path
@@ -251,11 +544,22 @@ class TTSGenerator:
         """
         # First generate the speech normally
         audio_path = self.generate_speech(text, speaker)
+        return self._fit_to_duration(audio_path, target_duration)
+
+    def _fit_to_duration(self, audio_path: str, target_duration: float) -> Tuple[str, float]:
+        """
+        Speeds up generated speech that is longer than the target duration.
         
+        Args:
+            audio_path (str): Path to the generated audio file
+            target_duration (float): Target duration in seconds
+        
+        Returns:
+            Tuple[str, float]: Tuple of (path to audio file, actual duration in seconds)
+        """
         try:
-            # Load the generated audio to get its duration
-            audio = AudioSegment.from_wav(audio_path)
-            current_duration = len(audio) / 1000.0  # Convert to seconds
+            # Read the duration from the WAV header
+            current_duration = media_duration(audio_path)
             
             # If audio is longer than target duration, adjust its speed
             if current_duration > target_duration:
@@ -263,8 +567,7 @@ class TTSGenerator:
                 adjusted_path = self.adjust_audio_speed(audio_path, target_duration)
                 
                 # Get the new duration
-                adjusted_audio = AudioSegment.from_wav(adjusted_path)
-                actual_duration = len(adjusted_audio) / 1000.0
+                actual_duration = media_duration(adjusted_path)
                 
                 # Clean up the original file if we created a new one
                 if adjusted_path != audio_path:
@@ -301,6 +604,14 @@ class TTSGenerator:
         # Preprocess all texts
         texts = [self.preprocess_text(text) for text in texts]
         
+        if self.model_type == "tacotron2" and self.worker_pool is not None:
+            audio_paths = self._generate_batch_with_pool(texts, speaker)
+            return [
+                self._fit_to_duration(audio_path, duration)
+                for audio_path, duration in zip(audio_paths, target_durations)
+                if audio_path
+            ]
+        
         results = []
         
         def process_text_with_timing(text: str, target_duration: float) -> Optional[Tuple[str, float]]:
@@ -325,3 +636,12 @@ class TTSGenerator:
                     results.append(result)
         
         return results
+
+    def close(self):
+        """Stop the Tacotron2 or Bark worker processes and close the server connection, if any."""
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+        if self.bark_pool is not None:
+            self.bark_pool.close()
+        if self.server is not None:
+            self.server.close()
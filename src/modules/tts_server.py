@@ -0,0 +1,441 @@
+"""
+Module for a resident TTS synthesis server on a Unix domain socket.
+
+The server loads the selected models once and keeps them in memory, so jobs
+using a TTSGenerator with a server socket don't pay the model load on startup.
+
+Run `python -m modules.tts_server --help` from the src directory to start it.
+
+Wire format: every message is a 4-byte big-endian header length, a UTF-8 JSON
+header and, if the header has a non-zero "payload_bytes", that many bytes of
+little-endian int16 PCM. Requests carry an "op" of "health", "ready" or
+"synthesize"; responses carry a "status" of "ok", "busy" or "error".
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+DEFAULT_SOCKET_PATH = str(Path(tempfile.gettempdir()) / "ytgermanizer_tts.sock")
+DEFAULT_MAX_QUEUE = 16
+HEADER_LENGTH = struct.Struct(">I")
+
+class TTSServerError(RuntimeError):
+    """Raised when the TTS server can't be reached or reports an error."""
+
+class TTSServerBusy(TTSServerError):
+    """Raised when the server's request queue is full."""
+
+def default_socket_path() -> str:
+    """Get the server socket path from TTS_SERVER_SOCKET, or the default path."""
+    return os.environ.get("TTS_SERVER_SOCKET", DEFAULT_SOCKET_PATH)
+
+def _recv_exact(sock: socket.socket, num_bytes: int) -> bytes:
+    """Read exactly num_bytes from a socket."""
+    buffer = bytearray()
+    while len(buffer) < num_bytes:
+        data = sock.recv(min(num_bytes - len(buffer), 1024 * 1024))
+        if not data:
+            raise ConnectionError("Connection closed by peer")
+        buffer.extend(data)
+    return bytes(buffer)
+
+def send_message(sock: socket.socket, header: Dict[str, Any], payload: bytes = b""):
+    """
+    Sends one message.
+    
+    Args:
+        sock (socket.socket): Connected socket
+        header (Dict[str, Any]): JSON header
+        payload (bytes): Optional binary payload
+    """
+    header = dict(header, payload_bytes=len(payload))
+    encoded = json.dumps(header).encode("utf-8")
+    sock.sendall(HEADER_LENGTH.pack(len(encoded)) + encoded + payload)
+
+def recv_message(sock: socket.socket) -> Tuple[Dict[str, Any], bytes]:
+    """
+    Receives one message.
+    
+    Args:
+        sock (socket.socket): Connected socket
+    
+    Returns:
+        Tuple[Dict[str, Any], bytes]: JSON header and binary payload
+    """
+    (length,) = HEADER_LENGTH.unpack(_recv_exact(sock, HEADER_LENGTH.size))
+    header = json.loads(_recv_exact(sock, length).decode("utf-8"))
+    payload = _recv_exact(sock, header.pop("payload_bytes", 0))
+    return header, payload
+
+class _ModelWorker:
+    def __init__(self, model_type: str, use_gpu: bool, max_queue: int):
+        """
+        Holds one resident model and synthesizes its queued requests one at a time.
+        
+        Args:
+            model_type (str): TTS model type ("tacotron2" or "bark")
+            use_gpu (bool): Whether to use GPU acceleration
+            max_queue (int): Maximum number of waiting requests
+        """
+        self.model_type = model_type
+        self.use_gpu = use_gpu
+        self.requests: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.state = "loading"
+        self.generator = None
+        self.thread = threading.Thread(target=self._run, name=f"tts-{model_type}", daemon=True)
+    
+    def _run(self):
+        """Load the model, then serve requests until stopped."""
+        try:
+            # Imported here so clients of this module don't pull in the TTS stack
+            from .tts_generator import TTSGenerator
+            start = time.perf_counter()
+            print(f"Loading {self.model_type} model...")
+            self.generator = TTSGenerator(model_type=self.model_type, use_gpu=self.use_gpu, server_socket="")
+            print(f"{self.model_type} model ready in {time.perf_counter() - start:.1f}s")
+            self.state = "ready"
+        except Exception as e:
+            self.state = f"error: {str(e)}"
+            print(f"Error loading {self.model_type} model: {str(e)}")
+        
+        while True:
+            item = self.requests.get()
+            if item is None:
+                break
+            request, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._synthesize(request))
+            except Exception as e:
+                future.set_exception(e)
+    
+    def _synthesize(self, request: Dict[str, Any]) -> Tuple[np.ndarray, int]:
+        """Synthesize one request with the resident model."""
+        if self.state != "ready":
+            raise TTSServerError(f"{self.model_type} model is not available ({self.state})")
+        
+        text = request["text"]
+        speaker = request.get("speaker")
+        if self.model_type == "bark" and request.get("seed") is not None:
+            from .bark_batch import generate_audio_seeded
+            from .tts_cache import to_int16
+            from bark import SAMPLE_RATE
+            audio = generate_audio_seeded(
+                text, speaker or self.generator.speaker, request["seed"], request.get("index", 0)
+            )
+            return to_int16(audio), SAMPLE_RATE
+        return self.generator.synthesize_chunk(text, speaker)
+    
+    def submit(self, request: Dict[str, Any]) -> Future:
+        """
+        Queues a synthesis request.
+        
+        Raises:
+            queue.Full: If the queue is full
+        """
+        future: Future = Future()
+        self.requests.put_nowait((request, future))
+        return future
+
+class TTSServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    
+    def __init__(self,
+                 socket_path: Optional[str] = None,
+                 model_types: Optional[List[str]] = None,
+                 use_gpu: bool = True,
+                 max_queue: int = DEFAULT_MAX_QUEUE):
+        """
+        Initialize the TTS server. Models load in the background, so health
+        requests are answered while they are still loading.
+        
+        Args:
+            socket_path (Optional[str]): Unix socket path. If None, uses default_socket_path()
+            model_types (Optional[List[str]]): Models to keep resident (default: tacotron2)
+            use_gpu (bool): Whether to use GPU acceleration
+            max_queue (int): Maximum number of waiting requests per model, further
+                requests are answered with "busy"
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.started_at = time.time()
+        self.max_queue = max_queue
+        self.workers = {
+            model_type: _ModelWorker(model_type, use_gpu, max_queue)
+            for model_type in (model_types or ["tacotron2"])
+        }
+        
+        if os.path.exists(self.socket_path):
+            if TTSClient(self.socket_path, timeout=1.0).is_alive():
+                raise TTSServerError(f"A TTS server is already running on {self.socket_path}")
+            # Left over from a server that didn't shut down cleanly
+            os.unlink(self.socket_path)
+        
+        super().__init__(self.socket_path, _RequestHandler)
+    
+    def health(self) -> Dict[str, Any]:
+        """Get the server status."""
+        return {
+            "status": "ok",
+            "ready": all(worker.state == "ready" for worker in self.workers.values()),
+            "models": {model_type: worker.state for model_type, worker in self.workers.items()},
+            "queue_depth": {model_type: worker.requests.qsize() for model_type, worker in self.workers.items()},
+            "max_queue": self.max_queue,
+            "uptime_s": round(time.time() - self.started_at, 1)
+        }
+    
+    def serve(self):
+        """Load the models and serve requests until interrupted."""
+        for worker in self.workers.values():
+            worker.thread.start()
+        print(f"TTS server listening on {self.socket_path}")
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+    
+    def close(self):
+        """Stop the model workers and remove the socket."""
+        for worker in self.workers.values():
+            try:
+                worker.requests.put_nowait(None)
+            except queue.Full:
+                pass
+        self.server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        """Serve requests on one connection until the client disconnects."""
+        while True:
+            try:
+                request, _ = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+            
+            try:
+                self._dispatch(request)
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                send_message(self.request, {"status": "error", "error": str(e)})
+    
+    def _dispatch(self, request: Dict[str, Any]):
+        """Answer one request."""
+        op = request.get("op")
+        if op == "health":
+            send_message(self.request, self.server.health())
+            return
+        
+        worker = self.server.workers.get(request.get("model_type"))
+        if worker is None:
+            send_message(self.request, {
+                "status": "error",
+                "error": f"Model {request.get('model_type')} is not loaded by this server"
+            })
+            return
+        
+        if op == "ready":
+            send_message(self.request, {
+                "status": "ok",
+                "ready": worker.state == "ready",
+                "state": worker.state,
+                "model_name": worker.generator.model_name if worker.generator else None
+            })
+        elif op == "synthesize":
+            try:
+                future = worker.submit(request)
+            except queue.Full:
+                send_message(self.request, {"status": "busy"})
+                return
+            samples, sample_rate = future.result()
+            samples = np.ascontiguousarray(samples, dtype="<i2")
+            send_message(
+                self.request,
+                {"status": "ok", "sample_rate": sample_rate, "num_samples": len(samples)},
+                samples.tobytes()
+            )
+        else:
+            send_message(self.request, {"status": "error", "error": f"Unknown op: {op}"})
+
+class TTSClient:
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 600.0, busy_retries: int = 30):
+        """
+        Initialize a client of the TTS server. One connection is opened lazily
+        and reused; requests from several threads are sent one at a time.
+        
+        Args:
+            socket_path (Optional[str]): Unix socket path. If None, uses default_socket_path()
+            timeout (float): Socket timeout in seconds
+            busy_retries (int): How often to retry a request the server rejected as busy
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self.busy_retries = busy_retries
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+    
+    def _request(self, header: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+        """Send a request and wait for the response."""
+        with self._lock:
+            return self._request_locked(header)
+    
+    def _request_locked(self, header: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+        """Send a request on the shared connection, opening it if needed."""
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise TTSServerError(f"Cannot connect to TTS server at {self.socket_path}: {str(e)}")
+            self._sock = sock
+        
+        try:
+            send_message(self._sock, header)
+            response, payload = recv_message(self._sock)
+        except (OSError, ValueError) as e:
+            self._sock.close()
+            self._sock = None
+            raise TTSServerError(f"TTS server connection failed: {str(e)}")
+        
+        if response.get("status") == "busy":
+            raise TTSServerBusy("TTS server queue is full")
+        if response.get("status") != "ok":
+            raise TTSServerError(f"TTS server error: {response.get('error')}")
+        return response, payload
+    
+    def health(self) -> Dict[str, Any]:
+        """Get the server status (model states, queue depth, uptime)."""
+        return self._request({"op": "health"})[0]
+    
+    def is_alive(self) -> bool:
+        """Check whether a server answers on the socket."""
+        try:
+            self.health()
+            return True
+        except TTSServerError:
+            return False
+    
+    def model_status(self, model_type: str) -> Dict[str, Any]:
+        """
+        Gets the state of one model on the server.
+        
+        Args:
+            model_type (str): TTS model type
+        
+        Returns:
+            Dict[str, Any]: "ready" flag, "state" ("loading", "ready" or an error) and "model_name"
+        """
+        return self._request({"op": "ready", "model_type": model_type})[0]
+    
+    def is_ready(self, model_type: str) -> bool:
+        """Check whether the server has a model loaded and ready."""
+        try:
+            return self.model_status(model_type)["ready"]
+        except TTSServerError:
+            return False
+    
+    def wait_until_ready(self, model_type: str, timeout: float = 300.0) -> bool:
+        """
+        Waits for the server to finish loading a model.
+        
+        Args:
+            model_type (str): TTS model type
+            timeout (float): Maximum time to wait in seconds
+        
+        Returns:
+            bool: True if the model is ready
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.is_ready(model_type):
+                return True
+            time.sleep(0.5)
+        return False
+    
+    def synthesize(self,
+                   model_type: str,
+                   text: str,
+                   speaker: Optional[str] = None,
+                   seed: Optional[int] = None,
+                   index: int = 0) -> Tuple[np.ndarray, int]:
+        """
+        Synthesizes text on the server.
+        
+        Args:
+            model_type (str): TTS model type
+            text (str): Text to synthesize
+            speaker (Optional[str]): Speaker preset (for Bark) or speaker ID (for Tacotron2)
+            seed (Optional[int]): Bark seed, generates like bark_batch.generate_audio_seeded
+            index (int): Script position of the chunk, used with seed
+        
+        Returns:
+            Tuple[np.ndarray, int]: int16 samples and sample rate
+        """
+        request = {"op": "synthesize", "model_type": model_type, "text": text,
+                   "speaker": speaker, "seed": seed, "index": index}
+        for attempt in range(self.busy_retries + 1):
+            try:
+                response, payload = self._request(request)
+                break
+            except TTSServerBusy:
+                if attempt == self.busy_retries:
+                    raise
+                time.sleep(min(5.0, 0.1 * 2 ** attempt))
+        
+        samples = np.frombuffer(payload, dtype="<i2").astype(np.int16, copy=False)
+        return samples, response["sample_rate"]
+    
+    def close(self):
+        """Close the connection."""
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+def main():
+    """Command line interface for running the TTS server or querying its health."""
+    parser = argparse.ArgumentParser(description="Keep TTS models resident and serve synthesis requests.")
+    parser.add_argument("--socket", help=f"Unix socket path (default: $TTS_SERVER_SOCKET or {DEFAULT_SOCKET_PATH})")
+    parser.add_argument("--models", nargs="+", choices=["tacotron2", "bark"], default=["tacotron2"],
+                        help="Models to keep loaded")
+    parser.add_argument("--cpu", action="store_true", help="Don't use the GPU")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Waiting requests per model before the server answers busy")
+    parser.add_argument("--health", action="store_true", help="Print the status of a running server and exit")
+    args = parser.parse_args()
+    
+    if args.health:
+        client = TTSClient(args.socket, timeout=5.0)
+        try:
+            print(json.dumps(client.health(), indent=2))
+        except TTSServerError as e:
+            print(str(e))
+            raise SystemExit(1)
+        finally:
+            client.close()
+        return
+    
+    server = TTSServer(args.socket, model_types=args.models, use_gpu=not args.cpu, max_queue=args.max_queue)
+    server.serve()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Module for Tacotron2 synthesis in a pool of worker processes.
+
+Each worker loads the model once, gets its own torch thread budget and CPU set,
+and returns audio through shared memory instead of pickled arrays.
+"""
+import os
+import queue
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+def _worker_main(worker_id: int,
+                 model_name: str,
+                 cpus: List[int],
+                 threads: int,
+                 task_queue: mp.Queue,
+                 result_queue: mp.Queue):
+    """
+    Entry point of a synthesis worker process.
+    
+    Args:
+        worker_id (int): Index of the worker
+        model_name (str): Coqui TTS model name
+        cpus (List[int]): CPUs the worker is pinned to (empty to leave affinity unchanged)
+        threads (int): Number of torch intra-op threads
+        task_queue (mp.Queue): Queue of (job_id, text, speaker) tasks, None to stop
+        result_queue (mp.Queue): Queue for ready, result and error messages
+    """
+    try:
+        if cpus and hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+        # Set before torch is imported so OpenMP/MKL pick them up
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(threads)
+        
+        import torch
+        from TTS.api import TTS
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+        
+        model = TTS(model_name=model_name, progress_bar=False)
+        sample_rate = model.synthesizer.output_sample_rate
+    except Exception as e:
+        result_queue.put(("error", None, f"Worker {worker_id} failed to start: {str(e)}"))
+        return
+    
+    result_queue.put(("ready", worker_id, None))
+    
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        job_id, text, speaker = task
+        try:
+            wav = np.asarray(model.tts(text=text, speaker=speaker), dtype=np.float32)
+            samples = (np.clip(wav, -1.0, 1.0) * 32767).astype(np.int16)
+            
+            # Hand the samples over through shared memory, the parent unlinks the block
+            shm = shared_memory.SharedMemory(create=True, size=max(samples.nbytes, 1))
+            np.ndarray(samples.shape, dtype=np.int16, buffer=shm.buf)[:] = samples
+            result_queue.put(("ok", job_id, (shm.name, len(samples), sample_rate)))
+            shm.close()
+        except Exception as e:
+            result_queue.put(("error", job_id, str(e)))
+
+def _split_cpus(num_workers: int) -> List[List[int]]:
+    """Split the CPUs available to this process into one contiguous group per worker."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    
+    if num_workers > len(cpus):
+        return [[] for _ in range(num_workers)]
+    
+    per_worker = len(cpus) // num_workers
+    return [cpus[i * per_worker:(i + 1) * per_worker] for i in range(num_workers)]
+
+class TacotronProcessPool:
+    def __init__(self,
+                 model_name: str,
+                 num_workers: Optional[int] = None,
+                 threads_per_worker: int = 2,
+                 pin_cpus: bool = True):
+        """
+        Initialize the process pool. Workers are started on first use.
+        
+        Args:
+            model_name (str): Coqui TTS model name
+            num_workers (Optional[int]): Number of worker processes. If None, one per
+                threads_per_worker available CPUs
+            threads_per_worker (int): Torch intra-op threads per worker
+            pin_cpus (bool): Whether to pin each worker to its own set of CPUs
+        """
+        cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+        self.model_name = model_name
+        self.num_workers = num_workers or max(1, cpu_count // threads_per_worker)
+        self.threads_per_worker = threads_per_worker
+        self.pin_cpus = pin_cpus
+        self.processes: List[mp.Process] = []
+        self._next_job_id = 0
+    
+    def start(self):
+        """Start the worker processes (each loads the model once)."""
+        if self.processes:
+            return
+        
+        context = mp.get_context("spawn")
+        self.task_queue = context.Queue()
+        self.result_queue = context.Queue()
+        
+        cpu_groups = _split_cpus(self.num_workers) if self.pin_cpus else [[] for _ in range(self.num_workers)]
+        print(f"Starting {self.num_workers} Tacotron2 workers with {self.threads_per_worker} threads each")
+        for worker_id, cpus in enumerate(cpu_groups):
+            process = context.Process(
+                target=_worker_main,
+                args=(worker_id, self.model_name, cpus, self.threads_per_worker,
+                      self.task_queue, self.result_queue),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+    
+    def _receive(self) -> Tuple[str, Optional[int], object]:
+        """Wait for the next message from the workers, failing if they have all died."""
+        while True:
+            try:
+                return self.result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not any(process.is_alive() for process in self.processes):
+                    raise RuntimeError("All Tacotron2 workers exited unexpectedly")
+    
+    def imap(self, texts: List[str], speaker: Optional[str] = None) -> Iterator[Tuple[np.ndarray, int]]:
+        """
+        Synthesizes texts in parallel, yielding results in input order as they become available.
+        
+        Args:
+            texts (List[str]): Texts to synthesize
+            speaker (Optional[str]): Speaker ID
+        
+        Yields:
+            Tuple[np.ndarray, int]: int16 samples and sample rate per text
+        """
+        self.start()
+        
+        first_job_id = self._next_job_id
+        self._next_job_id += len(texts)
+        for offset, text in enumerate(texts):
+            self.task_queue.put((first_job_id + offset, text, speaker))
+        
+        pending: Dict[int, Tuple[np.ndarray, int]] = {}
+        next_offset = 0
+        while next_offset < len(texts):
+            kind, job_id, payload = self._receive()
+            if kind == "ready":
+                continue
+            if kind == "error":
+                if job_id is not None and not 0 <= job_id - first_job_id < len(texts):
+                    continue
+                raise RuntimeError(f"Tacotron2 synthesis failed: {payload}")
+            
+            shm_name, num_samples, sample_rate = payload
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                samples = np.ndarray((num_samples,), dtype=np.int16, buffer=shm.buf).copy()
+            finally:
+                shm.close()
+                shm.unlink()
+            
+            # Results of an earlier call that was aborted by an error are dropped
+            if 0 <= job_id - first_job_id < len(texts):
+                pending[job_id - first_job_id] = (samples, sample_rate)
+            
+            while next_offset in pending:
+                yield pending.pop(next_offset)
+                next_offset += 1
+    
+    def synthesize(self, texts: List[str], speaker: Optional[str] = None) -> List[Tuple[np.ndarray, int]]:
+        """
+        Synthesizes texts in parallel.
+        
+        Args:
+            texts (List[str]): Texts to synthesize
+            speaker (Optional[str]): Speaker ID
+        
+        Returns:
+            List[Tuple[np.ndarray, int]]: int16 samples and sample rate per text, in input order
+        """
+        return list(self.imap(texts, speaker))
+    
+    def close(self):
+        """Stop the worker processes."""
+        if not self.processes:
+            return
+        for _ in self.processes:
+            self.task_queue.put(None)
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+    
+    def __enter__(self):
+        """Context manager entry point."""
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit point - stops the workers."""
+        self.close()
@@ -1,34 +1,135 @@
 """
 Module for downloading YouTube videos using yt-dlp.
+
+Besides the muxed download, the audio stream can be fetched on its own so
+extraction and transcription start while the video stream is still downloading.
 """
+import re
 from pathlib import Path
-from yt_dlp import YoutubeDL
+from typing import Optional
+from .artifact_cache import ArtifactCache
+
+YOUTUBE_ID_PATTERN = re.compile(
+    r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)([A-Za-z0-9_-]{11})'
+)
+
+# Fragments (DASH/HLS segments) fetched at the same time per download
+DEFAULT_CONCURRENT_FRAGMENTS = 4
+# Prefer AAC in MP4 so later steps can copy it, any audio-only stream otherwise
+AUDIO_FORMAT = 'bestaudio[ext=m4a]/bestaudio/best'
 
-def download_video(url: str, output_path: str = "downloads/video.mp4") -> str:
+def get_video_id(url: str) -> str:
     """
-    Downloads a YouTube video and saves it to the specified path.
+    Gets a stable identifier for a video URL.
+    
+    YouTube URLs are parsed locally; other URLs are resolved through yt-dlp
+    without downloading.
     
     Args:
-        url (str): YouTube video URL
-        output_path (str): Path where the video will be saved
+        url (str): Video URL
         
     Returns:
-        str: Path to the downloaded video file
+        str: Video identifier (prefixed with the extractor name for non-YouTube sites)
     """
+    match = YOUTUBE_ID_PATTERN.search(url)
+    if match:
+        return match.group(1)
+    
+    from yt_dlp import YoutubeDL
+    with YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    return f"{info['extractor_key']}:{info['id']}"
+
+def video_format(max_height: Optional[int] = None, video_only: bool = False) -> str:
+    """
+    Builds the yt-dlp format selector for the video.
+    
+    Args:
+        max_height (Optional[int]): Highest resolution (in lines) to download. If None, the best available
+        video_only (bool): Select a stream without audio, falling back to a muxed one
+        
+    Returns:
+        str: yt-dlp format selector
+    """
+    cap = f"[height<={max_height}]" if max_height else ""
+    if video_only:
+        return f"bestvideo[ext=mp4]{cap}/bestvideo{cap}/best{cap}"
+    return f"best{cap}"
+
+def _download_format(url: str,
+                     output_path: str,
+                     format_selector: str,
+                     cache: Optional[ArtifactCache],
+                     concurrent_fragments: int,
+                     label: str) -> str:
+    """Download one format selection of a video to output_path, through the cache."""
     # Ensure the output directory exists
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
     
+    if cache:
+        cache_params = {"video_id": get_video_id(url), "format": format_selector}
+        if cache.get_file("download", cache_params, output_path):
+            print(f"Using cached {label} download for video {cache_params['video_id']}")
+            return output_path
+    
     ydl_opts = {
-        'format': 'best',  # Download best quality
+        'format': format_selector,
         'outtmpl': output_path,
         'quiet': False,  # Show progress
         'no_warnings': True,
         'extract_flat': False,
+        'concurrent_fragment_downloads': concurrent_fragments,
     }
     
+    from yt_dlp import YoutubeDL
     try:
         with YoutubeDL(ydl_opts) as ydl:
             ydl.download([url])
+        if cache:
+            cache.put_file("download", cache_params, output_path)
         return output_path
     except Exception as e:
-        raise Exception(f"Failed to download video: {str(e)}")
+        raise Exception(f"Failed to download {label}: {str(e)}")
+
+def download_video(url: str,
+                   output_path: str = "downloads/video.mp4",
+                   cache: Optional[ArtifactCache] = None,
+                   max_height: Optional[int] = None,
+                   video_only: bool = False,
+                   concurrent_fragments: int = DEFAULT_CONCURRENT_FRAGMENTS) -> str:
+    """
+    Downloads a YouTube video and saves it to the specified path.
+    
+    Args:
+        url (str): YouTube video URL
+        output_path (str): Path where the video will be saved
+        cache (Optional[ArtifactCache]): Artifact cache to reuse earlier downloads of the same video
+        max_height (Optional[int]): Highest resolution (in lines) to download. If None, the best available
+        video_only (bool): Download only the video stream (the audio comes from download_audio)
+        concurrent_fragments (int): Fragments of segmented streams downloaded at the same time
+        
+    Returns:
+        str: Path to the downloaded video file
+    """
+    return _download_format(url, output_path, video_format(max_height, video_only), cache,
+                            concurrent_fragments, "video stream" if video_only else "video")
+
+def download_audio(url: str,
+                   output_path: str = "downloads/source_audio.m4a",
+                   cache: Optional[ArtifactCache] = None,
+                   concurrent_fragments: int = DEFAULT_CONCURRENT_FRAGMENTS) -> str:
+    """
+    Downloads only the best audio stream of a video, a fraction of the video's size.
+    
+    The file keeps its original codec; ffmpeg detects the container from its contents.
+    
+    Args:
+        url (str): YouTube video URL
+        output_path (str): Path where the audio will be saved
+        cache (Optional[ArtifactCache]): Artifact cache to reuse earlier downloads of the same video
+        concurrent_fragments (int): Fragments of segmented streams downloaded at the same time
+        
+    Returns:
+        str: Path to the downloaded audio file
+    """
+    return _download_format(url, output_path, AUDIO_FORMAT, cache, concurrent_fragments, "audio")
@@ -0,0 +1,82 @@
+"""
+Module for writing WAV files incrementally from NumPy sample blocks.
+"""
+import wave
+from typing import Optional
+import numpy as np
+from .tts_cache import to_int16
+
+class WavWriter:
+    def __init__(self, output_path: str, sample_rate: Optional[int] = None, channels: int = 1):
+        """
+        Initialize an incremental 16-bit PCM WAV writer.
+        
+        Samples are written to disk as they arrive, so memory use doesn't grow
+        with the length of the output.
+        
+        Args:
+            output_path (str): Path of the WAV file to write
+            sample_rate (Optional[int]): Sample rate in Hz. If None, taken from the first write
+            channels (int): Number of interleaved channels
+        """
+        self.output_path = output_path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.num_frames = 0
+        self._wav = None
+    
+    def _open(self):
+        """Open the output file once the sample rate is known."""
+        self._wav = wave.open(self.output_path, 'wb')
+        self._wav.setnchannels(self.channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(self.sample_rate)
+    
+    def write(self, samples: np.ndarray, sample_rate: Optional[int] = None):
+        """
+        Appends samples to the file.
+        
+        Args:
+            samples (np.ndarray): Float samples in [-1, 1] or int16 samples
+            sample_rate (Optional[int]): Sample rate of the block, must match the file's rate
+        """
+        if sample_rate is not None:
+            if self.sample_rate is None:
+                self.sample_rate = sample_rate
+            elif sample_rate != self.sample_rate:
+                raise ValueError(f"Sample rate mismatch: got {sample_rate}, writing {self.sample_rate}")
+        
+        if self._wav is None:
+            if self.sample_rate is None:
+                raise ValueError("Sample rate must be set before writing samples")
+            self._open()
+        
+        samples = to_int16(samples)
+        self._wav.writeframesraw(np.ascontiguousarray(samples, dtype='<i2').tobytes())
+        self.num_frames += len(samples) // self.channels
+    
+    def write_silence(self, num_frames: int):
+        """Append num_frames frames of silence."""
+        self.write(np.zeros(num_frames * self.channels, dtype=np.int16))
+    
+    @property
+    def duration(self) -> float:
+        """Duration of the audio written so far in seconds."""
+        return self.num_frames / self.sample_rate if self.sample_rate else 0.0
+    
+    def close(self):
+        """Finalize the WAV header and close the file."""
+        if self._wav is None and self.sample_rate is not None:
+            # Nothing written, still produce a valid empty file
+            self._open()
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+    
+    def __enter__(self):
+        """Context manager entry point."""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit point - finalizes the file."""
+        self.close()